@@ -7,10 +7,18 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
 
+import gc
 import os
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "card_generator.settings")
 
+# Load the app with GC paused, then freeze it so forked workers share the preloaded pages
+# (see card_maker.preload; run gunicorn with --preload to load before forking).
+gc.disable()
 application = get_asgi_application()
+
+from card_maker.preload import prefork  # noqa: E402
+
+prefork()
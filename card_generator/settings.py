@@ -125,6 +125,145 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Card rendering
+CARD_FONT_CACHE_SIZE = 64
+CARD_FONT_PRELOAD = True
+# Warm Pillow plugins/encoders, qrcode and URL patterns at startup and gc.freeze() after loading
+# (wsgi.py/asgi.py), so workers forked from a preloading parent (gunicorn --preload) share them.
+CARD_PRELOAD = True
+# Hangul+Latin subsets built by `manage.py subset_fonts`; used instead of static/fonts when present
+CARD_FONT_SUBSET_DIR = BASE_DIR / 'static' / 'fonts' / 'subset'
+CARD_GLYPH_CACHE_BYTES = 32 * 1024 * 1024
+CARD_PALETTE_CACHE_SIZE = 4096
+CARD_BACKGROUND_CACHE_BYTES = 64 * 1024 * 1024
+CARD_BACKGROUND_WARM_COLORS = ['#3498db']
+CARD_BATCH_WORKERS = None
+CARD_BATCH_CHUNKSIZE = 4
+CARD_BATCH_MAX_ITEMS = 1000
+CARD_JOB_WORKERS = 2
+# RUNNING jobs not updated for this many seconds are treated as abandoned (their process died) and re-queued
+CARD_JOB_LEASE = 300
+# How often (seconds) job submission/status polling looks for expired leases and re-queues them
+CARD_JOB_RECOVERY_INTERVAL = 60
+CARD_DETERMINISTIC = False
+CARD_RENDER_CACHE_MAX_BYTES = 512 * 1024 * 1024
+CARD_MEDIA_MAX_AGE = 3600
+CARD_INLINE_RESPONSE = False
+# /preview/ renders thumbnails of several template x theme variants in one call (inline, no files/QR);
+# the picked one is generated with /generate/ {template, theme, seed}
+CARD_PREVIEW_PROFILE = 'jpeg'
+CARD_PREVIEW_MAX_VARIANTS = 40
+# Identical concurrent /generate/ requests from one client share a single render.
+# With an Idempotency-Key header the response is replayed for CARD_IDEMPOTENCY_TTL seconds;
+# point CARD_IDEMPOTENCY_CACHE at a shared cache (Redis/Memcached) when running several processes.
+CARD_IDEMPOTENCY_CACHE = 'default'
+CARD_IDEMPOTENCY_TTL = 600
+
+# Where generated cards/QR codes/specs/print files live.
+# FileSystemStorage shards MEDIA_ROOT/<kind>/ab/cd/<name>; with write_behind the file is
+# served from the in-process buffer until the background writer has flushed it.
+# Old entries are pruned past CARD_STORAGE_TTL seconds or CARD_RENDER_CACHE_MAX_BYTES.
+CARD_STORAGE = {
+    'BACKEND': 'card_maker.storage.FileSystemStorage',
+    'OPTIONS': {'shard_depth': 2, 'write_behind': True, 'fsync': True},
+}
+CARD_STORAGE_TTL = 7 * 24 * 3600
+
+# Output sizes: layouts are relative, so one template renders at any of these.
+# 'print' is rendered only on download (?resolution=print) at CARD_PRINT_DPI.
+CARD_RESOLUTIONS = {
+    'thumbnail': (320, 200),
+    'preview': (800, 500),
+}
+CARD_PRINT_DPI = 300
+CARD_PRINT_INCHES = (3.5, 2.0)
+CARD_FONT_PRELOAD_RESOLUTIONS = ['thumbnail', 'preview']
+
+# Bulk print sheets (/generate/batch/?format=pdf|tiff&paper=a4|letter, manage.py impose_cards).
+# Cards are rendered at print size and pasted onto one sheet at a time; orientation is picked
+# to fit the most cards (3.5x2in: 10-up on A4, 12-up on Letter). JPEG quality None keeps PDF pages lossless.
+CARD_SHEET_PAPER = 'a4'
+CARD_SHEET_MARGIN_INCHES = 0.25
+CARD_SHEET_GAP_INCHES = 0
+CARD_SHEET_CROP_MARKS = True
+CARD_SHEET_JPEG_QUALITY = 90
+CARD_SHEET_TIFF_COMPRESSION = 'tiff_lzw'
+CARD_SHEET_WINDOW = 16
+
+# Vector cards (/download/<file>/?format=svg|pdf): the same templates recorded as shapes and text.
+# Fonts are embedded as per-document subsets when fontTools is installed; without it SVG falls back
+# to STATIC_URL font links and PDF text to image masks.
+CARD_VECTOR_EMBED_FONTS = True
+CARD_VECTOR_FONT_CACHE_BYTES = 8 * 1024 * 1024
+
+# Edit sessions (POST /edits/, PATCH /edits/<id>/): palette, background and each text field are kept
+# as separate layers in this process; a PATCH redraws only the layers its fields affect. Sessions
+# evicted from this budget (or started in another process) are rebuilt from the stored spec.
+# Only the creator can edit: POST returns an edit_token (the spec keeps its SHA-256) that each PATCH
+# must send as Authorization: Bearer <token>; the session id itself is public (file name, QR code).
+CARD_EDIT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Extra template modules imported at startup; each calls TEMPLATE_REGISTRY.register(CardTemplate(...))
+CARD_TEMPLATE_PLUGINS = []
+
+# Image encoding profiles: Pillow format, optional mode conversion and save() options
+CARD_ENCODING_PROFILES = {
+    'preview': {'format': 'PNG', 'options': {'compress_level': 1}},
+    'archival': {'format': 'PNG', 'options': {'optimize': True}},
+    'webp': {'format': 'WEBP', 'options': {'quality': 85, 'method': 4}},
+    'jpeg': {'format': 'JPEG', 'options': {'quality': 90, 'optimize': True}},
+    'qr': {'format': 'PNG', 'mode': '1', 'options': {'optimize': True}},
+    'print': {'format': 'PNG', 'options': {'compress_level': 6}},
+}
+CARD_OUTPUT_PROFILE = 'preview'
+CARD_QR_PROFILE = 'qr'
+CARD_PRINT_PROFILE = 'print'
+CARD_QR_BOX_SIZE = 10
+CARD_QR_CACHE_SIZE = 1024
+# None searches all 8 masks for the lowest penalty; a fixed mask (0-7) skips that search
+CARD_QR_MASK_PATTERN = None
+# Put the QR into the card (and skip the separate qrcodes/ file) in the square each layout reserves
+# between its text rows; cards too small for CARD_QR_MIN_MODULE_PX per module keep the separate file
+CARD_QR_ON_CARD = False
+CARD_QR_MIN_MODULE_PX = 2
+
+# NumPy backgrounds for galaxy/grunge (falls back to ImageDraw when numpy is missing)
+CARD_VECTORIZED_BACKGROUNDS = True
+CARD_GALAXY_STARS = 150
+CARD_GALAXY_NEBULA = False
+CARD_GRUNGE_SPECKLES = 100
+CARD_GRADIENT_CACHE_BYTES = 16 * 1024 * 1024
+
+# Async views: rendering and file reads run in separate bounded thread pools.
+# When a pool's queue is full the request gets 503 (or 429 past the per-client limit) with Retry-After.
+CARD_ASYNC_RENDER_WORKERS = None
+CARD_ASYNC_RENDER_QUEUE = 32
+CARD_ASYNC_PER_CLIENT = 4
+CARD_ASYNC_IO_WORKERS = 8
+CARD_ASYNC_IO_QUEUE = 256
+CARD_ASYNC_IO_PER_CLIENT = 16
+# Proxies (addresses or networks) whose X-Forwarded-For/X-Real-IP name the client. Behind nginx list
+# its address here, or every user shares the proxy's per-client limit, single-flight and Idempotency-Key scope.
+CARD_TRUSTED_PROXIES = []
+
+# Per-stage timing metrics (served at /metrics/) and optional JSON timing logs
+CARD_METRICS_ENABLED = True
+CARD_TIMING_LOG = False
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "card_maker": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+# None, 'x-sendfile' (Apache/lighttpd) or 'x-accel-redirect' (nginx)
+CARD_SENDFILE = None
+CARD_SENDFILE_PREFIX = '/protected-media/'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
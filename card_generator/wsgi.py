@@ -7,10 +7,18 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 """
 
+import gc
 import os
 
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "card_generator.settings")
 
+# Load the app with GC paused, then freeze it so forked workers share the preloaded pages
+# (see card_maker.preload; run gunicorn with --preload to load before forking).
+gc.disable()
 application = get_wsgi_application()
+
+from card_maker.preload import prefork  # noqa: E402
+
+prefork()
@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CardMakerConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "card_maker"
+
+    def ready(self):
+        if getattr(settings, 'CARD_TEMPLATE_PLUGINS', None):
+            from .utils import TEMPLATE_REGISTRY
+            TEMPLATE_REGISTRY.load_plugins()
+        if getattr(settings, 'CARD_FONT_PRELOAD', False):
+            from .utils import preload_fonts
+            preload_fonts()
+        if getattr(settings, 'CARD_BACKGROUND_WARM_COLORS', None):
+            from .utils import warm_background_cache
+            warm_background_cache()
+        if getattr(settings, 'CARD_PRELOAD', True):
+            from .preload import preload
+            preload()
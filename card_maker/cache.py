@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache: #스레드 안전한 LRU 캐시 (개수 또는 비용 기준 제한)
+    def __init__(self, max_size, sizeof=None):
+        self.max_size = max_size
+        self.sizeof = sizeof or (lambda value: 1)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key][0]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        cost = self.sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self.current_size -= self._data.pop(key)[1]
+            self._data[key] = (value, cost)
+            self.current_size += cost
+            while self.current_size > self.max_size and len(self._data) > 1:
+                _, (_, evicted_cost) = self._data.popitem(last=False)
+                self.current_size -= evicted_cost
+                self.evictions += 1
+
+    def get_or_create(self, key, factory):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key][0]
+            self.misses += 1
+        value = factory()
+        self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.current_size = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._data),
+                'size': self.current_size,
+                'max_size': self.max_size,
+            }
@@ -0,0 +1,231 @@
+import hashlib
+import hmac
+import json
+import os
+import random
+import secrets
+import threading
+import uuid
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from PIL import ImageDraw
+from . import metrics
+from .cache import LRUCache
+from .layout import card_size
+from .palette import normalize_hex
+from .storage import get_storage
+from .utils import (
+    TEMPLATE_REGISTRY, add_card_qr, card_profile, card_urls, choose_variant, encode_image, generate_color_palette,
+    generate_qr_code, get_background, place_field, print_profile, profile_extension, qr_profile, save_card_files,
+    spec_name, validate_variant,
+)
+from .vector import VECTOR_FORMATS
+
+#편집 세션은 새 명함 파일 하나(card_<세션>)이고, QR은 바뀌지 않는 다운로드 주소를 가리키므로 처음에 한 번만 만듦.
+#레이어(팔레트, 배경, 필드별 글자)는 이 프로세스의 EDIT_SESSIONS에만 있고, 없으면 저장된 spec으로 다시 그림.
+#합성 결과는 처음부터 render_spec으로 그린 명함과 같음 (배경이 쓰는 rng 순서가 같으므로).
+#세션 id는 공개된 파일 이름(QR에도 들어감)이므로, 편집은 시작할 때 만든 사람에게만 주는 토큰으로 확인 (spec에는 해시만 저장).
+
+TEXT_FIELDS = ('name', 'school', 'phone')
+EDIT_FIELDS = (*TEXT_FIELDS, 'favorite_color', 'template', 'theme')
+
+
+class LayeredCard: #편집 중인 명함 하나: 레이어를 따로 보관하고 spec이 바뀌면 영향을 받는 레이어만 다시 그림
+    def __init__(self, spec, resolution='preview'):
+        self.spec = spec
+        self.resolution = resolution
+        self.width, self.height = card_size(resolution)
+        self.colors = None
+        self.background = None
+        self.fields = {} #필드 -> (글자, GlyphRun, 위치)
+
+    def reset(self, spec): #다른 프로세스가 더 새로운 spec을 저장했으면 레이어를 모두 버리고 그 spec부터 다시 그림
+        self.spec = spec
+        self.resolution = spec.get('resolution', 'preview')
+        self.width, self.height = card_size(self.resolution)
+        self.colors = None
+        self.background = None
+        self.fields = {}
+
+    @property
+    def nbytes(self):
+        return 3 * self.width * self.height + sum(3 * run.mask.width * run.mask.height for _, run, _ in self.fields.values())
+
+    def render(self, spec): #바뀐 레이어를 다시 그리고 합성한 이미지와 다시 그린 레이어 이름 반환
+        old = self.spec
+        user_data = spec['user_data']
+        variant_changed = self.background is None or any(spec[key] != old[key] for key in ('template', 'theme', 'seed'))
+        palette_changed = self.colors is None or spec['theme'] != old['theme'] or \
+            user_data['favorite_color'] != old['user_data']['favorite_color']
+        dirty = []
+
+        if palette_changed:
+            with metrics.timed('palette'):
+                self.colors = generate_color_palette(user_data['favorite_color'], spec['theme'])
+            dirty.append('palette')
+
+        if variant_changed or palette_changed:
+            rng = random.Random(spec['seed'])
+            choose_variant(rng, spec['template'], spec['theme']) #render_spec과 같은 순서로 rng 소비
+            with metrics.timed('background'):
+                self.background = get_background(spec['template'], self.colors, self.width, self.height, rng)
+            dirty.append('background')
+
+        layout = TEMPLATE_REGISTRY.compiled(spec['template'], self.width, self.height)
+        if variant_changed:
+            self.fields = {}
+        with metrics.timed('text'):
+            for field in layout.fields:
+                text = user_data[field.key]
+                if field.key not in self.fields or self.fields[field.key][0] != text:
+                    self.fields[field.key] = (text, *place_field(field, text))
+                    dirty.append(field.key)
+
+        with metrics.timed('composite'): #글자색/글로우는 팔레트를 따르므로 글자는 매번 배경 위에 다시 찍음 (마스크는 캐시됨)
+            img = self.background.copy()
+            draw = ImageDraw.Draw(img)
+            for field in layout.fields:
+                _, run, xy = self.fields[field.key]
+                field.draw(draw, xy, run, field.resolve_color(self.colors), self.colors)
+
+        self.spec = spec
+        return img, dirty
+
+
+EDIT_SESSIONS = LRUCache(
+    getattr(settings, 'CARD_EDIT_CACHE_BYTES', 64 * 1024 * 1024),
+    sizeof=lambda card: card.nbytes,
+)
+metrics.register_cache('edit_layers', EDIT_SESSIONS)
+
+_session_locks = {} #세션 id -> [Lock, 기다리는 수] (캐시에 없는 세션을 복원할 때도 같은 세션의 편집은 한 번에 하나씩)
+_session_locks_lock = threading.Lock()
+
+@contextmanager
+def session_lock(session_id):
+    with _session_locks_lock:
+        entry = _session_locks.setdefault(session_id, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _session_locks_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _session_locks[session_id]
+
+def session_files(session_id):
+    return f'card_{session_id}.{profile_extension(card_profile())}', f'qr_{session_id}.{profile_extension(qr_profile())}'
+
+def session_result(session_id, spec, host, dirty, qr_on_card=False):
+    filename, qr_filename = session_files(session_id)
+    urls = card_urls(filename, qr_filename, host)
+    return {
+        **urls,
+        'qr_url': None if qr_on_card else urls['qr_url'],
+        'card_url': f"{urls['card_url']}?v={spec['revision']}", #같은 파일을 덮어쓰므로 브라우저 캐시를 피하도록
+        'session_id': session_id,
+        'revision': spec['revision'],
+        'template': spec['template'],
+        'theme': spec['theme'],
+        'dirty': dirty,
+    }
+
+def token_digest(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+def check_token(spec, token): #토큰이 없거나 다르면 PermissionDenied
+    digest = spec.get('edit_token_sha256')
+    if not token or not digest or not hmac.compare_digest(digest, token_digest(token)):
+        raise PermissionDenied('이 명함을 편집할 권한이 없습니다.')
+
+def start_edit(spec, host, resolution='preview'): #편집 세션 시작: 모든 레이어와 QR을 한 번 그림 (편집 토큰은 이 응답에만 포함)
+    session_id = uuid.uuid4().hex[:16]
+    token = secrets.token_urlsafe(32)
+    spec = {**spec, 'resolution': resolution, 'revision': 0, 'edit_token_sha256': token_digest(token)}
+    card = LayeredCard(spec, resolution)
+    with metrics.collect('edit_start'):
+        img, dirty = card.render(spec)
+        urls = save_card_files(img, host, name=session_id, spec=spec)
+    card.spec = {**spec, 'download_url': urls['download_url']} #QR과 다운로드 주소는 세션 동안 그대로
+    EDIT_SESSIONS.set(session_id, card)
+    result = session_result(session_id, card.spec, host, [*dirty, 'qr'], qr_on_card=urls['qr_url'] is None)
+    return {**result, 'edit_token': token}
+
+def card_spec(filename): #기존 명함의 spec으로 세션 시작 (없으면 None)
+    try:
+        spec = json.loads(get_storage().read('specs', spec_name(filename)))
+    except FileNotFoundError:
+        return None
+    return {key: spec[key] for key in ('user_data', 'template', 'theme', 'seed')}
+
+def parse_changes(data): #PATCH 본문에서 바꿀 필드만 검증 (잘못되면 ValueError)
+    if not isinstance(data, dict):
+        raise ValueError('바꿀 항목을 JSON 객체로 보내주세요.')
+    unknown = set(data) - set(EDIT_FIELDS)
+    if unknown:
+        raise ValueError(f"바꿀 수 없는 항목입니다: {', '.join(sorted(unknown))}")
+    if not data:
+        raise ValueError('바꿀 항목이 없습니다.')
+    changes = {}
+    for key in TEXT_FIELDS:
+        if key in data:
+            if not isinstance(data[key], str):
+                raise ValueError(f'{key}는 문자열이어야 합니다.')
+            changes[key] = data[key]
+    if 'favorite_color' in data:
+        changes['favorite_color'] = normalize_hex(data['favorite_color'])
+    if 'template' in data or 'theme' in data:
+        changes['template'], changes['theme'] = data.get('template'), data.get('theme')
+    return changes
+
+def session_spec(session_id): #저장된 세션 spec (없거나 편집 세션으로 만든 명함이 아니면 None)
+    filename, _ = session_files(session_id)
+    try:
+        spec = json.loads(get_storage().read('specs', spec_name(filename)))
+    except FileNotFoundError:
+        return None
+    return spec if 'revision' in spec else None
+
+def derived_files(filename): #다운로드할 때 spec으로 렌더링해 저장해둔 인쇄용/벡터 파일 (편집하면 지워서 다시 렌더링되게 함)
+    stem = os.path.splitext(filename)[0]
+    return [('print', f'{stem}.{profile_extension(print_profile())}'), *(('vector', f'{stem}.{fmt}') for fmt in VECTOR_FORMATS)]
+
+def edit_card(session_id, changes, host, token): #바뀐 필드만 반영해 다시 합성하고 명함 파일만 덮어씀 (없는 세션이면 None)
+    with session_lock(session_id), metrics.collect('edit_card'):
+        stored = session_spec(session_id) #다른 프로세스가 그 사이에 편집했으면 이 프로세스의 레이어는 낡은 것
+        if stored is None:
+            return None
+        check_token(stored, token)
+        card = EDIT_SESSIONS.get(session_id)
+        if card is None: #다른 프로세스에서 시작했거나 캐시에서 밀려난 세션은 저장된 spec으로 (레이어 없이) 복원
+            card = LayeredCard(stored, stored.get('resolution', 'preview'))
+        elif stored['revision'] != card.spec['revision']:
+            card.reset(stored)
+        spec = card.spec
+        user_data = {**spec['user_data'], **{key: changes[key] for key in (*TEXT_FIELDS, 'favorite_color') if key in changes}}
+        template, theme = spec['template'], spec['theme']
+        if 'template' in changes:
+            template, _ = validate_variant(changes['template'] or template)
+            if changes['theme'] is None and theme not in TEMPLATE_REGISTRY.themes_for(template): #새 템플릿에서 쓸 수 없는 테마면 seed로 다시 고름
+                _, theme = choose_variant(random.Random(spec['seed']), template)
+            template, theme = validate_variant(template, changes['theme'] or theme)
+        spec = {**spec, 'user_data': user_data, 'template': template, 'theme': theme, 'revision': spec['revision'] + 1}
+
+        img, dirty = card.render(spec)
+        qr_on_card = add_card_qr(img, spec['template'], spec['download_url'])
+        with metrics.timed('encode'):
+            card_bytes, _ = encode_image(img, card_profile())
+        filename, qr_filename = session_files(session_id)
+        storage = get_storage()
+        with metrics.timed('write'):
+            storage.save('specs', spec_name(filename), json.dumps(spec, ensure_ascii=False).encode('utf-8'))
+            storage.save('cards', filename, card_bytes)
+            if not qr_on_card and not storage.exists('qrcodes', qr_filename): #새 템플릿의 빈 자리가 작아 명함에 넣지 못한 경우
+                storage.save('qrcodes', qr_filename, encode_image(generate_qr_code(spec['download_url']), qr_profile())[0])
+            for kind, name in derived_files(filename):
+                storage.delete(kind, name)
+        EDIT_SESSIONS.set(session_id, card) #레이어 크기가 바뀌었을 수 있으므로 비용을 다시 계산
+    return session_result(session_id, spec, host, dirty, qr_on_card)
@@ -0,0 +1,65 @@
+from django.conf import settings
+from PIL import Image
+from . import metrics
+from .cache import LRUCache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+GRADIENT_KINDS = ('linear', 'diagonal', 'radial', 'noise')
+
+MASK_CACHE = LRUCache(
+    getattr(settings, 'CARD_GRADIENT_CACHE_BYTES', 16 * 1024 * 1024),
+    sizeof=lambda img: img.width * img.height,
+)
+metrics.register_cache('gradient', MASK_CACHE)
+
+def noise_source(width, height, seed=0): #확대하기 전의 저해상도 노이즈 (벡터 출력은 이것을 그대로 늘려 씀)
+    small = (max(1, width // 16), max(1, height // 16))
+    if np is not None:
+        values = np.random.default_rng(seed).integers(0, 256, (small[1], small[0]), dtype=np.uint8)
+        return Image.fromarray(values)
+    return Image.effect_noise(small, 64)
+
+def noise_mask(width, height, seed=0): #저해상도 노이즈를 확대해 부드러운 얼룩 만들기
+    return noise_source(width, height, seed).resize((width, height), Image.BICUBIC)
+
+def build_mask(kind, width, height):
+    if kind == 'linear':
+        return Image.linear_gradient('L').rotate(90).resize((width, height), Image.BILINEAR)
+    if kind == 'diagonal':
+        side = max(width, height) * 2
+        gradient = Image.linear_gradient('L').resize((side, side), Image.BILINEAR).rotate(45, resample=Image.BILINEAR, fillcolor=255)
+        left, top = (side - width) // 2, (side - height) // 2
+        return gradient.crop((left, top, left + width, top + height))
+    if kind == 'radial':
+        return Image.radial_gradient('L').resize((width, height), Image.BILINEAR)
+    if kind == 'noise':
+        return noise_mask(width, height)
+    raise ValueError(f'알 수 없는 그라데이션 종류: {kind}')
+
+def gradient_mask(kind, width, height, strength=1.0): #(종류, 크기, 세기)별로 캐시된 L 모드 마스크
+    def factory():
+        mask = build_mask(kind, width, height)
+        if strength != 1.0:
+            mask = mask.point(lambda v: int(v * strength))
+        return mask
+    return MASK_CACHE.get_or_create((kind, width, height, strength), factory)
+
+def fill_background(draw, width, height, colors, fill, kind='linear', strength=1.0): #단색 배경, gradient 테마면 마스크로 색을 섞음
+    end = colors.get('gradient_end')
+    if end is not None and hasattr(draw, 'gradient'): #벡터 캔버스는 마스크 대신 그라데이션 자체를 기록
+        draw.gradient(kind, width, height, fill, end, strength)
+        return
+    draw.rectangle([0, 0, width, height], fill=fill)
+    if end is not None:
+        draw.bitmap((0, 0), gradient_mask(kind, width, height, strength), fill=end)
+
+def gradient_image(width, height, colors, fill, kind='linear', strength=1.0):
+    img = Image.new('RGB', (width, height), fill)
+    end = colors.get('gradient_end')
+    if end is not None:
+        img.paste(end, (0, 0), gradient_mask(kind, width, height, strength))
+    return img
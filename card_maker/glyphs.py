@@ -0,0 +1,79 @@
+from django.conf import settings
+from PIL import Image, ImageDraw, ImageFilter
+from . import metrics
+from .cache import LRUCache
+
+
+class GlyphRun: #한 번 측정한 문자열 (bbox, 마스크는 처음 찍을 때 래스터화; 벡터 출력은 font/text만 사용)
+    __slots__ = ('font', 'text', 'bbox', '_mask', 'effects')
+
+    def __init__(self, font, text):
+        self.font = font
+        self.text = text
+        self.bbox = font.getbbox(text)
+        self._mask = None
+        self.effects = {}
+
+    @property
+    def width(self): #draw.textbbox((0, 0), ...)[2]와 같은 값
+        return self.bbox[2]
+
+    @property
+    def empty(self):
+        return self.bbox[2] <= self.bbox[0] or self.bbox[3] <= self.bbox[1]
+
+    @property
+    def mask(self):
+        if self._mask is None:
+            self._mask = rasterize(self.font, self.text, self.bbox)
+        return self._mask
+
+
+#폰트 객체는 (경로, 크기)별로 FONT_CACHE에 하나씩만 있으므로 키로 그대로 사용
+#효과 마스크(neon 글로우)도 같은 항목에 붙으므로 마스크 크기의 3배로 계산
+GLYPH_CACHE = LRUCache(
+    getattr(settings, 'CARD_GLYPH_CACHE_BYTES', 32 * 1024 * 1024),
+    sizeof=lambda run: 3 * max(0, run.bbox[2] - run.bbox[0]) * max(0, run.bbox[3] - run.bbox[1]) + 64,
+)
+metrics.register_cache('glyph', GLYPH_CACHE)
+
+def rasterize(font, text, bbox):
+    left, top, right, bottom = bbox
+    mask = Image.new('L', (max(0, right - left), max(0, bottom - top)), 0)
+    if text:
+        ImageDraw.Draw(mask).text((-left, -top), text, fill=255, font=font)
+    return mask
+
+def glyph_run(font, text): #(폰트, 크기, 문자열)별로 캐시된 측정값과 마스크
+    return GLYPH_CACHE.get_or_create((font, text), lambda: GlyphRun(font, text))
+
+def draw_glyph_run(draw, xy, run, fill): #draw.text 대신 캐시된 마스크를 찍기 (벡터 캔버스에는 글자 그대로 기록)
+    if run.empty:
+        return
+    if hasattr(draw, 'text_run'):
+        draw.text_run(xy, run, fill)
+        return
+    draw.bitmap((xy[0] + run.bbox[0], xy[1] + run.bbox[1]), run.mask, fill=fill)
+
+def neon_masks(run, spread, blur): #글로우(팽창 후 블러)와 테두리(1픽셀 팽창) 마스크를 한 번만 계산
+    key = ('neon', spread, blur)
+    masks = run.effects.get(key)
+    if masks is None:
+        pad = spread + blur * 2
+        padded = Image.new('L', (run.mask.width + pad * 2, run.mask.height + pad * 2), 0)
+        padded.paste(run.mask, (pad, pad))
+        glow = padded.filter(ImageFilter.MaxFilter(spread * 2 + 1)).filter(ImageFilter.GaussianBlur(blur))
+        core = padded.filter(ImageFilter.MaxFilter(3))
+        masks = run.effects[key] = (pad, glow, core)
+    return masks
+
+def draw_neon_run(draw, xy, run, glow_color, fill, spread, blur): #블러 글로우 + 외곽선을 합성 두 번으로 그리기
+    if run.empty:
+        return
+    if hasattr(draw, 'neon_run'):
+        draw.neon_run(xy, run, glow_color, fill, spread, blur)
+        return
+    pad, glow, core = neon_masks(run, spread, blur)
+    origin = (xy[0] + run.bbox[0] - pad, xy[1] + run.bbox[1] - pad)
+    draw.bitmap(origin, glow, fill=glow_color)
+    draw.bitmap(origin, core, fill=fill)
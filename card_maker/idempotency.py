@@ -0,0 +1,58 @@
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import caches
+from . import metrics
+
+#여러 프로세스가 결과를 공유하려면 CARD_IDEMPOTENCY_CACHE가 Redis/Memcached 같은 공용 캐시여야 함
+#(기본 LocMemCache는 프로세스마다 따로라 같은 워커로 다시 온 재시도만 잡음)
+
+
+class IdempotencyConflict(Exception): #409: 같은 키의 요청이 아직 처리 중, 422: 같은 키로 다른 내용을 보냄
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def request_fingerprint(*parts): #요청 내용(검증된 값)의 해시: 같은 요청인지 비교하고 single-flight 키로도 사용
+    body = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+class IdempotencyStore: #Idempotency-Key별로 처리 중 표시와 완료된 응답을 잠시 보관
+    def __init__(self, prefix, ttl=None):
+        self.prefix = prefix
+        self.ttl = getattr(settings, 'CARD_IDEMPOTENCY_TTL', 600) if ttl is None else ttl
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'CARD_IDEMPOTENCY_CACHE', 'default')]
+
+    def cache_key(self, client, key): #키는 클라이언트별로 분리 (다른 사람이 같은 키를 써도 응답이 섞이지 않게)
+        digest = hashlib.sha256(f'{client}\x1f{key}'.encode('utf-8')).hexdigest()
+        return f'{self.prefix}:{digest}'
+
+    async def begin(self, client, key, fingerprint): #처음 보는 키면 None (이 요청이 처리), 완료된 키면 저장된 응답
+        cache_key = self.cache_key(client, key)
+        if await self.cache.aadd(cache_key, {'state': 'pending', 'fingerprint': fingerprint}, self.ttl):
+            return None
+        entry = await self.cache.aget(cache_key)
+        if entry is None: #그 사이에 만료됨
+            await self.cache.aset(cache_key, {'state': 'pending', 'fingerprint': fingerprint}, self.ttl)
+            return None
+        if entry['fingerprint'] != fingerprint:
+            raise IdempotencyConflict(422, '같은 Idempotency-Key로 다른 내용의 요청을 보냈습니다.')
+        if entry['state'] == 'pending':
+            raise IdempotencyConflict(409, '같은 Idempotency-Key의 요청을 처리 중입니다. 잠시 후 다시 시도해주세요.')
+        metrics.increment('idempotent_replays')
+        return entry['response']
+
+    def record(self, client, key, fingerprint, response): #성공한 응답(JSON 본문)을 보관
+        self.cache.set(
+            self.cache_key(client, key),
+            {'state': 'done', 'fingerprint': fingerprint, 'response': response},
+            self.ttl,
+        )
+
+    def abandon(self, client, key): #실패하면 처리 중 표시를 지워 같은 키로 다시 시도할 수 있게 함
+        self.cache.delete(self.cache_key(client, key))
@@ -0,0 +1,149 @@
+from django.conf import settings
+from PIL import Image, ImageDraw, TiffImagePlugin
+from . import metrics
+from .layout import print_size
+from .pdf import PdfWriter
+from .utils import iter_print_cards
+
+PAPER_SIZES = { #인치 (세로 방향)
+    'a4': (210 / 25.4, 297 / 25.4),
+    'letter': (8.5, 11.0),
+}
+
+
+class SheetLayout: #용지 한 장에 인쇄용 명함을 배치할 위치와 재단선 (용지 방향은 더 많이 들어가는 쪽)
+    def __init__(self, paper=None, margin=None, gap=None, crop_marks=None):
+        paper = (paper or getattr(settings, 'CARD_SHEET_PAPER', 'a4')).lower()
+        if paper not in PAPER_SIZES:
+            raise ValueError(f'지원하지 않는 용지입니다: {paper}')
+        self.paper = paper
+        self.dpi = getattr(settings, 'CARD_PRINT_DPI', 300)
+        margin = getattr(settings, 'CARD_SHEET_MARGIN_INCHES', 0.25) if margin is None else margin
+        gap = getattr(settings, 'CARD_SHEET_GAP_INCHES', 0) if gap is None else gap
+        self.crop_marks = getattr(settings, 'CARD_SHEET_CROP_MARKS', True) if crop_marks is None else crop_marks
+
+        self.card_width, self.card_height = print_size()
+        self.gap = round(gap * self.dpi)
+        margin = round(margin * self.dpi)
+        paper_width, paper_height = (round(inches * self.dpi) for inches in PAPER_SIZES[paper])
+        portrait = self._grid(paper_width, paper_height, margin)
+        landscape = self._grid(paper_height, paper_width, margin)
+        if landscape[0] * landscape[1] > portrait[0] * portrait[1]:
+            self.width, self.height, (self.columns, self.rows) = paper_height, paper_width, landscape
+        else:
+            self.width, self.height, (self.columns, self.rows) = paper_width, paper_height, portrait
+        if not self.columns or not self.rows:
+            raise ValueError('용지에 명함이 들어가지 않습니다. 여백이나 간격을 줄여주세요.')
+
+        self.left = (self.width - self.columns * self.card_width - (self.columns - 1) * self.gap) // 2
+        self.top = (self.height - self.rows * self.card_height - (self.rows - 1) * self.gap) // 2
+        self.positions = [
+            (self.left + column * (self.card_width + self.gap), self.top + row * (self.card_height + self.gap))
+            for row in range(self.rows) for column in range(self.columns)
+        ]
+
+    def _grid(self, width, height, margin):
+        columns = max(0, (width - 2 * margin + self.gap) // (self.card_width + self.gap))
+        rows = max(0, (height - 2 * margin + self.gap) // (self.card_height + self.gap))
+        return columns, rows
+
+    @property
+    def per_sheet(self):
+        return len(self.positions)
+
+    def draw_crop_marks(self, draw): #재단선은 바깥 여백에만 그려서 명함 위에 겹치지 않게 함
+        offset = round(self.dpi / 16)
+        length = min(round(self.dpi / 8), min(self.left, self.top) - offset)
+        if length <= 0:
+            return
+        line_width = max(1, round(self.dpi / 144)) #0.5pt
+        xs = sorted({x for x, _ in self.positions} | {x + self.card_width for x, _ in self.positions})
+        ys = sorted({y for _, y in self.positions} | {y + self.card_height for _, y in self.positions})
+        top, bottom = ys[0], ys[-1]
+        left, right = xs[0], xs[-1]
+        for x in xs:
+            draw.line([(x, top - offset - length), (x, top - offset)], fill='black', width=line_width)
+            draw.line([(x, bottom + offset), (x, bottom + offset + length)], fill='black', width=line_width)
+        for y in ys:
+            draw.line([(left - offset - length, y), (left - offset, y)], fill='black', width=line_width)
+            draw.line([(right + offset, y), (right + offset + length, y)], fill='black', width=line_width)
+
+    def new_sheet(self):
+        sheet = Image.new('RGB', (self.width, self.height), 'white')
+        if self.crop_marks:
+            self.draw_crop_marks(ImageDraw.Draw(sheet))
+        return sheet
+
+
+def impose(cards, layout): #명함을 받는 대로 용지에 붙이고 용지가 차면 내보냄 (메모리에는 용지 한 장만 유지)
+    sheet = None
+    slot = 0
+    for card in cards:
+        if sheet is None:
+            sheet = layout.new_sheet()
+        if card.size != (layout.card_width, layout.card_height):
+            card = card.resize((layout.card_width, layout.card_height), Image.LANCZOS)
+        sheet.paste(card, layout.positions[slot])
+        slot += 1
+        if slot == layout.per_sheet:
+            yield sheet
+            sheet = None
+            slot = 0
+    if sheet is not None:
+        yield sheet
+
+
+def write_pdf(sheets, fileobj, dpi): #용지마다 바로 페이지로 기록
+    quality = getattr(settings, 'CARD_SHEET_JPEG_QUALITY', 90)
+    pages = 0
+    with PdfWriter(fileobj) as pdf:
+        for sheet in sheets:
+            with metrics.timed('sheet_encode'):
+                pdf.add_image_page(sheet, dpi, quality)
+            metrics.increment('sheets')
+            pages += 1
+    return pages
+
+def write_tiff(sheets, fileobj, dpi): #AppendingTiffWriter로 페이지를 하나씩 덧붙임 (save_all은 전체를 목록으로 모음)
+    compression = getattr(settings, 'CARD_SHEET_TIFF_COMPRESSION', 'tiff_lzw')
+    pages = 0
+    with TiffImagePlugin.AppendingTiffWriter(fileobj, new=True) as tf:
+        for sheet in sheets:
+            with metrics.timed('sheet_encode'):
+                sheet.save(tf, format='TIFF', dpi=(dpi, dpi), compression=compression)
+                tf.newFrame()
+            metrics.increment('sheets')
+            pages += 1
+    return pages
+
+SHEET_FORMATS = {
+    'pdf': (write_pdf, 'application/pdf'),
+    'tiff': (write_tiff, 'image/tiff'),
+}
+
+
+def impose_cards(items, fileobj, fmt='pdf', layout=None, executor=None): #인쇄용으로 렌더링한 명함을 용지에 배치해 파일로 기록
+    if fmt not in SHEET_FORMATS:
+        raise ValueError(f'지원하지 않는 출력 형식입니다: {fmt}')
+    if not items:
+        raise ValueError('명함 정보가 없습니다.')
+    layout = layout or SheetLayout()
+    failures = []
+
+    def images(): #실패한 항목은 건너뛰고 자리를 비우지 않음
+        for index, result in enumerate(iter_print_cards(items, executor)):
+            if result['success']:
+                yield result['image']
+            else:
+                failures.append({'index': index, 'error': result['error']})
+
+    writer, _ = SHEET_FORMATS[fmt]
+    with metrics.collect('impose'):
+        sheets = writer(impose(images(), layout), fileobj, layout.dpi)
+    return {
+        'sheets': sheets,
+        'cards': len(items) - len(failures),
+        'per_sheet': layout.per_sheet,
+        'paper': layout.paper,
+        'failures': failures,
+    }
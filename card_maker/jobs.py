@@ -0,0 +1,84 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+from . import metrics
+from .models import RenderJob
+from .utils import plan_card, render_spec, save_card_files
+
+_executor = None
+_executor_lock = threading.Lock()
+_last_recovery = 0
+
+def recover_jobs(executor, startup=False): #임대 시간이 지난 작업(중단된 프로세스가 맡았던 것)을 PENDING으로 되돌려 다시 큐에 넣음 (처음 시작할 때는 PENDING 전부)
+    now = timezone.now()
+    expired = now - timedelta(seconds=getattr(settings, 'CARD_JOB_LEASE', 300))
+    stale = Q(status__in=(RenderJob.STATUS_RUNNING, RenderJob.STATUS_PENDING), updated_at__lt=expired)
+    if startup:
+        stale |= Q(status=RenderJob.STATUS_PENDING)
+    job_ids = list(RenderJob.objects.filter(stale).values_list('id', flat=True))
+    if not job_ids:
+        return 0
+    RenderJob.objects.filter(stale, id__in=job_ids).update(status=RenderJob.STATUS_PENDING, updated_at=now)
+    for job_id in job_ids: #그 사이 끝난 작업은 claim_job에서 걸러짐
+        executor.submit(run_render_job, job_id)
+    return len(job_ids)
+
+def get_job_executor(): #로컬 렌더링 워커 풀 (처음 생성될 때 남아있는 작업을 다시 큐에 넣음)
+    global _executor, _last_recovery
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CARD_JOB_WORKERS', 2),
+                thread_name_prefix='card-render',
+            )
+            recover_jobs(_executor, startup=True)
+            _last_recovery = time.monotonic()
+        return _executor
+
+def recover_expired_jobs(): #작업 등록/상태 조회 때 호출: CARD_JOB_RECOVERY_INTERVAL마다 한 번 임대가 끝난 작업을 다시 큐에 넣음
+    global _last_recovery
+    executor = get_job_executor()
+    with _executor_lock:
+        now = time.monotonic()
+        if now - _last_recovery < getattr(settings, 'CARD_JOB_RECOVERY_INTERVAL', 60):
+            return 0
+        _last_recovery = now
+    return recover_jobs(executor)
+
+def enqueue_render_job(user_data, host):
+    recover_expired_jobs() #복구 검색을 먼저 끝내서 새 작업이 두 번 제출되지 않게 함
+    job = RenderJob.objects.create(user_data=user_data, host=host)
+    get_job_executor().submit(run_render_job, job.id)
+    return job
+
+def claim_job(job_id): #PENDING인 작업만 가져감 (여러 워커/프로세스가 같은 작업을 제출해도 하나만 실행)
+    return RenderJob.objects.filter(id=job_id, status=RenderJob.STATUS_PENDING).update(
+        status=RenderJob.STATUS_RUNNING, updated_at=timezone.now(),
+    )
+
+def run_render_job(job_id):
+    close_old_connections()
+    try:
+        if not claim_job(job_id):
+            return
+
+        job = RenderJob.objects.get(id=job_id)
+        try:
+            with metrics.collect('render_job'):
+                spec = plan_card(job.user_data)
+                urls = save_card_files(render_spec(spec), job.host, spec=spec)
+        except Exception as e:
+            metrics.increment('render_errors')
+            job.status = RenderJob.STATUS_FAILED
+            job.error = str(e)
+        else:
+            job.status = RenderJob.STATUS_DONE
+            job.result = {**urls, 'template': spec['template']}
+        job.save(update_fields=['status', 'result', 'error', 'updated_at'])
+    finally:
+        close_old_connections()
@@ -0,0 +1,45 @@
+from django.conf import settings
+
+DESIGN_WIDTH, DESIGN_HEIGHT = 800, 500 #배경 그리기 코드가 기준으로 삼는 좌표계
+
+DEFAULT_RESOLUTIONS = {
+    'thumbnail': (320, 200),
+    'preview': (800, 500),
+}
+
+def print_size(): #명함 실물 크기(인치) x DPI
+    dpi = getattr(settings, 'CARD_PRINT_DPI', 300)
+    width_in, height_in = getattr(settings, 'CARD_PRINT_INCHES', (3.5, 2.0))
+    return round(width_in * dpi), round(height_in * dpi)
+
+def resolutions():
+    return ['print', *getattr(settings, 'CARD_RESOLUTIONS', DEFAULT_RESOLUTIONS)]
+
+def card_size(resolution='preview'): #해상도 이름을 픽셀 크기로 변환
+    if resolution == 'print':
+        return print_size()
+    sizes = getattr(settings, 'CARD_RESOLUTIONS', DEFAULT_RESOLUTIONS)
+    if resolution not in sizes:
+        raise ValueError(f'지원하지 않는 해상도입니다: {resolution}')
+    return tuple(sizes[resolution])
+
+def font_pixels(size, height): #폰트 크기는 캔버스 높이에 대한 비율
+    return max(1, round(size * height))
+
+
+class CanvasScale: #800x500 기준 좌표/길이를 실제 캔버스 픽셀로 변환
+    __slots__ = ('sx', 'sy', 's')
+
+    def __init__(self, width, height):
+        self.sx = width / DESIGN_WIDTH
+        self.sy = height / DESIGN_HEIGHT
+        self.s = min(self.sx, self.sy)
+
+    def x(self, value):
+        return round(value * self.sx)
+
+    def y(self, value):
+        return round(value * self.sy)
+
+    def length(self, value): #선 두께, 여백, 도형 크기 (비율 유지, 최소 1픽셀)
+        return max(1, round(value * self.s))
@@ -0,0 +1,79 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image, ImageDraw
+from card_maker import vectorized
+from card_maker.utils import draw_galaxy_background, draw_grunge_background, generate_color_palette
+
+
+def legacy_galaxy(width, height, colors, rng, count):
+    img = Image.new('RGB', (width, height))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([0, 0, width, height], fill=(10, 10, 30))
+    for i in range(count):
+        x = rng.randint(0, width)
+        y = rng.randint(0, height)
+        size = rng.choice([1] * 80 + [2] * 15 + [3] * 5)
+        brightness = rng.randint(100, 255)
+        if size == 1:
+            draw.point((x, y), fill=(brightness, brightness, brightness))
+        else:
+            draw.ellipse([x, y, x + size, y + size], fill=(brightness, brightness, brightness))
+    return img
+
+
+class Command(BaseCommand):
+    help = 'ImageDraw 배경과 numpy 벡터화 배경(galaxy, grunge)의 렌더링 시간을 비교합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--stars', type=int, nargs='*', default=[2000, 10000])
+
+    def handle(self, *args, **options):
+        if vectorized.np is None:
+            raise CommandError('numpy가 설치되어 있지 않습니다.')
+        colors = generate_color_palette('#3498db', 'vibrant')
+        width, height = 800, 500
+
+        def image_draw(drawer):
+            def render(rng):
+                img = Image.new('RGB', (width, height))
+                drawer(ImageDraw.Draw(img), width, height, colors, rng)
+                return img
+            return render
+
+        cases = [
+            ('galaxy (150)', image_draw(draw_galaxy_background),
+             lambda rng: vectorized.render_galaxy_background(width, height, colors, rng)),
+            ('grunge', image_draw(draw_grunge_background),
+             lambda rng: vectorized.render_grunge_background(width, height, colors, rng)),
+        ]
+        for count in options['stars']:
+            cases.append((
+                f'galaxy ({count})',
+                lambda rng, count=count: legacy_galaxy(width, height, colors, rng, count),
+                lambda rng, count=count: vectorized.render_galaxy_background(width, height, colors, rng, star_count=count),
+            ))
+        cases.append((
+            'galaxy + nebula', None,
+            lambda rng: vectorized.render_galaxy_background(width, height, colors, rng, with_nebula=True),
+        ))
+
+        self.stdout.write(f"{'case':<20}{'ImageDraw ms':>14}{'numpy ms':>12}{'speedup':>10}")
+        for name, legacy, fast in cases:
+            fast_ms = self.measure(fast, options['iterations'])
+            if legacy is None:
+                self.stdout.write(f"{name:<20}{'-':>14}{fast_ms:>12.2f}{'-':>10}")
+                continue
+            legacy_ms = self.measure(legacy, options['iterations'])
+            self.stdout.write(f"{name:<20}{legacy_ms:>14.2f}{fast_ms:>12.2f}{legacy_ms / fast_ms:>9.1f}x")
+
+    def measure(self, render, iterations):
+        samples = []
+        for i in range(iterations):
+            rng = random.Random(i)
+            start = time.perf_counter()
+            render(rng)
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples) * 1000
@@ -0,0 +1,181 @@
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+import PIL
+from django.core.management.base import BaseCommand, CommandError
+from PIL import ImageDraw
+from card_maker.layout import card_size, resolutions
+from card_maker.utils import (
+    BACKGROUND_CACHE, COLOR_THEMES, FONT_CACHE, TEMPLATE_REGISTRY, TEMPLATES,
+    card_profile, draw_common_text_layout, encode_image, generate_color_palette,
+    generate_qr_code, get_background, qr_profile,
+)
+from card_maker.vector import FONT_SUBSET_CACHE, VECTOR_FORMATS, VectorCanvas, encode_vector
+
+STAGES = ['palette', 'layout', 'background', 'text', 'encode', 'qr']
+BACKENDS = ['raster', *VECTOR_FORMATS] #raster: ImageDraw -> 인코딩 프로필, svg/pdf: VectorCanvas -> encode_vector
+
+def percentiles(samples): #p50/p95/p99 (밀리초)
+    if len(samples) == 1:
+        value = samples[0] * 1000
+        return {'p50': value, 'p95': value, 'p99': value}
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'p50': cuts[49] * 1000, 'p95': cuts[94] * 1000, 'p99': cuts[98] * 1000}
+
+def render_stages(user_data, template, theme, rng, url, resolution='preview', backend='raster'): #단계별로 시간을 재면서 명함 한 장 생성 (출력 크기도 반환)
+    timings = {}
+    width, height = card_size(resolution)
+    start = time.perf_counter()
+    colors = generate_color_palette(user_data['favorite_color'], theme)
+    timings['palette'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    TEMPLATE_REGISTRY.compiled(template, width, height)
+    timings['layout'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if backend == 'raster':
+        img = get_background(template, colors, width, height, rng)
+        draw = ImageDraw.Draw(img)
+    else:
+        draw = VectorCanvas(width, height)
+        TEMPLATE_REGISTRY.get(template).background(draw, width, height, colors, rng)
+    timings['background'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    draw_common_text_layout(draw, width, height, template, colors, user_data)
+    timings['text'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if backend == 'raster':
+        data, _ = encode_image(img, card_profile())
+    else:
+        data = encode_vector(draw, backend)
+    timings['encode'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encode_image(generate_qr_code(url), qr_profile())
+    timings['qr'] = time.perf_counter() - start
+    return timings, len(data)
+
+
+class Command(BaseCommand):
+    help = '모든 템플릿 x 색상 테마 조합의 명함 렌더링 시간을 단계별로 측정합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--template', action='append', choices=TEMPLATES)
+        parser.add_argument('--theme', action='append', choices=COLOR_THEMES)
+        parser.add_argument('--color', default='#3498db')
+        parser.add_argument('--resolution', default='preview', choices=resolutions())
+        parser.add_argument('--backend', action='append', choices=BACKENDS, help='여러 번 주면 같은 조합을 백엔드별로 비교 (기본: raster)')
+        parser.add_argument('--cold', action='store_true', help='매 반복마다 폰트/배경/폰트 서브셋 캐시를 비웁니다.')
+        parser.add_argument('--json', dest='json_path', help='결과를 JSON 파일로 저장합니다.')
+        parser.add_argument('--compare', help='이전 JSON 결과와 p50을 비교합니다.')
+        parser.add_argument('--threshold', type=float, default=1.5, help='회귀로 판단할 p50 배율')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations는 1 이상이어야 합니다.')
+
+        user_data = {
+            'name': '홍길동', 'school': '○○고등학교', 'phone': '010-1234-5678',
+            'favorite_color': options['color'],
+        }
+        templates = options['template'] or TEMPLATES
+        themes = options['theme'] or COLOR_THEMES
+        backends = options['backend'] or ['raster']
+
+        results = {}
+        for template in templates:
+            for theme in themes:
+                for backend in backends:
+                    key = f'{template}/{theme}' if backend == 'raster' else f'{template}/{theme}@{backend}'
+                    results[key] = self.bench(user_data, template, theme, backend, options)
+
+        self.report(results)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump({
+                    'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'python': platform.python_version(),
+                    'pillow': PIL.__version__,
+                    'iterations': options['iterations'],
+                    'cold': options['cold'],
+                    'resolution': options['resolution'],
+                    'backends': backends,
+                    'results': results,
+                }, f, indent=2)
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)['results']
+            self.compare(baseline, results, options['threshold'])
+
+    def bench(self, user_data, template, theme, backend, options):
+        samples = {stage: [] for stage in STAGES}
+        totals = []
+        sizes = []
+        resolution = options['resolution']
+        render_stages(user_data, template, theme, random.Random(0), 'http://bench/download/card_warmup.png/', resolution, backend)
+        for i in range(options['iterations']):
+            if options['cold']:
+                FONT_CACHE.clear()
+                TEMPLATE_REGISTRY.clear()
+                BACKGROUND_CACHE.clear()
+                FONT_SUBSET_CACHE.clear()
+            url = f'http://bench/download/card_{template}_{theme}_{i}.png/'
+            timings, size = render_stages(user_data, template, theme, random.Random(i), url, resolution, backend)
+            for stage, value in timings.items():
+                samples[stage].append(value)
+            totals.append(sum(timings.values()))
+            sizes.append(size)
+
+        tracemalloc.start()
+        render_stages(user_data, template, theme, random.Random(0), f'http://bench/download/card_{template}_{theme}_traced.png/', resolution, backend)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'total': percentiles(totals),
+            'stages': {stage: percentiles(values) for stage, values in samples.items()},
+            'peak_alloc_kb': peak / 1024,
+            'output_kb': statistics.median(sizes) / 1024,
+        }
+
+    def report(self, results):
+        header = f"{'template/theme':<30}{'p50':>8}{'p95':>8}{'p99':>8}" + ''.join(f'{stage:>11}' for stage in STAGES) + f"{'peak KB':>10}{'out KB':>9}"
+        self.stdout.write(header)
+        for key, result in results.items():
+            total = result['total']
+            line = f"{key:<30}{total['p50']:>8.2f}{total['p95']:>8.2f}{total['p99']:>8.2f}"
+            line += ''.join(f"{result['stages'][stage]['p50']:>11.2f}" for stage in STAGES)
+            line += f"{result['peak_alloc_kb']:>10.0f}{result.get('output_kb', 0):>9.1f}"
+            self.stdout.write(line)
+
+        medians = [result['total']['p50'] for result in results.values()]
+        overall = statistics.median(medians)
+        for key, result in results.items():
+            if result['total']['p50'] > overall * 3:
+                self.stdout.write(self.style.WARNING(
+                    f"{key}: p50 {result['total']['p50']:.2f}ms, 전체 중앙값({overall:.2f}ms)의 {result['total']['p50'] / overall:.1f}배"
+                ))
+
+    def compare(self, baseline, results, threshold):
+        regressions = 0
+        for key, result in results.items():
+            if key not in baseline:
+                continue
+            before = baseline[key]['total']['p50']
+            after = result['total']['p50']
+            ratio = after / before if before else float('inf')
+            if ratio > threshold:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f'{key}: {before:.2f}ms -> {after:.2f}ms ({ratio:.2f}x)'))
+        if regressions:
+            raise CommandError(f'{regressions}개 조합에서 성능 회귀가 감지되었습니다.')
+        self.stdout.write(self.style.SUCCESS('성능 회귀 없음'))
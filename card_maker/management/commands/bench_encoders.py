@@ -0,0 +1,47 @@
+import random
+import statistics
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from card_maker.utils import (
+    DEFAULT_ENCODING_PROFILES, TEMPLATES, encode_image, generate_qr_code, render_card,
+)
+
+
+class Command(BaseCommand):
+    help = '인코딩 프로필별 인코딩 시간과 출력 크기를 측정합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5)
+        parser.add_argument('--color', default='#3498db')
+
+    def handle(self, *args, **options):
+        profiles = getattr(settings, 'CARD_ENCODING_PROFILES', DEFAULT_ENCODING_PROFILES)
+        user_data = {
+            'name': '홍길동', 'school': '○○고등학교', 'phone': '010-1234-5678',
+            'favorite_color': options['color'],
+        }
+        cards = [render_card(user_data, template, 'vibrant', random.Random(0)) for template in TEMPLATES]
+        qr_img = generate_qr_code('http://example.com/download/card_00000000.png/')
+
+        self.stdout.write(f"{'profile':<12}{'format':<8}{'card ms':>10}{'card KB':>10}{'qr ms':>10}{'qr B':>8}")
+        for name, profile in profiles.items():
+            card_times, card_sizes = [], []
+            for _ in range(options['iterations']):
+                for card in cards:
+                    start = time.perf_counter()
+                    data, _ = encode_image(card, profile)
+                    card_times.append(time.perf_counter() - start)
+                    card_sizes.append(len(data))
+
+            qr_times = []
+            for _ in range(options['iterations']):
+                start = time.perf_counter()
+                qr_data, _ = encode_image(qr_img, profile)
+                qr_times.append(time.perf_counter() - start)
+
+            self.stdout.write(
+                f"{name:<12}{profile['format']:<8}"
+                f"{statistics.median(card_times) * 1000:>10.2f}{statistics.mean(card_sizes) / 1024:>10.1f}"
+                f"{statistics.median(qr_times) * 1000:>10.2f}{len(qr_data):>8}"
+            )
@@ -0,0 +1,80 @@
+import json
+import re
+import time
+from django.core.management.base import BaseCommand, CommandError
+from card_maker.storage import get_storage
+
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_age(value): #'7d', '12h', '30m', '45s' 또는 초 단위 숫자
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smhd]?)', value.strip())
+    if not match:
+        raise CommandError(f'기간 형식이 올바르지 않습니다: {value} (예: 7d, 12h, 30m)')
+    return float(match.group(1)) * UNITS[match.group(2) or 's']
+
+
+def format_age(seconds):
+    if seconds is None:
+        return '-'
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= size:
+            return f'{seconds / size:.1f}{unit}'
+    return f'{seconds:.0f}s'
+
+
+class Command(BaseCommand):
+    help = '명함 저장소의 종류별 사용량을 보여주고, 오래되었거나 용량을 넘는 파일을 정리합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prune', action='store_true', help='TTL/용량 기준으로 오래된 파일부터 삭제')
+        parser.add_argument('--older-than', help='이 기간보다 오래된 파일 삭제 (기본: CARD_STORAGE_TTL)')
+        parser.add_argument('--max-bytes', type=int, help='정리 후 최대 용량 (기본: CARD_RENDER_CACHE_MAX_BYTES)')
+        parser.add_argument('--dry-run', action='store_true', help='삭제하지 않고 대상만 집계')
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        storage = get_storage()
+        storage.flush() #지연 쓰기 중인 파일도 집계에 포함
+
+        report = {'backend': type(storage).__name__, 'ttl': storage.ttl, 'max_bytes': storage.max_bytes}
+        if options['prune'] or options['dry_run']:
+            max_age = parse_age(options['older_than']) if options['older_than'] else storage.ttl
+            max_bytes = storage.max_bytes if options['max_bytes'] is None else options['max_bytes']
+            removed, removed_bytes = storage.prune(max_bytes, max_age, dry_run=options['dry_run'])
+            report['pruned'] = {'files': removed, 'bytes': removed_bytes, 'dry_run': options['dry_run']}
+
+        now = time.time()
+        usage = storage.usage()
+        report['kinds'] = {
+            kind: {
+                'files': entry['files'],
+                'bytes': entry['bytes'],
+                'oldest_age': None if entry['oldest'] is None else now - entry['oldest'],
+                'newest_age': None if entry['newest'] is None else now - entry['newest'],
+            }
+            for kind, entry in usage.items()
+        }
+        report['total_files'] = sum(entry['files'] for entry in usage.values())
+        report['total_bytes'] = sum(entry['bytes'] for entry in usage.values())
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+
+        if 'pruned' in report:
+            pruned = report['pruned']
+            verb = '삭제 예정' if pruned['dry_run'] else '삭제'
+            self.stdout.write(f"{verb}: {pruned['files']}개, {pruned['bytes'] / 1024 / 1024:.1f} MB")
+
+        self.stdout.write(f"{'kind':<10}{'files':>8}{'MB':>10}{'oldest':>10}{'newest':>10}")
+        for kind, entry in report['kinds'].items():
+            self.stdout.write(
+                f"{kind:<10}{entry['files']:>8}{entry['bytes'] / 1024 / 1024:>10.1f}"
+                f"{format_age(entry['oldest_age']):>10}{format_age(entry['newest_age']):>10}"
+            )
+        limit = f"{storage.max_bytes / 1024 / 1024:.0f} MB" if storage.max_bytes else '없음'
+        self.stdout.write(
+            f"합계: {report['total_files']}개, {report['total_bytes'] / 1024 / 1024:.1f} MB "
+            f"(용량 제한 {limit}, TTL {format_age(storage.ttl) if storage.ttl else '없음'}, {report['backend']})"
+        )
@@ -0,0 +1,47 @@
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from card_maker.imposition import SHEET_FORMATS, SheetLayout, impose_cards
+from card_maker.views import parse_batch_rows
+
+
+class Command(BaseCommand):
+    help = '참가자 목록(CSV/JSON)을 인쇄용 명함으로 렌더링해 A4/Letter 용지에 배치한 PDF 또는 TIFF로 저장합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='참가자 목록 파일 (.csv 또는 .json)')
+        parser.add_argument('-o', '--output', required=True, help='출력 파일 (.pdf 또는 .tif/.tiff)')
+        parser.add_argument('--format', choices=list(SHEET_FORMATS), help='출력 형식 (기본: 확장자로 판단)')
+        parser.add_argument('--paper', help='a4 또는 letter (기본: CARD_SHEET_PAPER)')
+        parser.add_argument('--margin', type=float, help='용지 여백 (인치)')
+        parser.add_argument('--gap', type=float, help='명함 사이 간격 (인치)')
+        parser.add_argument('--no-crop-marks', action='store_true')
+
+    def handle(self, *args, **options):
+        extension = os.path.splitext(options['output'])[1].lower().lstrip('.')
+        output_format = options['format'] or {'tif': 'tiff'}.get(extension, extension)
+        if output_format not in SHEET_FORMATS:
+            raise CommandError(f'출력 형식을 알 수 없습니다: {options["output"]} (--format pdf 또는 tiff)')
+
+        try:
+            with open(options['input'], 'rb') as f:
+                items = parse_batch_rows(f.read(), options['input'].lower().endswith('.csv'))
+            layout = SheetLayout(
+                options['paper'], options['margin'], options['gap'],
+                False if options['no_crop_marks'] else None,
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        start = time.perf_counter()
+        with open(options['output'], 'w+b') as f: #TIFF는 페이지를 덧붙일 때 앞부분을 다시 읽으므로 w+b
+            summary = impose_cards(items, f, output_format, layout)
+        elapsed = time.perf_counter() - start
+
+        for failure in summary['failures']:
+            self.stderr.write(f"{failure['index']}번째 항목 실패: {failure['error']}")
+        self.stdout.write(
+            f"{summary['cards']}장 / {summary['sheets']}쪽 ({layout.paper}, {layout.columns}x{layout.rows}, "
+            f"{layout.width}x{layout.height}px) -> {options['output']} "
+            f"{os.path.getsize(options['output']) / 1024 / 1024:.1f} MB, {elapsed:.1f}초"
+        )
@@ -0,0 +1,89 @@
+import logging
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from card_maker.utils import get_font_path
+
+#명함에 쓰이는 문자: ASCII, 라틴-1, 일반 구두점, 기호(○ 등), 한글 자모/음절
+UNICODE_RANGES = [
+    (0x20, 0x7E),
+    (0xA0, 0xFF),
+    (0x2010, 0x205E),
+    (0x2190, 0x21FF),
+    (0x25A0, 0x25FF),
+    (0x2600, 0x26FF),
+    (0x3000, 0x303F),
+    (0x3131, 0x318E),
+    (0xAC00, 0xD7A3),
+    (0xFF01, 0xFF5E),
+]
+
+
+def common_hangul(): #KS X 1001 완성형 2,350자 (--common-hangul)
+    syllables = set()
+    for lead in range(0xB0, 0xC9):
+        for trail in range(0xA1, 0xFF):
+            try:
+                syllables.add(ord(bytes([lead, trail]).decode('euc-kr')))
+            except UnicodeDecodeError:
+                pass
+    return syllables
+
+
+class Command(BaseCommand):
+    help = '템플릿 폰트를 한글+라틴 문자만 남긴 서브셋으로 만듭니다 (fontTools 필요). CARD_FONT_SUBSET_DIR에 있으면 원본 대신 사용됩니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', help='기본: CARD_FONT_SUBSET_DIR')
+        parser.add_argument('--common-hangul', action='store_true', help='한글 음절을 KS X 1001 2,350자로 제한 (더 작지만 드문 글자는 빠짐)')
+        parser.add_argument('--text', default='', help='추가로 포함할 문자')
+        parser.add_argument('--no-hinting', action='store_true', help='힌팅 정보 제거 (더 작아지지만 작은 크기의 글자 모양이 달라질 수 있음)')
+
+    def handle(self, *args, **options):
+        try:
+            from fontTools import subset
+        except ImportError:
+            raise CommandError('fontTools가 설치되어 있지 않습니다: pip install fonttools')
+        logging.getLogger('fontTools').setLevel(logging.ERROR) #지원하지 않는 테이블을 버린다는 경고는 생략
+
+        output_dir = options['output_dir'] or getattr(settings, 'CARD_FONT_SUBSET_DIR', None)
+        if not output_dir:
+            raise CommandError('--output-dir 또는 CARD_FONT_SUBSET_DIR을 지정해주세요.')
+        os.makedirs(output_dir, exist_ok=True)
+
+        unicodes = {code for start, end in UNICODE_RANGES for code in range(start, end + 1)}
+        if options['common_hangul']:
+            unicodes = {code for code in unicodes if not 0xAC00 <= code <= 0xD7A3} | common_hangul()
+        unicodes |= {ord(char) for char in options['text']}
+
+        subset_options = subset.Options()
+        subset_options.layout_features = ['*'] #커닝/합자 등은 그대로 유지
+        subset_options.name_IDs = ['*']
+        subset_options.notdef_outline = True
+        subset_options.hinting = not options['no_hinting']
+
+        total_before = total_after = 0
+        for font_path in sorted(set(get_font_path(subsets=False).values())):
+            if not os.path.exists(font_path):
+                continue
+            start = time.perf_counter()
+            font = subset.load_font(font_path, subset_options)
+            subsetter = subset.Subsetter(subset_options)
+            subsetter.populate(unicodes=unicodes)
+            subsetter.subset(font)
+            output_path = os.path.join(output_dir, os.path.basename(font_path))
+            subset.save_font(font, output_path, subset_options)
+            font.close()
+
+            before, after = os.path.getsize(font_path), os.path.getsize(output_path)
+            total_before += before
+            total_after += after
+            self.stdout.write(
+                f'{os.path.basename(font_path):<40}{before / 1024:>9.0f} KB -> {after / 1024:>7.0f} KB'
+                f'  ({time.perf_counter() - start:.1f}초)'
+            )
+
+        if not total_before:
+            raise CommandError('서브셋을 만들 폰트 파일이 없습니다.')
+        self.stdout.write(f'합계: {total_before / 1024 / 1024:.1f} MB -> {total_after / 1024 / 1024:.1f} MB ({output_dir})')
@@ -0,0 +1,141 @@
+import bisect
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+
+logger = logging.getLogger('card_maker.timing')
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_caches = {}
+_current = contextvars.ContextVar('card_timings', default=None)
+
+
+class RequestTimings: #한 요청 안에서 측정된 단계별 시간과 라벨
+    __slots__ = ('template', 'theme', 'stages')
+
+    def __init__(self):
+        self.template = ''
+        self.theme = ''
+        self.stages = {}
+
+
+def enabled():
+    return getattr(settings, 'CARD_METRICS_ENABLED', True)
+
+def set_labels(template, theme):
+    current = _current.get()
+    if current is not None:
+        current.template = template
+        current.theme = theme
+
+def observe(stage, seconds, template=None, theme=None):
+    current = _current.get()
+    if current is not None:
+        current.stages[stage] = current.stages.get(stage, 0.0) + seconds
+        if template is None:
+            template, theme = current.template, current.theme
+    key = (stage, template or '', theme or '')
+    index = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        entry = _histograms.get(key)
+        if entry is None:
+            entry = _histograms[key] = [[0] * (len(BUCKETS) + 1), 0, 0.0]
+        entry[0][index] += 1
+        entry[1] += 1
+        entry[2] += seconds
+
+def increment(name, template='', theme=''):
+    key = (name, template, theme)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + 1
+
+
+class timed: #단계 시간을 히스토그램에 기록하는 컨텍스트 매니저
+    __slots__ = ('stage', 'template', 'theme', 'start')
+
+    def __init__(self, stage, template=None, theme=None):
+        self.stage = stage
+        self.template = template
+        self.theme = theme
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if enabled():
+            observe(self.stage, time.perf_counter() - self.start, self.template, self.theme)
+        return False
+
+
+@contextmanager
+def collect(event): #요청 단위로 단계별 시간을 모으고 CARD_TIMING_LOG가 켜져 있으면 로그로 남김
+    timings = RequestTimings()
+    token = _current.set(timings)
+    start = time.perf_counter()
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+        total = time.perf_counter() - start
+        if enabled():
+            observe(event, total, timings.template, timings.theme)
+        if getattr(settings, 'CARD_TIMING_LOG', False):
+            logger.info(json.dumps({
+                'event': event,
+                'template': timings.template,
+                'theme': timings.theme,
+                'total_ms': round(total * 1000, 3),
+                'stages_ms': {stage: round(value * 1000, 3) for stage, value in timings.stages.items()},
+            }))
+
+def register_cache(name, cache):
+    _caches[name] = cache
+
+def _labels(**labels):
+    return ','.join(f'{key}="{value}"' for key, value in labels.items() if value != '')
+
+def render_prometheus(): #Prometheus 텍스트 형식으로 출력
+    lines = [
+        '# HELP card_stage_seconds Time spent in each card rendering stage.',
+        '# TYPE card_stage_seconds histogram',
+    ]
+    with _lock:
+        histograms = sorted((key, ([*entry[0]], entry[1], entry[2])) for key, entry in _histograms.items())
+        counters = sorted(_counters.items())
+
+    for (stage, template, theme), (buckets, count, total) in histograms:
+        labels = _labels(stage=stage, template=template, theme=theme)
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS, buckets):
+            cumulative += bucket_count
+            lines.append(f'card_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'card_stage_seconds_bucket{{{labels},le="+Inf"}} {count}')
+        lines.append(f'card_stage_seconds_sum{{{labels}}} {total}')
+        lines.append(f'card_stage_seconds_count{{{labels}}} {count}')
+
+    names = sorted({key[0] for key, _ in counters})
+    for name in names:
+        lines.append(f'# TYPE card_{name}_total counter')
+        for (counter_name, template, theme), value in counters:
+            if counter_name == name:
+                labels = _labels(template=template, theme=theme)
+                lines.append(f'card_{name}_total{{{labels}}} {value}' if labels else f'card_{name}_total {value}')
+
+    for metric in ('hits', 'misses', 'evictions'):
+        lines.append(f'# TYPE card_cache_{metric}_total counter')
+        for name, cache in sorted(_caches.items()):
+            lines.append(f'card_cache_{metric}_total{{cache="{name}"}} {cache.stats()[metric]}')
+    lines.append('# TYPE card_cache_entries gauge')
+    for name, cache in sorted(_caches.items()):
+        lines.append(f'card_cache_entries{{cache="{name}"}} {len(cache)}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,163 @@
+import asyncio
+import contextvars
+import functools
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from . import metrics
+
+
+class Overloaded(Exception): #대기열이 가득 참 (429: 한 클라이언트가 한도 초과, 503: 전체 대기열 초과)
+    def __init__(self, status, retry_after):
+        super().__init__('서버가 혼잡합니다. 잠시 후 다시 시도해주세요.')
+        self.status = status
+        self.retry_after = retry_after
+
+
+class BoundedExecutor: #처리 중 + 대기 중인 작업 수를 제한하는 스레드 풀 (가득 차면 기다리지 않고 거절)
+    def __init__(self, name, workers, max_pending, per_client=None):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self.per_client = per_client
+        self.pending = 0
+        self.avg_seconds = 0.05 #작업 시간의 지수 이동 평균 (Retry-After 추정용)
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'card-{name}')
+
+    def retry_after(self): #대기열이 비워질 때까지 걸릴 예상 시간 (초)
+        return max(1, math.ceil(self.pending * self.avg_seconds / self.workers))
+
+    def _acquire(self, client, count=1): #한 요청이 여러 작업을 내면 대기열은 작업 수만큼, 클라이언트 한도는 1건으로 계산
+        with self._lock:
+            if self.pending + count > self.max_pending:
+                metrics.increment(f'{self.name}_rejected')
+                raise Overloaded(503, self.retry_after())
+            if client is not None and self.per_client and self._clients.get(client, 0) >= self.per_client:
+                metrics.increment(f'{self.name}_rejected')
+                raise Overloaded(429, self.retry_after())
+            self.pending += count
+            if client is not None:
+                self._clients[client] = self._clients.get(client, 0) + 1
+
+    def _release(self, client, start, future):
+        with self._lock:
+            self.avg_seconds = self.avg_seconds * 0.9 + (time.perf_counter() - start) * 0.1
+            self.pending -= 1
+            if client is not None:
+                self._release_client(client)
+
+    def _release_client(self, client):
+        remaining = self._clients[client] - 1
+        if remaining:
+            self._clients[client] = remaining
+        else:
+            del self._clients[client]
+
+    def submit(self, fn, *args, client=None, **kwargs): #concurrent.futures.Future 반환 (요청이 끊겨도 슬롯은 작업이 실제로 끝날 때 반환)
+        self._acquire(client)
+        context = contextvars.copy_context()
+        try:
+            future = self._executor.submit(context.run, functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release(client, time.perf_counter(), None)
+            raise
+        future.add_done_callback(functools.partial(self._release, client, time.perf_counter()))
+        return future
+
+    async def run(self, fn, *args, client=None, **kwargs):
+        return await asyncio.wrap_future(self.submit(fn, *args, client=client, **kwargs))
+
+    async def map(self, fn, items, client=None): #여러 작업을 병렬로 실행하고 입력 순서대로 결과 반환
+        items = list(items)
+        if not items:
+            return []
+        self._acquire(client, len(items))
+        remaining = [len(items)]
+
+        def done(start, future): #마지막 작업이 끝날 때 클라이언트 슬롯 반환
+            self._release(None, start, future)
+            with self._lock:
+                remaining[0] -= 1
+                if not remaining[0] and client is not None:
+                    self._release_client(client)
+
+        futures = []
+        for index, item in enumerate(items):
+            context = contextvars.copy_context() #Context는 여러 스레드에서 동시에 실행할 수 없으므로 작업마다 복사
+            try:
+                future = self._executor.submit(context.run, fn, item)
+            except BaseException:
+                for _ in items[index:]:
+                    done(time.perf_counter(), None)
+                raise
+            future.add_done_callback(functools.partial(done, time.perf_counter()))
+            futures.append(future)
+        return await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+
+    def stats(self):
+        with self._lock:
+            return {'pending': self.pending, 'max_pending': self.max_pending, 'workers': self.workers, 'clients': len(self._clients)}
+
+
+class SingleFlight: #같은 키의 작업이 진행 중이면 새로 제출하지 않고 그 Future를 함께 기다림 (끝나면 바로 잊음)
+    def __init__(self, name):
+        self.name = name
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, submit): #submit()은 concurrent.futures.Future를 반환 (Overloaded 등 예외는 그대로 전달)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                metrics.increment(f'{self.name}_coalesced')
+                return future
+            future = self._inflight[key] = submit()
+        future.add_done_callback(functools.partial(self._forget, key))
+        return future
+
+    def get(self, key): #진행 중인 Future (없으면 None)
+        with self._lock:
+            return self._inflight.get(key)
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def run(self, key, submit): #한 요청이 끊겨도 공유 중인 작업은 취소되지 않도록 shield
+        return await asyncio.shield(asyncio.wrap_future(self.submit(key, submit)))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._inflight)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def _get_pool(name, workers, max_pending, per_client):
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = BoundedExecutor(name, workers, max_pending, per_client)
+        return _pools[name]
+
+def render_pool(): #CPU 작업(렌더링/인코딩) 전용
+    workers = getattr(settings, 'CARD_ASYNC_RENDER_WORKERS', None) or os.cpu_count() or 1
+    return _get_pool(
+        'render', workers,
+        getattr(settings, 'CARD_ASYNC_RENDER_QUEUE', 32),
+        getattr(settings, 'CARD_ASYNC_PER_CLIENT', 4),
+    )
+
+def io_pool(): #파일 읽기 전용 (QR 스캔이 몰려도 렌더링 대기열을 차지하지 않도록 분리)
+    return _get_pool(
+        'io',
+        getattr(settings, 'CARD_ASYNC_IO_WORKERS', 8),
+        getattr(settings, 'CARD_ASYNC_IO_QUEUE', 256),
+        getattr(settings, 'CARD_ASYNC_IO_PER_CLIENT', 16),
+    )
@@ -0,0 +1,165 @@
+import colorsys
+import re
+from collections.abc import Mapping
+from django.conf import settings
+from . import metrics
+from .cache import LRUCache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HEX_COLOR_RE = re.compile(r'^#?([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$')
+
+def normalize_hex(value): #'#abc', 'AABBCC' 등을 '#aabbcc' 형태로 통일
+    match = HEX_COLOR_RE.match(str(value).strip())
+    if not match:
+        raise ValueError(f'올바르지 않은 색상 코드입니다: {value}')
+    digits = match.group(1).lower()
+    if len(digits) == 3:
+        digits = ''.join(c * 2 for c in digits)
+    return f'#{digits}'
+
+def hex_to_rgb(hex_color): #HEX 색상 RGB 변환
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+def rgb_to_hsl(rgb): #RGB를 HSL로 변환
+    r, g, b = [x/255.0 for x in rgb]
+    return colorsys.rgb_to_hls(r, g, b)
+
+def hsl_to_rgb(hsl): #HSL을 RGB로 변환
+    h, l, s = hsl
+    r, g, b = colorsys.hls_to_rgb(h, l, s)
+    return tuple(int(x * 255) for x in (r, g, b))
+
+def palette_hsl(h, l, s, theme, minimum=min, maximum=max): #테마별 파생 색상의 HSL (스칼라/배열 공용)
+    #다양한 색 조합 생성
+    if theme == 'complementary':
+        h_secondary = (h+0.5) % 1
+    elif theme == 'monochrome':
+        h_secondary = h
+    else:
+        h_secondary = (h+0.3) % 1
+
+    spec = {
+        'secondary': (h_secondary, l, s),
+        'accent': (h, minimum(l + 0.2, 1), s),
+        'light': (h, 0.95, 0.1),
+        'dark': (h, 0.1, s),
+    }
+
+    if theme == 'pastel': #밝고 채도가 낮은 보조색
+        spec['secondary'] = (h_secondary, 0.8, minimum(s, 0.6))
+        spec['accent'] = (h, 0.85, minimum(s, 0.5))
+    elif theme == 'gradient': #배경을 이 색으로 섞어 그라데이션 생성
+        spec['gradient_end'] = (h_secondary, maximum(l, 0.6), s)
+    return spec
+
+def derived_shades(primary): #배경 함수들이 쓰는 밝은/어두운 변형
+    return {
+        'pastel_primary': tuple(min(255, c+50) for c in primary),
+        'grunge_base': tuple(max(0, c-30) for c in primary),
+    }
+
+
+class Palette(Mapping): #미리 계산된 변경 불가능한 팔레트
+    __slots__ = ('_colors', 'key')
+
+    def __init__(self, colors):
+        self._colors = dict(colors)
+        self.key = tuple(sorted(self._colors.items()))
+
+    def __getitem__(self, name):
+        return self._colors[name]
+
+    def __iter__(self):
+        return iter(self._colors)
+
+    def __len__(self):
+        return len(self._colors)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        if isinstance(other, Palette):
+            return self.key == other.key
+        return Mapping.__eq__(self, other)
+
+    def __repr__(self):
+        return f'Palette({self._colors!r})'
+
+
+def build_palette(base_color_hex, theme):
+    base_rgb = hex_to_rgb(base_color_hex)
+    h, l, s = rgb_to_hsl(base_rgb)
+    colors = {'primary': base_rgb}
+    for name, hsl in palette_hsl(h, l, s, theme).items():
+        colors[name] = hsl_to_rgb(hsl)
+    colors.update(derived_shades(base_rgb))
+    return Palette(colors)
+
+PALETTE_CACHE = LRUCache(getattr(settings, 'CARD_PALETTE_CACHE_SIZE', 4096))
+metrics.register_cache('palette', PALETTE_CACHE)
+
+def get_palette(base_color_hex, theme): #(정규화된 HEX, 테마)별로 캐시된 팔레트
+    base_color_hex = normalize_hex(base_color_hex)
+    return PALETTE_CACHE.get_or_create((base_color_hex, theme), lambda: build_palette(base_color_hex, theme))
+
+def rgb_to_hls_array(rgb): #colorsys.rgb_to_hls와 같은 계산 순서를 배열에 적용
+    r, g, b = (rgb[:, i] / 255.0 for i in range(3))
+    maxc = np.maximum(np.maximum(r, g), b)
+    minc = np.minimum(np.minimum(r, g), b)
+    sumc = maxc + minc
+    rangec = maxc - minc
+    l = sumc / 2.0
+    gray = rangec == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(l <= 0.5, rangec / sumc, rangec / (2.0 - maxc - minc))
+        rc = (maxc - r) / rangec
+        gc = (maxc - g) / rangec
+        bc = (maxc - b) / rangec
+    h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+    h = (h / 6.0) % 1.0
+    return np.where(gray, 0.0, h), l, np.where(gray, 0.0, s)
+
+def hls_to_rgb_array(h, l, s): #colorsys.hls_to_rgb + int(x * 255)를 배열에 적용
+    h, l, s = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (h, l, s)))
+    m2 = np.where(l <= 0.5, l * (1.0 + s), l + s - (l * s))
+    m1 = 2.0 * l - m2
+
+    def channel(hue):
+        hue = hue % 1.0
+        return np.select(
+            [hue < 1.0/6.0, hue < 0.5, hue < 2.0/3.0],
+            [m1 + (m2 - m1) * hue * 6.0, m2, m1 + (m2 - m1) * (2.0/3.0 - hue) * 6.0],
+            m1,
+        )
+
+    rgb = np.stack([channel(h + 1.0/3.0), channel(h), channel(h - 1.0/3.0)], axis=-1)
+    rgb = np.where((s == 0.0)[..., None], l[..., None], rgb)
+    return (rgb * 255).astype(np.int64)
+
+def palette_arrays(base_colors, theme): #여러 색상의 팔레트를 (N, 3) 배열 묶음으로 한 번에 계산
+    hex_colors = [normalize_hex(color) for color in base_colors]
+    digits = ''.join(color[1:] for color in hex_colors)
+    primaries = np.frombuffer(bytes.fromhex(digits), dtype=np.uint8).reshape(-1, 3).astype(np.int64)
+    h, l, s = rgb_to_hls_array(primaries)
+    arrays = {'primary': primaries}
+    for name, hsl in palette_hsl(h, l, s, theme, minimum=np.minimum, maximum=np.maximum).items():
+        arrays[name] = hls_to_rgb_array(*hsl)
+    arrays['pastel_primary'] = np.minimum(255, primaries + 50)
+    arrays['grunge_base'] = np.maximum(0, primaries - 30)
+    return arrays
+
+def generate_color_palettes(base_colors, theme): #대량 작업용: 색상 목록의 팔레트 객체 목록
+    base_colors = list(base_colors)
+    if np is None or not base_colors:
+        return [get_palette(color, theme) for color in base_colors]
+
+    arrays = palette_arrays(base_colors, theme)
+    names = list(arrays)
+    columns = [map(tuple, arrays[name].tolist()) for name in names]
+    return [Palette(zip(names, values)) for values in zip(*columns)]
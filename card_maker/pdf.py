@@ -0,0 +1,147 @@
+import io
+import zlib
+
+
+class Ref: #간접 객체 참조 (n 0 R)
+    __slots__ = ('id',)
+
+    def __init__(self, obj_id):
+        self.id = obj_id
+
+
+class Name(str): #PDF 이름 객체 (/DeviceRGB)
+    pass
+
+
+def escape_string(value):
+    return value.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def format_number(value):
+    if isinstance(value, int):
+        return str(value)
+    text = f'{value:.4f}'.rstrip('0').rstrip('.')
+    return text if text not in ('', '-0') else '0'
+
+def serialize(value): #dict, list, 숫자, Name, Ref, bool, str(리터럴 문자열)만 지원
+    if isinstance(value, Ref):
+        return f'{value.id} 0 R'
+    if isinstance(value, Name):
+        return f'/{value}'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return format_number(value)
+    if isinstance(value, str):
+        return f'({escape_string(value)})'
+    if isinstance(value, (list, tuple)):
+        return '[' + ' '.join(serialize(item) for item in value) + ']'
+    if isinstance(value, dict):
+        return '<< ' + ' '.join(f'/{key} {serialize(item)}' for key, item in value.items()) + ' >>'
+    if value is None:
+        return 'null'
+    raise TypeError(f'PDF로 변환할 수 없는 값입니다: {value!r}')
+
+
+class PdfWriter: #페이지를 추가하는 즉시 파일에 기록하는 최소 PDF 작성기 (닫을 때 페이지 트리와 xref만 기록)
+    CATALOG = Ref(1)
+    PAGES = Ref(2)
+
+    def __init__(self, fileobj, compress_level=6):
+        self.fileobj = fileobj
+        self.compress_level = compress_level
+        self.position = 0 #seek이 안 되는 출력에도 쓸 수 있도록 오프셋을 직접 계산
+        self.offsets = {}
+        self.pages = []
+        self.next_id = 3
+        self.closed = False
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+    def _write(self, data):
+        self.fileobj.write(data)
+        self.position += len(data)
+
+    def reserve(self): #먼저 번호만 받아두고 나중에 기록 (페이지가 부모를 참조할 때 등)
+        ref = Ref(self.next_id)
+        self.next_id += 1
+        return ref
+
+    def write_object(self, value, ref=None, stream=None):
+        ref = ref or self.reserve()
+        self.offsets[ref.id] = self.position
+        if stream is not None:
+            value = {**value, 'Length': len(stream)}
+        self._write(f'{ref.id} 0 obj\n{serialize(value)}\n'.encode('latin-1'))
+        if stream is not None:
+            self._write(b'stream\n')
+            self._write(stream)
+            self._write(b'\nendstream\n')
+        self._write(b'endobj\n')
+        return ref
+
+    def write_stream(self, value, data, compress=True): #내용 스트림은 기본으로 Flate 압축
+        if compress:
+            data = zlib.compress(data, self.compress_level)
+            value = {**value, 'Filter': Name('FlateDecode')}
+        return self.write_object(value, stream=data)
+
+    def add_image(self, img, jpeg_quality=None, smask=None, interpolate=False): #RGB/L 이미지를 XObject로 기록 (quality를 주면 JPEG, 아니면 무손실 Flate)
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        value = {
+            'Type': Name('XObject'),
+            'Subtype': Name('Image'),
+            'Width': img.width,
+            'Height': img.height,
+            'ColorSpace': Name('DeviceRGB' if img.mode == 'RGB' else 'DeviceGray'),
+            'BitsPerComponent': 8,
+        }
+        if smask is not None: #알파 마스크 (L 모드 이미지의 참조, 크기는 달라도 됨)
+            value['SMask'] = smask
+        if interpolate: #확대해서 찍는 저해상도 이미지를 부드럽게
+            value['Interpolate'] = True
+        if jpeg_quality:
+            buffer = io.BytesIO()
+            img.save(buffer, format='JPEG', quality=jpeg_quality)
+            return self.write_object({**value, 'Filter': Name('DCTDecode')}, stream=buffer.getvalue())
+        return self.write_stream(value, img.tobytes())
+
+    def add_page(self, width, height, content, resources=None): #크기는 pt 단위, content는 페이지 내용 스트림
+        contents = self.write_stream({}, content)
+        page = self.write_object({
+            'Type': Name('Page'),
+            'Parent': self.PAGES,
+            'MediaBox': [0, 0, width, height],
+            'Resources': resources or {},
+            'Contents': contents,
+        })
+        self.pages.append(page)
+        return page
+
+    def add_image_page(self, img, dpi, jpeg_quality=None): #이미지 한 장을 한 페이지 전체에 배치
+        width, height = img.width * 72 / dpi, img.height * 72 / dpi
+        image = self.add_image(img, jpeg_quality)
+        content = f'q {format_number(width)} 0 0 {format_number(height)} 0 0 cm /Im0 Do Q'.encode('ascii')
+        return self.add_page(width, height, content, {'XObject': {'Im0': image}})
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.write_object({'Type': Name('Pages'), 'Kids': self.pages, 'Count': len(self.pages)}, self.PAGES)
+        self.write_object({'Type': Name('Catalog'), 'Pages': self.PAGES}, self.CATALOG)
+        xref = self.position
+        lines = [f'xref\n0 {self.next_id}\n', '0000000000 65535 f \n']
+        for obj_id in range(1, self.next_id):
+            if obj_id in self.offsets:
+                lines.append(f'{self.offsets[obj_id]:010d} 00000 n \n')
+            else: #예약만 하고 쓰지 않은 번호
+                lines.append('0000000000 65535 f \n')
+        lines.append(f"trailer\n{serialize({'Size': self.next_id, 'Root': self.CATALOG})}\nstartxref\n{xref}\n%%EOF\n")
+        self._write(''.join(lines).encode('latin-1'))
@@ -0,0 +1,37 @@
+import gc
+import time
+from django.conf import settings
+from PIL import Image
+from . import metrics
+
+#fork 방식 서버(gunicorn --preload 등)에서 부모 프로세스가 미리 로드해두면 워커들이 copy-on-write로 공유
+#gc 문서의 권장 순서: 로드 전에 gc.disable() -> 로드 -> gc.freeze() -> gc.enable()
+
+
+def warm_imaging(): #Pillow 플러그인/인코더와 qrcode 모듈은 처음 쓸 때 import되므로 미리 한 번씩 사용
+    from .utils import DEFAULT_ENCODING_PROFILES, encode_image, generate_qr_code
+
+    Image.init()
+    sample = Image.new('RGB', (8, 8))
+    for profile in getattr(settings, 'CARD_ENCODING_PROFILES', DEFAULT_ENCODING_PROFILES).values():
+        encode_image(sample, profile)
+    generate_qr_code('http://localhost/download/card_0000000000000000.png/')
+
+def warm_urls(): #URL 패턴(정규식)과 뷰 모듈을 첫 요청 전에 로드
+    from django.urls import get_resolver
+
+    for pattern in get_resolver().url_patterns:
+        pattern.pattern.regex
+
+def preload(): #AppConfig.ready에서 호출 (폰트/레이아웃/배경은 각 설정에 따라 따로 로드)
+    start = time.perf_counter()
+    warm_imaging()
+    metrics.observe('preload', time.perf_counter() - start)
+
+def prefork(): #wsgi/asgi 모듈 끝에서 호출: 지금까지 만든 객체를 GC 대상에서 빼서 워커의 GC가 공유 페이지를 건드리지 않게 함
+    try:
+        if getattr(settings, 'CARD_PRELOAD', True):
+            warm_urls()
+            gc.freeze() #여기서 gc.collect()하지 않음: 부모에서 해제된 자리에 자식이 새 객체를 할당하면 그 페이지가 복사됨
+    finally:
+        gc.enable()
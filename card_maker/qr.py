@@ -0,0 +1,79 @@
+import qrcode
+from PIL import Image
+from django.conf import settings
+from . import metrics
+from .cache import LRUCache
+
+QR_MATRIX_CACHE = LRUCache(getattr(settings, 'CARD_QR_CACHE_SIZE', 1024))
+metrics.register_cache('qr_matrix', QR_MATRIX_CACHE)
+
+def build_qr_matrix(data, border=4): #모듈 행렬을 (한 변 길이, L 모드 픽셀 바이트)로 반환
+    qr = qrcode.QRCode(
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        border=border,
+        mask_pattern=getattr(settings, 'CARD_QR_MASK_PATTERN', None),
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+    pixels = bytes(0 if dark else 255 for row in matrix for dark in row)
+    return len(matrix), pixels
+
+def qr_matrix(data, border=4):
+    return QR_MATRIX_CACHE.get_or_create((data, border), lambda: build_qr_matrix(data, border))
+
+def render_qr(data, box_size=None, border=4): #모듈 행렬을 그대로 확대해 1비트 이미지 생성
+    box_size = box_size or getattr(settings, 'CARD_QR_BOX_SIZE', 10)
+    size, pixels = qr_matrix(data, border)
+    img = Image.frombytes('L', (size, size), pixels)
+    if box_size != 1:
+        img = img.resize((size * box_size, size * box_size), Image.NEAREST)
+    return img.convert('1')
+
+def qr_runs(data, border=4): #가로로 이어진 어두운 모듈을 (x, y, 길이)로 (SVG path, 벡터 명함에서 사용)
+    size, pixels = qr_matrix(data, border)
+    runs = []
+    for y in range(size):
+        row = pixels[y * size:(y + 1) * size]
+        x = 0
+        while x < size:
+            if row[x]:
+                x += 1
+                continue
+            start = x
+            while x < size and not row[x]:
+                x += 1
+            runs.append((start, y, x - start))
+    return runs
+
+def qr_path(runs): #모듈 좌표계의 SVG path
+    return ''.join(f"M{x} {y}h{length}v1h{-length}z" for x, y, length in runs)
+
+def render_qr_svg(data, box_size=None, border=4): #가로로 이어진 모듈을 하나의 path로 묶은 SVG
+    box_size = box_size or getattr(settings, 'CARD_QR_BOX_SIZE', 10)
+    size, _ = qr_matrix(data, border)
+    dimension = size * box_size
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{dimension}" height="{dimension}" '
+        f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/>'
+        f'<path d="{qr_path(qr_runs(data, border))}" fill="#000"/></svg>'
+    )
+
+def render_qr_codes(urls, box_size=None, border=4):
+    return [render_qr(url, box_size, border) for url in urls]
+
+def composite_qr(card_img, data, box): #레이아웃이 비워둔 자리(x, y, 한 변)에 QR코드를 합성 (모듈이 너무 작아지면 합성하지 않고 False)
+    x, y, size = box
+    modules, _ = qr_matrix(data)
+    box_size = size // modules
+    if box_size < getattr(settings, 'CARD_QR_MIN_MODULE_PX', 2):
+        return False
+    dimension = modules * box_size
+    xy = (x + size - dimension, y + (size - dimension) // 2)
+    if hasattr(card_img, 'qr'): #벡터 캔버스에는 모듈을 도형으로 기록
+        card_img.qr(xy, data, box_size)
+        return True
+    qr_img = render_qr(data, box_size=box_size).convert(card_img.mode) #여백(quiet zone)은 규격대로 4모듈
+    card_img.paste(qr_img, xy)
+    return True
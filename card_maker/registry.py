@@ -0,0 +1,152 @@
+import importlib
+from django.conf import settings
+from .glyphs import draw_glyph_run, draw_neon_run
+from .layout import CanvasScale
+
+ALIGN_SHIFT = {'left': 0, 'center': 1, 'right': 2} #x = 기준점 - (글자 폭 * shift) // 2
+
+
+class PlainText: #글자를 그대로 찍기
+    def __init__(self, scale):
+        pass
+
+    def __call__(self, draw, xy, run, color, colors):
+        draw_glyph_run(draw, xy, run, color)
+
+
+class NeonText: #블러 글로우 + 외곽선 (두께는 캔버스 크기에 맞춰 미리 계산)
+    glow = 'accent'
+
+    def __init__(self, scale):
+        self.spread = scale.length(3)
+        self.blur = scale.length(3)
+
+    def __call__(self, draw, xy, run, color, colors):
+        draw_neon_run(draw, xy, run, colors[self.glow], color, self.spread, self.blur)
+
+
+class CardTemplate: #템플릿 하나의 선언 (폰트, 글자색, 배치, 배경, 글자 효과)
+    FIELD_FONTS = {'name': 'large', 'school': 'medium', 'phone': 'small'}
+
+    def __init__(self, name, fonts, colors, layout, background, static_background=False,
+                 array_background=None, text_effect=PlainText, excluded_themes=()):
+        self.name = name
+        self.fonts = fonts
+        self.colors = colors
+        self.layout = layout
+        self.background = background
+        self.static_background = static_background #팔레트와 크기만으로 결정되는 배경은 캐시
+        self.array_background = array_background #numpy 구현이 있으면 우선 사용
+        self.text_effect = text_effect
+        self.excluded_themes = tuple(excluded_themes)
+
+
+class CompiledField: #캔버스 크기에 맞춰 확정된 필드 하나
+    __slots__ = ('key', 'font', 'x', 'y', 'shift', 'color', 'color_key', 'draw')
+
+    def __init__(self, key, font, x, y, shift, color, color_key, draw):
+        self.key = key
+        self.font = font
+        self.x = x
+        self.y = y
+        self.shift = shift
+        self.color = color
+        self.color_key = color_key
+        self.draw = draw
+
+    def resolve_color(self, colors): #고정 색이 없으면 팔레트에서
+        return self.color if self.color_key is None else colors[self.color_key]
+
+
+class CompiledLayout:
+    __slots__ = ('template', 'width', 'height', 'fields', 'qr_box')
+
+    def __init__(self, template, width, height, fields, qr_box=None):
+        self.template = template
+        self.width = width
+        self.height = height
+        self.fields = fields
+        self.qr_box = qr_box
+
+
+def qr_area(fields, width, height, max_size=0.3): #글자 줄 사이의 가장 넓은 세로 빈 공간 오른쪽에 QR 자리 (x, y, 한 변)
+    pad = round(height * 0.03) #네온 글로우가 번지는 폭보다 넉넉하게
+    bands = sorted((field.y - pad, field.y + field.font.getbbox('Ag가')[3] + pad) for field in fields)
+    gaps = []
+    top = pad
+    for start, end in bands: #글자 길이와 관계없이 비어 있도록 줄 전체 폭을 피함
+        gaps.append((start - top, top))
+        top = max(top, end)
+    gaps.append((height - pad - top, top))
+    gap, top = max(gaps)
+    size = max(0, min(gap, round(height * max_size)))
+    return width - width // 10 - size, top + (gap - size) // 2, size
+
+
+class TemplateRegistry: #템플릿 선언과 (템플릿, 크기)별로 미리 계산된 레이아웃
+    def __init__(self, themes, font_loader):
+        self.themes = themes
+        self.font_loader = font_loader
+        self.names = [] #등록 순서 (무작위 선택 순서가 바뀌지 않도록 유지)
+        self._templates = {}
+        self._themes = {}
+        self._compiled = {}
+
+    def register(self, template):
+        if template.name not in self._templates:
+            self.names.append(template.name)
+        self._templates[template.name] = template
+        self._themes[template.name] = [theme for theme in self.themes if theme not in template.excluded_themes]
+        for key in [key for key in self._compiled if key[0] == template.name]:
+            del self._compiled[key]
+        return template
+
+    def get(self, name):
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise ValueError(f'알 수 없는 템플릿입니다: {name}')
+
+    def __contains__(self, name):
+        return name in self._templates
+
+    def __iter__(self):
+        return (self._templates[name] for name in self.names)
+
+    def themes_for(self, name):
+        return self._themes[name]
+
+    def compiled(self, name, width, height): #같은 크기는 한 번만 계산 (렌더링 중에는 조회만)
+        key = (name, width, height)
+        layout = self._compiled.get(key)
+        if layout is None:
+            layout = self._compiled[key] = self.compile(self.get(name), width, height)
+        return layout
+
+    def clear(self): #계산된 레이아웃만 비움 (폰트를 다시 로드하게 됨)
+        self._compiled.clear()
+
+    def compile(self, template, width, height):
+        effect = template.text_effect(CanvasScale(width, height))
+        fields = []
+        for key, role in CardTemplate.FIELD_FONTS.items():
+            position = template.layout[key]
+            color = template.colors[key]
+            fields.append(CompiledField(
+                key,
+                self.font_loader(template.fonts[role], height),
+                round(position['x'] * width),
+                round(position['y'] * height),
+                ALIGN_SHIFT[position['align']],
+                None if isinstance(color, str) else color,
+                color if isinstance(color, str) else None,
+                effect,
+            ))
+        return CompiledLayout(template.name, width, height, tuple(fields), qr_area(fields, width, height))
+
+    def load_plugins(self, modules=None): #CARD_TEMPLATE_PLUGINS의 모듈을 import (모듈이 register를 호출)
+        if modules is None:
+            modules = getattr(settings, 'CARD_TEMPLATE_PLUGINS', [])
+        for module in modules:
+            importlib.import_module(module)
+        return self.names
@@ -0,0 +1,308 @@
+import hashlib
+import io
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+KINDS = ('cards', 'qrcodes', 'specs', 'print', 'vector')
+
+
+def group_key(name): #card_<id>.png, qr_<id>.png, card_<id>.json, 인쇄용/벡터 파일은 같은 명함 하나의 묶음
+    return os.path.splitext(name)[0].split('_', 1)[-1]
+
+
+class StoredFile: #저장된 산출물의 크기, 수정 시각, (디스크에 있으면) 경로
+    __slots__ = ('size', 'mtime_ns', 'path')
+
+    def __init__(self, size, mtime_ns, path=None):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.path = path
+
+    @property
+    def mtime(self):
+        return self.mtime_ns / 1e9
+
+
+class CardStorage: #명함/QR 산출물 저장소 공통 동작 (용량 제한, TTL 만료, 사용량 집계)
+    def __init__(self, max_bytes=None, ttl=None, prune_interval=600):
+        self.max_bytes = getattr(settings, 'CARD_RENDER_CACHE_MAX_BYTES', 0) if max_bytes is None else max_bytes
+        self.ttl = getattr(settings, 'CARD_STORAGE_TTL', None) if ttl is None else ttl
+        self.prune_interval = prune_interval
+        self.total_bytes = None
+        self._last_prune = time.monotonic()
+        self._pruning = False
+        self._lock = threading.Lock()
+
+    def save(self, kind, name, data, defer=False):
+        raise NotImplementedError
+
+    def stat(self, kind, name): #없으면 None
+        raise NotImplementedError
+
+    def open(self, kind, name):
+        raise NotImplementedError
+
+    def delete(self, kind, name):
+        raise NotImplementedError
+
+    def touch(self, kind, name):
+        raise NotImplementedError
+
+    def entries(self): #(종류, 이름, 크기, 수정 시각) 전체 목록
+        raise NotImplementedError
+
+    def flush(self): #지연 쓰기가 있으면 모두 기록될 때까지 대기
+        pass
+
+    def exists(self, kind, name):
+        return self.stat(kind, name) is not None
+
+    def read(self, kind, name):
+        with self.open(kind, name) as f:
+            return f.read()
+
+    def usage(self): #종류별 파일 수, 용량, 가장 오래된/최근 수정 시각
+        usage = {kind: {'files': 0, 'bytes': 0, 'oldest': None, 'newest': None} for kind in KINDS}
+        for kind, _, size, mtime in self.entries():
+            entry = usage.setdefault(kind, {'files': 0, 'bytes': 0, 'oldest': None, 'newest': None})
+            entry['files'] += 1
+            entry['bytes'] += size
+            entry['oldest'] = mtime if entry['oldest'] is None else min(entry['oldest'], mtime)
+            entry['newest'] = mtime if entry['newest'] is None else max(entry['newest'], mtime)
+        return usage
+
+    def prune(self, max_bytes=None, max_age=None, dry_run=False): #명함 묶음 단위로 오래된 것부터 삭제: TTL을 넘긴 것 전부, 그래도 넘치면 용량의 90%까지
+        groups = {} #묶음 -> [가장 최근 수정 시각, 크기, 파일 목록]
+        for kind, name, size, mtime in self.entries():
+            group = groups.setdefault(group_key(name), [mtime, 0, []])
+            group[0] = max(group[0], mtime)
+            group[1] += size
+            group[2].append((kind, name))
+        total = sum(group[1] for group in groups.values())
+        cutoff = time.time() - max_age if max_age is not None else None
+        target = max_bytes * 0.9 if max_bytes else None
+        removed = removed_bytes = 0
+        for mtime, size, files in sorted(groups.values(), key=lambda group: group[0]):
+            expired = cutoff is not None and mtime < cutoff
+            if not expired and (target is None or total - removed_bytes <= target):
+                break
+            if not dry_run:
+                for kind, name in files:
+                    self.delete(kind, name)
+            removed += len(files)
+            removed_bytes += size
+        if not dry_run:
+            with self._lock:
+                self.total_bytes = total - removed_bytes
+        return removed, removed_bytes
+
+    def track(self, nbytes): #저장할 때마다 호출: 용량을 넘거나 정리 주기가 되면 백그라운드에서 정리
+        if not self.max_bytes and not self.ttl:
+            return
+        with self._lock:
+            if self.total_bytes is not None:
+                self.total_bytes += nbytes
+            due = self.ttl and time.monotonic() - self._last_prune > self.prune_interval
+            over = self.max_bytes and (self.total_bytes is None or self.total_bytes > self.max_bytes)
+            if self._pruning or not (due or over):
+                return
+            self._pruning = True
+            self._last_prune = time.monotonic()
+        self.run_background(self._auto_prune)
+
+    def _auto_prune(self):
+        try:
+            self.prune(self.max_bytes, self.ttl or None)
+        finally:
+            with self._lock:
+                self._pruning = False
+
+    def run_background(self, fn):
+        fn()
+
+
+class FileSystemStorage(CardStorage): #MEDIA_ROOT/<종류>/<해시 2단계>/<이름> 구조로 저장
+    def __init__(self, root=None, shard_depth=2, write_behind=False, fsync=False,
+                 max_pending_bytes=64 * 1024 * 1024, **kwargs):
+        super().__init__(**kwargs)
+        self.root = str(root or settings.MEDIA_ROOT)
+        self.shard_depth = shard_depth
+        self.write_behind = write_behind
+        self.fsync = fsync
+        self.max_pending_bytes = max_pending_bytes
+        self._pending = {} #(종류, 이름) -> (내용, 저장 시각 ns): 아직 디스크에 없는 파일
+        self._pending_bytes = 0
+        self._pending_lock = threading.Lock()
+        self._executor = None
+
+    def path(self, kind, name): #이름의 해시로 하위 디렉터리를 나눠 한 디렉터리에 파일이 몰리지 않게 함
+        digest = hashlib.md5(name.encode('utf-8')).hexdigest()
+        shards = [digest[i * 2:i * 2 + 2] for i in range(self.shard_depth)]
+        return os.path.join(self.root, kind, *shards, name)
+
+    def _candidates(self, kind, name): #샤딩 이전에 평평하게 저장된 파일도 찾기
+        yield self.path(kind, name)
+        if self.shard_depth:
+            yield os.path.join(self.root, kind, name)
+
+    def _write(self, path, data): #임시 파일에 쓴 뒤 교체 (읽는 쪽이 쓰다 만 파일을 보지 않도록)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{uuid.uuid4().hex[:8]}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def run_background(self, fn):
+        with self._pending_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='card-write')
+        return self._executor.submit(fn)
+
+    def save(self, kind, name, data, defer=False): #defer 또는 write_behind면 응답 이후 백그라운드에서 기록
+        key = (kind, name)
+        if defer or self.write_behind:
+            with self._pending_lock:
+                if self._pending_bytes + len(data) <= self.max_pending_bytes:
+                    previous = self._pending.get(key)
+                    self._pending[key] = (data, time.time_ns())
+                    self._pending_bytes += len(data) - (len(previous[0]) if previous else 0)
+                    deferred = True
+                else: #버퍼가 가득 차면 직접 기록 (디스크가 느릴 때의 자연스러운 배압)
+                    deferred = False
+            if deferred:
+                self.run_background(lambda: self._flush_pending(key))
+                return
+        self._write(self.path(kind, name), data)
+        self.track(len(data))
+
+    def _flush_pending(self, key):
+        with self._pending_lock:
+            pending = self._pending.get(key)
+        if pending is None:
+            return
+        data, saved_at = pending
+        try:
+            self._write(self.path(*key), data)
+        finally:
+            with self._pending_lock:
+                if self._pending.get(key) is pending:
+                    del self._pending[key]
+                    self._pending_bytes -= len(data)
+        self.track(len(data))
+
+    def flush(self):
+        if self._executor is not None:
+            self._executor.submit(lambda: None).result()
+
+    def stat(self, kind, name):
+        with self._pending_lock:
+            pending = self._pending.get((kind, name))
+        if pending is not None:
+            return StoredFile(len(pending[0]), pending[1])
+        for path in self._candidates(kind, name):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            return StoredFile(stat.st_size, stat.st_mtime_ns, path)
+        return None
+
+    def open(self, kind, name):
+        with self._pending_lock:
+            pending = self._pending.get((kind, name))
+        if pending is not None:
+            return io.BytesIO(pending[0])
+        for path in self._candidates(kind, name):
+            try:
+                return open(path, 'rb')
+            except FileNotFoundError:
+                continue
+        raise FileNotFoundError(f'{kind}/{name}')
+
+    def delete(self, kind, name):
+        with self._pending_lock:
+            pending = self._pending.pop((kind, name), None)
+            if pending is not None:
+                self._pending_bytes -= len(pending[0])
+        for path in self._candidates(kind, name):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def touch(self, kind, name):
+        stored = self.stat(kind, name)
+        if stored is None:
+            raise FileNotFoundError(f'{kind}/{name}')
+        if stored.path:
+            os.utime(stored.path)
+
+    def entries(self):
+        for kind in KINDS:
+            for directory, _, files in os.walk(os.path.join(self.root, kind)):
+                for filename in files:
+                    if filename.endswith('.tmp'):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(directory, filename))
+                    except FileNotFoundError:
+                        continue
+                    yield kind, filename, stat.st_size, stat.st_mtime
+
+
+class MemoryStorage(CardStorage): #개발/테스트용: 프로세스 메모리에만 보관 (재시작하면 사라짐)
+    def __init__(self, max_bytes=None, **kwargs):
+        super().__init__(max_bytes=64 * 1024 * 1024 if max_bytes is None else max_bytes, **kwargs)
+        self._files = {}
+
+    def save(self, kind, name, data, defer=False):
+        with self._lock:
+            self._files[(kind, name)] = (bytes(data), time.time_ns())
+        self.track(len(data))
+
+    def stat(self, kind, name):
+        stored = self._files.get((kind, name))
+        return StoredFile(len(stored[0]), stored[1]) if stored else None
+
+    def open(self, kind, name):
+        stored = self._files.get((kind, name))
+        if stored is None:
+            raise FileNotFoundError(f'{kind}/{name}')
+        return io.BytesIO(stored[0])
+
+    def delete(self, kind, name):
+        with self._lock:
+            self._files.pop((kind, name), None)
+
+    def touch(self, kind, name):
+        with self._lock:
+            stored = self._files.get((kind, name))
+            if stored is None:
+                raise FileNotFoundError(f'{kind}/{name}')
+            self._files[(kind, name)] = (stored[0], time.time_ns())
+
+    def entries(self):
+        with self._lock:
+            files = list(self._files.items())
+        return [(kind, name, len(data), mtime_ns / 1e9) for (kind, name), (data, mtime_ns) in files]
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+def get_storage(): #CARD_STORAGE 설정의 BACKEND/OPTIONS로 한 번만 생성
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            config = getattr(settings, 'CARD_STORAGE', {})
+            backend = import_string(config.get('BACKEND', 'card_maker.storage.FileSystemStorage'))
+            _storage = backend(**config.get('OPTIONS', {}))
+        return _storage
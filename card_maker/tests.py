@@ -1,3 +1,775 @@
-from django.test import TestCase
+import asyncio
+import base64
+import io
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+import zlib
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock, skipIf
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from xml.etree import ElementTree
+from PIL import Image, ImageChops, ImageDraw
+import qrcode
+from . import edits, glyphs, jobs, palette, utils, views
+from . import storage as storage_module
+from .idempotency import IdempotencyConflict, IdempotencyStore
+from .imposition import SheetLayout, impose
+from .models import RenderJob
+from .offload import Overloaded, SingleFlight
+from .qr import composite_qr, qr_matrix, qr_path, qr_runs, render_qr, render_qr_svg
+from .storage import FileSystemStorage, MemoryStorage
+from .utils import TEMPLATE_REGISTRY, place_field
+from .vector import encode_vector
+from .views import client_key
 
-# Create your tests here.
+SVG = '{http://www.w3.org/2000/svg}'
+USER = {'name': '홍길동', 'school': '한국대학교', 'phone': '010-1234-5678', 'favorite_color': '#3498db'}
+
+
+class MemoryStorageMixin: #테스트마다 빈 MemoryStorage를 get_storage()로 돌려줌
+    def setUp(self):
+        super().setUp()
+        self.storage = MemoryStorage(max_bytes=0, ttl=0)
+        patcher = mock.patch.object(storage_module, '_storage', self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cache.clear()
+        edits.EDIT_SESSIONS.clear()
+
+    def post_json(self, url, data, **extra):
+        return self.client.post(url, json.dumps(data), content_type='application/json', **extra)
+
+
+class BatchTests(MemoryStorageMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        executor = ThreadPoolExecutor(max_workers=3) #프로세스 풀 대신 (mock이 워커에도 적용되도록)
+        self.addCleanup(executor.shutdown)
+        patcher = mock.patch.object(utils, 'get_batch_executor', return_value=executor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.items = [{**USER, 'name': f'참가자{index}'} for index in range(6)]
+
+    def failing_render_spec(self, spec, *args, **kwargs): #두 번째 참가자만 렌더링 실패
+        if spec['user_data']['name'] == '참가자1':
+            raise RuntimeError('렌더링 실패')
+        return self.render_spec(spec, *args, **kwargs)
+
+    def test_zip_keeps_input_order_and_isolates_failures(self):
+        self.render_spec = utils.render_spec
+        with mock.patch.object(utils, 'render_spec', self.failing_render_spec):
+            response = self.post_json('/generate/batch/?format=zip', self.items)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as zf:
+            manifest = json.loads(zf.read('manifest.json'))
+            self.assertEqual([entry['index'] for entry in manifest], list(range(6)))
+            self.assertEqual(manifest[1], {'index': 1, 'success': False, 'error': '렌더링 실패'})
+            names = [entry['file'] for entry in manifest if entry['success']]
+            self.assertEqual(zf.namelist(), [*names, 'manifest.json'])
+            for entry in manifest[::2]:
+                self.assertTrue(entry['file'].startswith(f"{entry['index']:04d}_{entry['template']}."))
+                self.assertEqual(Image.open(io.BytesIO(zf.read(entry['file']))).size, (800, 500))
+
+    def test_json_manifest_saves_each_card(self):
+        response = self.post_json('/generate/batch/', {'cards': self.items})
+        cards = response.json()['cards']
+        self.assertEqual([card['index'] for card in cards], list(range(6)))
+        for card in cards:
+            self.assertTrue(card['success'])
+            self.assertTrue(self.storage.exists('cards', card['card_url'].rsplit('/', 1)[1]))
+
+    def test_csv_upload(self):
+        body = 'name,school,phone,favorite_color\n홍길동,한국대학교,010-1234-5678,#abc\n'
+        response = self.client.post('/generate/batch/', body.encode('utf-8'), content_type='text/csv')
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_bad_color_rejects_the_whole_batch(self):
+        response = self.post_json('/generate/batch/', [USER, {**USER, 'favorite_color': 'blue'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('1번째 항목', response.json()['error'])
+
+
+@override_settings(CARD_JOB_WORKERS=1) #테스트용 메모리 SQLite는 여러 스레드가 동시에 쓰면 잠길 수 있음
+class RenderJobTests(TransactionTestCase): #작업은 다른 스레드에서 실행되므로 트랜잭션으로 감싸지 않음
+    def setUp(self):
+        jobs._executor = None
+        self.addCleanup(setattr, jobs, '_executor', None)
+        patcher = mock.patch.object(jobs, 'save_card_files', return_value={'card_url': '/media/cards/card_x.png'})
+        self.save_card_files = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_job(self, status=RenderJob.STATUS_PENDING, age=0):
+        job = RenderJob.objects.create(user_data=USER, host='testserver', status=status)
+        if age:
+            RenderJob.objects.filter(id=job.id).update(updated_at=timezone.now() - timedelta(seconds=age))
+        return job
+
+    def status(self, job):
+        return RenderJob.objects.get(id=job.id).status
+
+    def drain(self): #제출된 작업이 모두 끝날 때까지 대기 (다음 get_job_executor()는 새 풀을 만듦)
+        jobs._executor.shutdown(wait=True)
+        jobs._executor = None
+
+    def test_enqueue_renders_once(self):
+        job = jobs.enqueue_render_job(USER, 'testserver')
+        self.drain()
+        self.assertEqual(self.save_card_files.call_count, 1)
+        self.assertEqual(self.status(job), RenderJob.STATUS_DONE)
+
+        response = self.client.get(f'/jobs/{job.id}/').json()
+        self.assertEqual(response['status'], RenderJob.STATUS_DONE)
+        self.assertEqual(response['card_url'], '/media/cards/card_x.png')
+
+    def test_claims_only_pending_jobs(self):
+        job = self.create_job()
+        self.assertEqual(jobs.claim_job(job.id), 1)
+        self.assertEqual(jobs.claim_job(job.id), 0)
+        jobs.run_render_job(job.id)
+        self.assertEqual(self.save_card_files.call_count, 0)
+
+    def test_startup_recovers_pending_and_expired_running_jobs(self):
+        pending = self.create_job()
+        fresh = self.create_job(RenderJob.STATUS_RUNNING)
+        stale = self.create_job(RenderJob.STATUS_RUNNING, age=3600)
+        jobs.get_job_executor()
+        self.drain()
+        self.assertEqual(self.status(pending), RenderJob.STATUS_DONE)
+        self.assertEqual(self.status(fresh), RenderJob.STATUS_RUNNING)
+        self.assertEqual(self.status(stale), RenderJob.STATUS_DONE)
+        self.assertEqual(self.save_card_files.call_count, 2)
+
+    def test_lease_expiring_after_startup_is_recovered_on_poll(self):
+        jobs.get_job_executor()
+        job = self.create_job(RenderJob.STATUS_RUNNING, age=3600) #시작한 뒤에 다른 프로세스가 맡았다가 중단된 작업
+
+        self.client.get(f'/jobs/{job.id}/') #복구 주기 전에는 그대로
+        self.assertEqual(self.status(job), RenderJob.STATUS_RUNNING)
+
+        with override_settings(CARD_JOB_RECOVERY_INTERVAL=0):
+            self.client.get(f'/jobs/{job.id}/')
+        self.drain()
+        self.assertEqual(self.status(job), RenderJob.STATUS_DONE)
+        self.assertEqual(self.save_card_files.call_count, 1)
+
+
+class SeededCacheTests(MemoryStorageMixin, SimpleTestCase):
+    def test_second_seeded_render_is_cached(self):
+        first = self.post_json('/generate/', {**USER, 'seeded': True}).json()
+        second = self.post_json('/generate/', {**USER, 'seeded': True}).json()
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['card_url'], first['card_url'])
+        self.assertEqual(len([entry for entry in self.storage.entries() if entry[0] == 'cards']), 1)
+
+        other = self.post_json('/generate/', {**USER, 'name': '김철수', 'seeded': True}).json()
+        self.assertFalse(other['cached'])
+        self.assertNotEqual(other['card_url'], first['card_url'])
+
+    def test_inline_cache_hit_returns_the_same_data_uris(self):
+        first = self.post_json('/generate/', {**USER, 'seeded': True, 'inline': True}).json()
+        second = self.post_json('/generate/', {**USER, 'seeded': True, 'inline': True}).json()
+        self.assertTrue(second['cached'])
+        self.assertEqual(set(second) - {'cached'}, set(first) - {'cached'})
+        self.assertEqual(second['card_data_uri'], first['card_data_uri'])
+        self.assertEqual(second['qr_data_uri'], first['qr_data_uri'])
+
+
+class DownloadTests(MemoryStorageMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.data = bytes(range(256)) * 4
+        self.storage.save('cards', 'card_test.png', self.data)
+
+    def get(self, **headers):
+        response = self.client.get('/download/card_test.png/', **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_full_and_range_responses(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="card_test.png"')
+        self.assertEqual(body, self.data)
+
+        response, body = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.data[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.data)}')
+
+        response, body = self.get(HTTP_RANGE='bytes=-5')
+        self.assertEqual(body, self.data[-5:])
+
+        response, _ = self.get(HTTP_RANGE=f'bytes={len(self.data)}-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_conditional_requests(self):
+        response, _ = self.get()
+        etag = response['ETag']
+        response, _ = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response, body = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"') #If-Range가 다르면 전체
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.data)
+
+    async def test_asgi_streams_the_range(self):
+        response = await self.async_client.get('/download/card_test.png/', headers={'Range': 'bytes=100-'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Length'], str(len(self.data) - 100))
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), self.data[100:])
+
+    def test_missing_file_is_404(self):
+        self.assertEqual(self.client.get('/download/card_missing.png/').status_code, 404)
+
+
+class InlineResponseTests(MemoryStorageMixin, SimpleTestCase):
+    def test_flags_must_be_json_booleans(self):
+        for body in ({'inline': 'false'}, {'seeded': 0}, {'inline': None}):
+            response = self.post_json('/generate/', {**USER, **body})
+            self.assertEqual(response.status_code, 400, body)
+
+    def test_inline_returns_the_stored_bytes(self):
+        response = self.post_json('/generate/', {**USER, 'inline': True}).json()
+        filename = response['card_url'].rsplit('/', 1)[1]
+        header, encoded = response['card_data_uri'].split(',', 1)
+        self.assertEqual(header, 'data:image/png;base64')
+        self.assertEqual(base64.b64decode(encoded), self.storage.read('cards', filename))
+        self.assertTrue(response['qr_data_uri'].startswith('data:image/png;base64,'))
+
+        response = self.post_json('/generate/', {**USER, 'inline': False}).json()
+        self.assertNotIn('card_data_uri', response)
+
+
+class QrTests(MemoryStorageMixin, SimpleTestCase):
+    def legacy_qr(self, data): #qr 모듈 이전의 generate_qr_code (qrcode 라이브러리의 PIL 이미지)
+        qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
+        qr.add_data(data)
+        qr.make(fit=True)
+        return qr.make_image(fill_color='black', back_color='white').get_image()
+
+    def test_render_qr_matches_qrcode_pixels(self):
+        for data in ('http://testserver/download/card_0123456789abcdef.png/', 'x' * 300, '한글 주소'):
+            expected = self.legacy_qr(data).convert('1')
+            actual = render_qr(data)
+            self.assertEqual(actual.mode, '1')
+            self.assertEqual(actual.size, expected.size)
+            self.assertEqual(actual.tobytes(), expected.tobytes())
+
+    def test_svg_draws_the_same_modules(self):
+        data = 'http://testserver/download/card_test.png/'
+        size, pixels = qr_matrix(data)
+        dark = {(x, y) for y in range(size) for x in range(size) if not pixels[y * size + x]}
+        self.assertEqual({(x + i, y) for x, y, length in qr_runs(data) for i in range(length)}, dark)
+        self.assertIn(f'viewBox="0 0 {size} {size}"', render_qr_svg(data))
+
+    def test_reserved_area_clears_long_text(self):
+        user_data = {**USER, 'name': '가나다라마바사아자차카타파하가나다', 'school': '한국과학기술원 전산학부 대학원'}
+        for name in TEMPLATE_REGISTRY.names:
+            layout = TEMPLATE_REGISTRY.compiled(name, 800, 500)
+            x, y, size = layout.qr_box
+            for field in layout.fields:
+                run, (left, top) = place_field(field, user_data[field.key])
+                self.assertTrue(top + run.bbox[3] <= y or top + run.bbox[1] >= y + size, f'{name}.{field.key}')
+
+    @override_settings(CARD_QR_ON_CARD=True)
+    def test_on_card_qr_skips_the_separate_file(self):
+        response = self.post_json('/generate/', USER).json()
+        self.assertIsNone(response['qr_url'])
+        self.assertFalse(any(kind == 'qrcodes' for kind, _, _, _ in self.storage.entries()))
+
+        response = self.post_json('/generate/', {**USER, 'resolution': 'thumbnail'}).json() #모듈이 너무 작으면 따로 저장
+        self.assertIsNotNone(response['qr_url'])
+
+    def test_composite_keeps_the_quiet_zone(self):
+        img = Image.new('RGB', (400, 300), 'red')
+        data = 'http://testserver/download/card_test.png/'
+        self.assertTrue(composite_qr(img, data, (100, 50, 200)))
+        modules, _ = qr_matrix(data)
+        box_size = 200 // modules
+        left, top = 100 + 200 - modules * box_size, 50 + (200 - modules * box_size) // 2
+        self.assertEqual(img.getpixel((left + 4 * box_size - 1, top + 4 * box_size - 1)), (255, 255, 255))
+        self.assertEqual(img.getpixel((left + 4 * box_size, top + 4 * box_size)), (0, 0, 0)) #파인더 패턴 모서리
+        self.assertFalse(composite_qr(img, data, (0, 0, modules))) #모듈 하나가 1픽셀이면 합성하지 않음
+
+
+class MetricsTests(MemoryStorageMixin, SimpleTestCase):
+    def samples(self): #지표 이름{라벨} -> 값
+        response = self.client.get('/metrics/')
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        samples = {}
+        for line in response.content.decode('utf-8').splitlines():
+            if line and not line.startswith('#'):
+                name, _, value = line.rpartition(' ')
+                samples[name] = float(value)
+        return samples
+
+    def test_generate_records_stage_histograms(self):
+        labels = 'template="modern",theme="vibrant"'
+        count = f'card_stage_seconds_count{{stage="generate_card",{labels}}}'
+        before = self.samples().get(count, 0)
+        self.post_json('/generate/', {**USER, 'template': 'modern', 'theme': 'vibrant'})
+        samples = self.samples()
+
+        self.assertEqual(samples[count], before + 1)
+        buckets = [value for name, value in samples.items() if name.startswith(f'card_stage_seconds_bucket{{stage="generate_card",{labels},')]
+        self.assertEqual(buckets, sorted(buckets)) #누적 히스토그램
+        self.assertEqual(buckets[-1], samples[count]) #+Inf
+        for stage in ('background', 'text', 'encode', 'write'):
+            self.assertTrue(any(name.startswith(f'card_stage_seconds_count{{stage="{stage}"') for name in samples), stage)
+        self.assertIn('card_cache_entries{cache="palette"}', samples)
+
+    @override_settings(CARD_TIMING_LOG=True)
+    def test_timing_log(self):
+        with self.assertLogs('card_maker.timing') as logs:
+            self.post_json('/generate/', {**USER, 'template': 'modern', 'theme': 'vibrant'})
+        entry = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((entry['event'], entry['template'], entry['theme']), ('generate_card', 'modern', 'vibrant'))
+        self.assertIn('encode', entry['stages_ms'])
+
+
+class PaletteTests(SimpleTestCase):
+    colors = ['#000000', '#ffffff', '#808080', '#3498db', '#e74c3c', '#ff0000', '#00ff00', '#0000ff', '#7f7f80', '#010203']
+
+    @skipIf(palette.np is None, 'numpy가 없으면 palette_arrays를 쓰지 않음')
+    def test_palette_arrays_match_colorsys(self):
+        rng = random.Random(0)
+        colors = self.colors + ['#%06x' % rng.randrange(0x1000000) for _ in range(500)]
+        for theme in utils.COLOR_THEMES:
+            arrays = palette.palette_arrays(colors, theme)
+            for index, color in enumerate(colors):
+                expected = palette.build_palette(color, theme) #colorsys로 한 색씩 계산
+                self.assertEqual(set(arrays), set(expected))
+                for name, rgb in expected.items():
+                    self.assertEqual(tuple(arrays[name][index].tolist()), rgb, (color, theme, name))
+
+    def test_batch_palettes_equal_cached_palettes(self):
+        for theme in utils.COLOR_THEMES:
+            palettes = palette.generate_color_palettes(self.colors, theme)
+            self.assertEqual(palettes, [palette.get_palette(color, theme) for color in self.colors])
+
+    def test_normalize_hex(self):
+        self.assertEqual(palette.normalize_hex('ABC'), '#aabbcc')
+        self.assertEqual(palette.normalize_hex(' #3498DB '), '#3498db')
+        with self.assertRaises(ValueError):
+            palette.normalize_hex('blue')
+
+
+class UserDataValidationTests(MemoryStorageMixin, SimpleTestCase):
+    def test_text_fields_must_be_strings(self):
+        for body in ({'name': 5}, {'school': ['한국대학교']}, {'phone': {'mobile': '010'}}):
+            response = self.post_json('/generate/', {**USER, **body})
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn('문자열', response.json()['error'])
+        self.assertFalse(self.storage.entries()) #렌더링 전에 거절
+
+        response = self.post_json('/generate/batch/', [USER, {**USER, 'name': 5}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], '1번째 항목: name는 문자열이어야 합니다.')
+
+    def test_missing_fields_are_empty(self):
+        response = self.post_json('/generate/', {'name': None, 'favorite_color': '#ABC'})
+        self.assertTrue(response.json()['success'])
+
+
+class GlyphCacheTests(SimpleTestCase):
+    def setUp(self):
+        glyphs.GLYPH_CACHE.clear()
+
+    def test_cached_run_matches_draw_text(self):
+        for font_name in (None, 'neon'):
+            font = utils.get_font(40, font_name=font_name)
+            for text in ('홍길동', 'Hello, 한국대학교!', '010-1234-5678'):
+                expected = Image.new('RGB', (600, 120), 'white')
+                ImageDraw.Draw(expected).text((20, 30), text, fill=(52, 152, 219), font=font)
+                actual = Image.new('RGB', (600, 120), 'white')
+                glyphs.draw_glyph_run(ImageDraw.Draw(actual), (20, 30), glyphs.glyph_run(font, text), (52, 152, 219))
+                self.assertIsNone(ImageChops.difference(actual, expected).getbbox(), (font_name, text))
+
+    def test_neon_reuses_cached_masks(self):
+        spec = utils.plan_card(USER, 1, 'neon', 'vibrant')
+        cold = utils.render_spec(spec)
+        layout = TEMPLATE_REGISTRY.compiled('neon', *cold.size)
+        runs = [place_field(field, USER[field.key])[0] for field in layout.fields]
+        masks = [dict(run.effects) for run in runs]
+        self.assertTrue(all(masks))
+        hits = glyphs.GLYPH_CACHE.hits
+
+        with mock.patch.object(glyphs.ImageFilter, 'GaussianBlur', side_effect=AssertionError('다시 블러함')):
+            warm = utils.render_spec(spec)
+        self.assertIsNone(ImageChops.difference(cold, warm).getbbox())
+        self.assertGreaterEqual(glyphs.GLYPH_CACHE.hits - hits, len(runs))
+        for run, effects in zip(runs, masks):
+            self.assertTrue(all(run.effects[key] is value for key, value in effects.items()))
+
+    def test_neon_glow_surrounds_the_core(self):
+        run = glyphs.glyph_run(utils.get_font(40, font_name='neon'), '홍길동')
+        pad, glow, core = glyphs.neon_masks(run, 3, 3)
+        self.assertEqual(glow.size, core.size)
+        self.assertEqual(core.size, (run.mask.width + 2 * pad, run.mask.height + 2 * pad))
+        inner = Image.new('L', core.size, 0)
+        inner.paste(run.mask, (pad, pad))
+        self.assertIsNone(ImageChops.subtract(inner, core).getbbox()) #테두리는 글자를 덮음
+        self.assertGreater(glow.getbbox()[2] - glow.getbbox()[0], core.getbbox()[2] - core.getbbox()[0])
+
+    def test_empty_text_draws_nothing(self):
+        img = Image.new('RGB', (100, 50), 'white')
+        run = glyphs.glyph_run(utils.get_font(20), '')
+        glyphs.draw_neon_run(ImageDraw.Draw(img), (10, 10), run, (255, 0, 0), (0, 0, 0), 3, 3)
+        self.assertIsNone(ImageChops.difference(img, Image.new('RGB', (100, 50), 'white')).getbbox())
+
+
+class AsyncGenerateTests(MemoryStorageMixin, SimpleTestCase):
+    def test_rejects_non_object_bodies(self):
+        for url in ('/generate/', '/edits/', '/preview/', '/jobs/'):
+            response = self.client.post(url, '[1, 2]', content_type='application/json')
+            self.assertEqual(response.status_code, 400, url)
+            self.assertEqual(response.json()['error'], '요청 본문은 JSON 객체여야 합니다.')
+
+    def test_full_render_pool_is_503(self):
+        pool = mock.Mock()
+        pool.submit.side_effect = Overloaded(503, 2)
+        with mock.patch.object(views, 'render_pool', return_value=pool):
+            response = self.post_json('/generate/', USER)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+
+    async def test_asgi_generate(self):
+        response = await self.async_client.post('/generate/', json.dumps(USER), content_type='application/json')
+        self.assertTrue(response.json()['success'])
+
+
+class ClientKeyTests(SimpleTestCase):
+    def test_forwarded_address_only_from_trusted_proxies(self):
+        factory = RequestFactory()
+        request = factory.get('/', HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4, 10.0.0.5')
+        self.assertEqual(client_key(request), '127.0.0.1')
+        with override_settings(CARD_TRUSTED_PROXIES=['127.0.0.1', '10.0.0.0/8']):
+            self.assertEqual(client_key(request), '1.2.3.4')
+            self.assertEqual(client_key(factory.get('/', HTTP_X_REAL_IP='5.5.5.5')), '5.5.5.5')
+            self.assertEqual(client_key(factory.get('/', REMOTE_ADDR='8.8.8.8', HTTP_X_FORWARDED_FOR='1.1.1.1')), '8.8.8.8')
+
+
+class StorageTests(MemoryStorageMixin, SimpleTestCase):
+    def test_prune_removes_whole_cards_oldest_first(self):
+        for name in ('old', 'new'):
+            self.storage.save('cards', f'card_{name}.png', b'x' * 10)
+            self.storage.save('qrcodes', f'qr_{name}.png', b'x' * 5)
+            self.storage.save('specs', f'card_{name}.json', b'x' * 5)
+            time.sleep(0.01)
+        self.storage.touch('cards', 'card_old.png')
+
+        self.assertEqual(self.storage.prune(max_bytes=30), (3, 20))
+        self.assertEqual(
+            sorted(name for _, name, _, _ in self.storage.entries()),
+            ['card_old.json', 'card_old.png', 'qr_old.png'],
+        )
+
+    def test_saved_card_is_pruned_with_its_qr_and_spec(self):
+        spec = utils.plan_card(USER)
+        urls = []
+        for _ in range(2):
+            urls.append(utils.save_card_files(utils.render_spec(spec), 'testserver', spec=spec))
+            time.sleep(0.01)
+        first, second = (url['card_url'].rsplit('/', 1)[1] for url in urls)
+        for url, filename in zip(urls, (first, second)): #QR도 명함과 같은 id
+            self.assertEqual(url['qr_url'], f"/media/qrcodes/{filename.replace('card_', 'qr_')}")
+
+        newer = sum(size for _, name, size, _ in self.storage.entries() if storage_module.group_key(name) == storage_module.group_key(second))
+        self.assertEqual(self.storage.prune(max_bytes=(newer + 1) / 0.9)[0], 3) #먼저 저장한 명함 묶음만
+        self.assertEqual(
+            sorted(name for _, name, _, _ in self.storage.entries()),
+            sorted([second, utils.spec_name(second), second.replace('card_', 'qr_')]),
+        )
+
+    def test_cache_hit_touches_the_spec(self):
+        first = utils.create_cached_card(USER, 'testserver')
+        filename = first['card_url'].rsplit('/', 1)[1]
+        before = self.storage.stat('specs', utils.spec_name(filename)).mtime_ns
+        time.sleep(0.01)
+        second = utils.create_cached_card(USER, 'testserver')
+        self.assertTrue(second['cached'])
+        self.assertGreater(self.storage.stat('specs', utils.spec_name(filename)).mtime_ns, before)
+
+
+class FileSystemStorageTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.storage = FileSystemStorage(root=root.name, write_behind=True, max_bytes=0, ttl=0)
+
+    def test_write_behind_serves_pending_files(self):
+        self.storage.save('cards', 'card_a.png', b'card')
+        self.assertEqual(self.storage.read('cards', 'card_a.png'), b'card')
+        self.storage.flush()
+        stored = self.storage.stat('cards', 'card_a.png')
+        self.assertEqual(stored.path, self.storage.path('cards', 'card_a.png'))
+        self.assertEqual(os.path.relpath(stored.path, self.storage.root).count(os.sep), 3) #종류/ab/cd/이름
+        self.assertEqual([entry[:3] for entry in self.storage.entries()], [('cards', 'card_a.png', 4)])
+
+        self.storage.delete('cards', 'card_a.png')
+        self.assertIsNone(self.storage.stat('cards', 'card_a.png'))
+
+
+class ImpositionTests(MemoryStorageMixin, SimpleTestCase):
+    def test_page_counts(self):
+        for paper, per_sheet in (('a4', 10), ('letter', 12)): #3.5x2in: A4는 세로 2x5, Letter는 가로 3x4
+            layout = SheetLayout(paper)
+            self.assertEqual(layout.per_sheet, per_sheet)
+            card = Image.new('RGB', (layout.card_width, layout.card_height), 'red')
+            for count, pages in ((1, 1), (per_sheet, 1), (per_sheet + 1, 2), (2 * per_sheet + 1, 3)):
+                self.assertEqual(sum(1 for _ in impose([card] * count, layout)), pages, (paper, count))
+
+    def test_sheet_endpoint(self):
+        with ThreadPoolExecutor(max_workers=2) as executor, \
+                mock.patch.object(utils, 'get_batch_executor', return_value=executor):
+            response = self.post_json('/generate/batch/?format=tiff&paper=letter', [USER] * 13)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'image/tiff')
+            self.assertEqual(response['X-Card-Sheets'], '2')
+            with Image.open(io.BytesIO(b''.join(response.streaming_content))) as tiff:
+                self.assertEqual(tiff.n_frames, 2)
+                self.assertEqual(tiff.size, (3300, 2550))
+
+    def test_rejects_empty_batches_and_unknown_paper(self):
+        for url, body in (('/generate/batch/?format=pdf', []), ('/generate/batch/?format=tiff', {'cards': []}),
+                          ('/generate/batch/?format=pdf&paper=a3', [USER])):
+            response = self.post_json(url, body)
+            self.assertEqual(response.status_code, 400, url)
+
+
+class PreviewTests(MemoryStorageMixin, SimpleTestCase):
+    def decode(self, uri):
+        return Image.open(io.BytesIO(base64.b64decode(uri.split(',', 1)[1]))).convert('RGB')
+
+    def test_default_fan_out_covers_every_template(self):
+        response = self.post_json('/preview/', {**USER, 'seed': 42}).json()
+        self.assertEqual(response['seed'], '42')
+        self.assertEqual([variant['template'] for variant in response['variants']], TEMPLATE_REGISTRY.names)
+        for variant in response['variants']:
+            self.assertIn(variant['theme'], TEMPLATE_REGISTRY.themes_for(variant['template']))
+            self.assertEqual((variant['width'], variant['height']), (320, 200))
+            self.assertEqual(self.decode(variant['image']).size, (320, 200))
+        self.assertFalse(self.storage.entries()) #미리보기는 저장하지 않음
+
+    def test_templates_x_themes_keep_order_and_skip_excluded_pairs(self):
+        themes = ['pastel', 'vibrant']
+        response = self.post_json('/preview/', {**USER, 'templates': ['retro', 'modern'], 'themes': themes}).json()
+        expected = [
+            (template, theme) for template in ('retro', 'modern') for theme in themes
+            if theme in TEMPLATE_REGISTRY.themes_for(template)
+        ]
+        self.assertEqual([(variant['template'], variant['theme']) for variant in response['variants']], expected)
+
+    @override_settings(CARD_PREVIEW_PROFILE='preview') #무손실로 비교
+    def test_picked_variant_generates_the_same_card(self):
+        variant = self.post_json('/preview/', {**USER, 'variants': [{'template': 'cute', 'theme': 'pastel'}]}).json()['variants'][0]
+        body = {**USER, 'resolution': 'thumbnail', 'template': 'cute', 'theme': 'pastel', 'seed': variant['seed']}
+        card_url = self.post_json('/generate/', body).json()['card_url']
+        card = Image.open(io.BytesIO(self.storage.read('cards', card_url.rsplit('/', 1)[1]))).convert('RGB')
+        self.assertIsNone(ImageChops.difference(card, self.decode(variant['image'])).getbbox())
+
+    @override_settings(CARD_PREVIEW_MAX_VARIANTS=3)
+    def test_rejects_bad_variant_requests(self):
+        for body in (
+            {'templates': 5}, {'themes': 'pastel'}, {'templates': [['modern']]}, {'variants': [{'template': 1}]},
+            {'variants': 'modern'}, {'templates': ['nope']}, {'templates': TEMPLATE_REGISTRY.names},
+        ):
+            response = self.post_json('/preview/', {**USER, **body})
+            self.assertEqual(response.status_code, 400, body)
+        for body in ({'template': ['modern']}, {'theme': {'name': 'pastel'}}):
+            self.assertEqual(self.post_json('/generate/', {**USER, **body}).status_code, 400, body)
+
+
+class IdempotencyTests(MemoryStorageMixin, SimpleTestCase):
+    def test_replays_the_first_response(self):
+        first = self.post_json('/generate/', USER, HTTP_IDEMPOTENCY_KEY='k1').json()
+        response = self.post_json('/generate/', USER, HTTP_IDEMPOTENCY_KEY='k1')
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(response.json(), first)
+        self.assertEqual(len([entry for entry in self.storage.entries() if entry[0] == 'cards']), 1)
+
+    def test_different_body_with_same_key_is_422(self):
+        self.post_json('/generate/', USER, HTTP_IDEMPOTENCY_KEY='k2')
+        response = self.post_json('/generate/', {**USER, 'name': '김철수'}, HTTP_IDEMPOTENCY_KEY='k2')
+        self.assertEqual(response.status_code, 422)
+
+    def test_pending_key_is_409(self):
+        store = IdempotencyStore('test')
+        self.assertIsNone(async_to_sync(store.begin)('client', 'key', 'fp'))
+        with self.assertRaises(IdempotencyConflict) as raised:
+            async_to_sync(store.begin)('client', 'key', 'fp')
+        self.assertEqual(raised.exception.status, 409)
+
+        store.record('client', 'key', 'fp', {'success': True})
+        self.assertEqual(async_to_sync(store.begin)('client', 'key', 'fp'), {'success': True})
+        self.assertIsNone(async_to_sync(store.begin)('other', 'key', 'fp')) #키는 클라이언트별
+
+    def test_failed_render_releases_the_key(self):
+        with mock.patch.object(views, 'render_spec', side_effect=RuntimeError('실패')):
+            self.assertFalse(self.post_json('/generate/', USER, HTTP_IDEMPOTENCY_KEY='k3').json()['success'])
+        self.assertTrue(self.post_json('/generate/', USER, HTTP_IDEMPOTENCY_KEY='k3').json()['success'])
+
+    def test_rejects_overlong_keys(self):
+        self.assertEqual(self.post_json('/generate/', USER, HTTP_IDEMPOTENCY_KEY='k' * 256).status_code, 400)
+
+
+class SingleFlightTests(MemoryStorageMixin, SimpleTestCase):
+    def test_coalesces_until_done(self):
+        flights = SingleFlight('test')
+        future = Future()
+        submit = mock.Mock(return_value=future)
+        self.assertIs(flights.submit('key', submit), future)
+        self.assertIs(flights.submit('key', submit), future)
+        self.assertEqual(submit.call_count, 1)
+
+        future.set_result('done')
+        self.assertEqual(len(flights), 0)
+        submit.return_value = Future()
+        flights.submit('key', submit)
+        self.assertEqual(submit.call_count, 2)
+
+    async def test_concurrent_identical_requests_render_once(self):
+        started, release = threading.Event(), threading.Event()
+        render_spec = utils.render_spec
+
+        def slow_render_spec(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return render_spec(*args, **kwargs)
+
+        async def generate(user_data=USER):
+            return await self.async_client.post('/generate/', json.dumps(user_data), content_type='application/json')
+
+        with mock.patch.object(views, 'render_spec', side_effect=slow_render_spec) as mocked:
+            first = asyncio.ensure_future(generate())
+            await asyncio.to_thread(started.wait, 5)
+            second = asyncio.ensure_future(generate())
+            other = asyncio.ensure_future(generate({**USER, 'name': '김철수'}))
+            await asyncio.sleep(0.05)
+            release.set()
+            responses = await asyncio.gather(first, second, other)
+        self.assertEqual(mocked.call_count, 2)
+        self.assertEqual(responses[0].json()['card_url'], responses[1].json()['card_url'])
+        self.assertNotEqual(responses[0].json()['card_url'], responses[2].json()['card_url'])
+
+
+class VectorTests(MemoryStorageMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.card_url = self.post_json('/generate/', {**USER, 'template': 'modern', 'theme': 'vibrant'}).json()['card_url']
+        self.filename = self.card_url.rsplit('/', 1)[1]
+
+    def download(self, fmt):
+        response = self.client.get(f'/download/{self.filename}/', {'format': fmt})
+        return response, b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_svg_has_print_size_and_text(self):
+        for template in TEMPLATE_REGISTRY.names:
+            spec = utils.plan_card(USER, 1, template)
+            svg = ElementTree.fromstring(encode_vector(utils.render_spec(spec, 'print', vector=True), 'svg'))
+            self.assertEqual((svg.get('width'), svg.get('height'), svg.get('viewBox')), ('3.5in', '2.0in', '0 0 1050 600'))
+            texts = [text.text for text in svg.iter(f'{SVG}text')]
+            for key in ('name', 'school', 'phone'):
+                self.assertIn(USER[key], texts, (template, key))
+
+    def test_pdf_cross_reference_table(self):
+        response, pdf = self.download('pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(pdf.startswith(b'%PDF-') and pdf.rstrip().endswith(b'%%EOF'))
+        self.assertIn(b'/MediaBox [0 0 252 144]', pdf) #3.5x2in (72pt/in)
+        xref = int(pdf[pdf.rindex(b'startxref') + 9:].split()[0])
+        self.assertTrue(pdf[xref:].startswith(b'xref'))
+        lines = pdf[xref:].split(b'\n')
+        first, count = map(int, lines[1].split())
+        for number, line in enumerate(lines[2:2 + count], first):
+            offset, _, kind = line.split()[:3]
+            if kind == b'n':
+                self.assertTrue(pdf[int(offset):].startswith(f'{number} 0 obj'.encode()), number)
+
+    def test_vector_files_are_rendered_once(self):
+        response, svg = self.download('svg')
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="{self.filename.replace("card_", "card_vector_").replace(".png", ".svg")}"')
+        with mock.patch.object(utils, 'render_spec', side_effect=AssertionError('다시 렌더링함')):
+            self.assertEqual(self.download('svg')[1], svg)
+        self.assertEqual(self.download('eps')[0].status_code, 400)
+        self.assertEqual(self.client.get('/download/card_missing.png/', {'format': 'svg'}).status_code, 404)
+
+    @override_settings(CARD_QR_ON_CARD=True)
+    def test_on_card_qr_is_drawn_as_modules(self):
+        self.filename = self.post_json('/generate/', USER).json()['card_url'].rsplit('/', 1)[1]
+        _, svg = self.download('svg')
+        download_url = f'http://testserver/download/{self.filename}/'
+        self.assertIn(f'<path d="{qr_path(qr_runs(download_url))}" fill="#000"/></g>', svg.decode('utf-8'))
+        _, pdf = self.download('pdf')
+        operators = b' '.join(zlib.decompress(stream) for stream in re.findall(rb'/FlateDecode /Length \d+ >>\nstream\n(.*?)\nendstream', pdf, re.S))
+        self.assertGreaterEqual(len(re.findall(rb' re\b', operators)), len(qr_runs(download_url))) #가로로 이어진 모듈마다 사각형 하나
+
+
+class EditSessionTests(MemoryStorageMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.session = self.post_json('/edits/', {**USER, 'template': 'modern', 'theme': 'vibrant'}).json()
+
+    def patch(self, data, token=None):
+        token = self.session['edit_token'] if token is None else token
+        return self.client.patch(
+            f"/edits/{self.session['session_id']}/", json.dumps(data), content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {token}',
+        )
+
+    def test_only_changed_layers_are_redrawn(self):
+        response = self.patch({'name': '김철수'}).json()
+        self.assertEqual((response['revision'], response['dirty']), (1, ['name']))
+        response = self.patch({'favorite_color': '#e74c3c'}).json()
+        self.assertEqual(response['dirty'][:2], ['palette', 'background'])
+
+    def test_token_is_required(self):
+        self.assertEqual(self.patch({'name': '김철수'}, token='').status_code, 401)
+        self.assertEqual(self.patch({'name': '김철수'}, token='wrong').status_code, 403)
+        self.assertEqual(self.patch({'nickname': 'x'}).status_code, 400)
+
+    def test_evicted_session_is_restored_from_spec(self):
+        self.patch({'name': '김철수'})
+        edits.EDIT_SESSIONS.clear()
+        response = self.patch({'school': '서울대학교'}).json()
+        self.assertEqual(response['revision'], 2)
+        spec = edits.session_spec(self.session['session_id'])
+        self.assertEqual((spec['user_data']['name'], spec['user_data']['school']), ('김철수', '서울대학교'))
+
+    def test_concurrent_edits_of_restored_session_are_serialized(self):
+        edits.EDIT_SESSIONS.clear()
+        session_spec = edits.session_spec
+
+        def slow_session_spec(session_id): #두 요청이 모두 저장된 spec을 읽은 뒤에 렌더링하도록 벌려둠
+            spec = session_spec(session_id)
+            time.sleep(0.05)
+            return spec
+
+        def edit(changes):
+            edits.edit_card(self.session['session_id'], changes, 'testserver', self.session['edit_token'])
+
+        with mock.patch.object(edits, 'session_spec', side_effect=slow_session_spec):
+            threads = [threading.Thread(target=edit, args=(changes,)) for changes in ({'name': '김철수'}, {'phone': '010-9876-5432'})]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(10)
+        spec = session_spec(self.session['session_id'])
+        self.assertEqual(spec['revision'], 2)
+        self.assertEqual((spec['user_data']['name'], spec['user_data']['phone']), ('김철수', '010-9876-5432'))
+        self.assertEqual(edits._session_locks, {})
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
@@ -6,5 +7,13 @@ app_name = 'card_maker'
 urlpatterns = [
     path("", views.index, name="index"),
     path("generate/", views.generate_card, name="generate_card"),
+    path("generate/batch/", views.generate_batch, name="generate_batch"),
+    path("preview/", views.preview_cards, name="preview_cards"),
+    path("edits/", views.start_edit_session, name="start_edit_session"),
+    path("edits/<str:session_id>/", views.edit_session, name="edit_session"),
+    path("metrics/", views.metrics_view, name="metrics"),
+    path("jobs/", views.create_job, name="create_job"),
+    path("jobs/<uuid:job_id>/", views.job_status, name="job_status"),
     path("download/<str:filename>/", views.download_card, name="download_card"),
+    path(f"{settings.MEDIA_URL.lstrip('/')}<str:kind>/<str:filename>", views.serve_media, name="serve_media"),
 ]
\ No newline at end of file
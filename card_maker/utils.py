@@ -1,68 +1,69 @@
 from PIL import Image, ImageDraw, ImageFont
+from concurrent.futures import ProcessPoolExecutor
+import base64
+import collections
 import random
-import colorsys
+import hashlib
+import io
+import json
+import logging
+import mimetypes
 import os
+import threading
+import uuid
 from django.conf import settings
-import qrcode
-
-TEMPLATES = [
-    'modern', 'cute', 'retro', 'neon', 'galaxy', 'minimalist', 'grunge'
-]
+from . import metrics
+from .cache import LRUCache
+from .fills import fill_background
+from .glyphs import glyph_run
+from .layout import CanvasScale, card_size, font_pixels
+from .palette import get_palette
+from .qr import composite_qr, render_qr
+from .registry import CardTemplate, NeonText, TemplateRegistry
+from .storage import get_storage
+from .vector import VectorCanvas, encode_vector
+from .vectorized import render_galaxy_background, render_grunge_background, vectorized_enabled
+
+logger = logging.getLogger(__name__)
 
 COLOR_THEMES = [
     'monochrome', 'gradient', 'complementary', 'pastel', 'vibrant'
 ]
 
-def hex_to_rgb(hex_color): #HEX 색상 RGB 변환
-    hex_color = hex_color.lstrip('#')
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-
-def rgb_to_hsl(rgb): #RGB를 HSL로 변환
-    r, g, b = [x/255.0 for x in rgb]
-    return colorsys.rgb_to_hls(r, g, b)
+def generate_color_palette(base_color_hex, theme): #기본 색상 바탕 팔레트 생성 (캐시됨)
+    return get_palette(base_color_hex, theme)
+
+FONT_FILES = {
+    'regular': 'NanumGothic.ttf',
+    'bold': 'NanumGothicBold.ttf',
+    'extrabold': 'NanumGothicExtraBold.ttf',
+    'retro': 'BoldDunggeunmo.ttf',
+    'cute': 'Cutefont.ttf',
+    'grunge': 'BlackHanSans-Regular.ttf',
+    'galaxy': 'Hakgyoansim Byeolbichhaneul TTF B.ttf',
+    'neon': 'EliceDigitalBaeum_Regular.ttf',
+}
 
-def hsl_to_rgb(hsl): #HSL을 RGB로 변환
-    h, l, s = hsl
-    r, g, b = colorsys.hls_to_rgb(h, l, s)
-    return tuple(int(x * 255) for x in (r, g, b))
+def get_font_dir():
+    return os.path.join(settings.BASE_DIR, 'static', 'fonts')
 
-def generate_color_palette(base_color_hex, theme): #기본 색상 바탕 팔레트 생성
-    base_rgb = hex_to_rgb(base_color_hex)
-    base_hsl = rgb_to_hsl(base_rgb)
+def get_font_path(subsets=True): #subset_fonts 명령으로 만든 한글+라틴 서브셋이 있으면 그쪽을 사용
+    font_dir = get_font_dir()
+    subset_dir = getattr(settings, 'CARD_FONT_SUBSET_DIR', None) if subsets else None
+    paths = {}
+    for key, filename in FONT_FILES.items():
+        subset_path = os.path.join(subset_dir, filename) if subset_dir else None
+        paths[key] = subset_path if subset_path and os.path.exists(subset_path) else os.path.join(font_dir, filename)
+    return paths
 
-    h, l, s = base_hsl
+FONT_CACHE = LRUCache(getattr(settings, 'CARD_FONT_CACHE_SIZE', 64))
+_font_path_cache = {}
 
-    #다양한 색 조합 생성
-    if theme == 'complementary':
-        h_secondary = (h+0.5) % 1
-    elif theme == 'monochrome':
-        h_secondary = h
-    else:
-        h_secondary = (h+0.3) % 1
-
-    colors = {
-        'primary': base_rgb,
-        'secondary': hsl_to_rgb((h_secondary, l, s)),
-        'accent': hsl_to_rgb((h, min(l + 0.2, 1), s)),
-        'light': hsl_to_rgb((h, 0.95, 0.1)),
-        'dark': hsl_to_rgb((h, 0.1, s)),
-        }
-    return colors
-
-def get_font_path():
-    font_dir = os.path.join(settings.BASE_DIR, 'static', 'fonts')
-    return {
-        'regular': os.path.join(font_dir, 'NanumGothic.ttf'),
-        'bold': os.path.join(font_dir, 'NanumGothicBold.ttf'),
-        'extrabold': os.path.join(font_dir, 'NanumGothicExtraBold.ttf'),
-        'retro' : os.path.join(font_dir, 'BoldDunggeunmo.ttf'),
-        'cute' : os.path.join(font_dir, 'Cutefont.ttf'),
-        'grunge' : os.path.join(font_dir, 'BlackHanSans-Regular.ttf'),
-        'galaxy' : os.path.join(font_dir, 'Hakgyoansim Byeolbichhaneul TTF B.ttf'),
-        'neon' : os.path.join(font_dir, 'EliceDigitalBaeum_Regular.ttf'),
-    }
+def resolve_font_path(weight='regular', font_name=None): #폰트 경로 결정 (존재 확인은 한 번만)
+    key = (weight, font_name)
+    if key in _font_path_cache:
+        return _font_path_cache[key]
 
-def get_font(size, weight='regular', font_name=None):
     font_paths = get_font_path()
     font_to_use = None
 
@@ -75,333 +76,687 @@ def get_font(size, weight='regular', font_name=None):
     elif os.path.exists(font_paths['regular']):
         font_to_use = font_paths['regular']
 
+    if font_to_use and not os.path.exists(font_to_use):
+        logger.warning("폰트 파일을 찾을 수 없습니다: %s 또는 %s", font_name, weight)
+        font_to_use = None
+
+    _font_path_cache[key] = font_to_use
+    return font_to_use
+
+def load_font(font_path, size):
+    metrics.increment('font_loads')
     try:
-        if font_to_use and os.path.exists(font_to_use):
-            return ImageFont.truetype(font_to_use, size)
-        else:
-            print(f"폰트 파일을 찾을 수 없습니다: {font_name} 또는 {weight}")
-            return ImageFont.load_default()
+        if font_path:
+            with metrics.timed('font_load', '', ''):
+                return ImageFont.truetype(font_path, size)
     except Exception as e:
-        print(f"폰트 로드 오류: {e}")
+        logger.warning("폰트 로드 오류: %s", e)
+    try:
+        return ImageFont.load_default(size) #기본 폰트도 캔버스 크기에 맞춤 (Pillow 10.1+)
+    except TypeError:
         return ImageFont.load_default()
-    
-TEMPLATE_CONFIG = {
-    'modern': {
-        'fonts': {
-            'large': {'size': 48, 'weight': 'bold'},
-            'medium': {'size': 32, 'weight': 'regular'},
-            'small': {'size': 24, 'weight': 'regular'},
-        },
-        'colors': {
-            'name': 'dark', 'school': 'dark', 'phone': 'dark'
-        },
-        'layout': {
-            'name':   {'align': 'left', 'x': lambda w, h: 100, 'y': lambda w, h: 100},
-            'school': {'align': 'left', 'x': lambda w, h: 100, 'y': lambda w, h: 170},
-            'phone':  {'align': 'right', 'x': lambda w, h: w - 100, 'y': lambda w, h: h - 100}
-        }
-    },
-    'cute': {
-        'fonts': {
-            'large': {'size': 42, 'weight': 'bold', 'font_name': 'cute'},
-            'medium': {'size': 28, 'weight': 'regular', 'font_name': 'cute'},
-            'small': {'size': 22, 'weight': 'regular', 'font_name': 'cute'},
-        },
-        'colors': {
-            'name': 'dark', 'school': 'dark', 'phone': 'dark'
-        },
-        'layout': {
-            'name':   {'align': 'center', 'x': lambda w, h: w // 2, 'y': lambda w, h: 180},
-            'school': {'align': 'center', 'x': lambda w, h: w // 2, 'y': lambda w, h: 240},
-            'phone':  {'align': 'center', 'x': lambda w, h: w // 2, 'y': lambda w, h: h - 100}
-        }
-    },
-    'retro': {
-        'fonts': {
-            'large': {'size': 44, 'weight': 'bold', 'font_name': 'retro'},
-            'medium': {'size': 30, 'weight': 'regular', 'font_name': 'retro'},
-            'small': {'size': 26, 'weight': 'regular', 'font_name': 'retro'},
-        },
-        'colors': {
-            'name': 'dark', 'school': 'dark', 'phone': 'dark'
-        },
-        'layout': {
-            'name':   {'align': 'left', 'x': lambda w, h: 120, 'y': lambda w, h: 160},
-            'school': {'align': 'left', 'x': lambda w, h: 120, 'y': lambda w, h: 220},
-            'phone':  {'align': 'right', 'x': lambda w, h: w - 120, 'y': lambda w, h: h - 80}
-        }
-    },
-    'galaxy': {
-        'fonts': {
-            'large': {'size': 48, 'weight': 'bold', 'font_name': 'galaxy'},
-            'medium': {'size': 34, 'weight': 'regular', 'font_name': 'galaxy'},
-            'small': {'size': 30, 'weight': 'regular', 'font_name': 'galaxy'},
-        },
-        'colors': {
-            'name': (255, 255, 255),
-            'school': (200, 200, 255),
-            'phone': (255, 255, 200),
-        },
-        'layout': {
-            'name':   {'align': 'left', 'x': lambda w, h: 110, 'y': lambda w, h: 150},
-            'school': {'align': 'left', 'x': lambda w, h: 110, 'y': lambda w, h: 220},
-            'phone':  {'align': 'right', 'x': lambda w, h: w - 110, 'y': lambda w, h: h - 100}
-        }
-    },
-    'minimalist': {
-        'fonts': {
-            'large': {'size': 42, 'weight': 'bold'},
-            'medium': {'size': 28, 'weight': 'regular'},
-            'small': {'size': 24, 'weight': 'regular'},
-        },
-        'colors': {
-            'name': (50, 50, 50),
-            'school': (100, 100, 100),
-            'phone': (100, 100, 100),
-        },
-        'layout': {
-            'name':   {'align': 'center', 'x': lambda w, h: w // 2, 'y': lambda w, h: 150},
-            'school': {'align': 'center', 'x': lambda w, h: w // 2, 'y': lambda w, h: 210},
-            'phone':  {'align': 'center', 'x': lambda w, h: w // 2, 'y': lambda w, h: h - 100}
-        }
-    },
-    'neon': {
-        'fonts': {
-            'large': {'size': 46, 'weight': 'regular', 'font_name': 'neon'},
-            'medium': {'size': 32, 'weight': 'regular', 'font_name': 'neon'},
-            'small': {'size': 28, 'weight': 'regular', 'font_name': 'neon'},
-        },
-        'colors' : {
-            'name': (255, 255, 255),
-            'school' : 'light',
-            'phone' : 'light',
-        },
-        'layout': {
-            'name':   {'align': 'center', 'x': lambda w, h: w // 2, 'y': lambda w, h: 150},
-            'school': {'align': 'center', 'x': lambda w, h: w // 2, 'y': lambda w, h: h - 150},
-            'phone':  {'align': 'center', 'x': lambda w, h: w // 2, 'y': lambda w, h: h - 110}
-        },
-    },
-    'grunge': {
-        'fonts': {
-            'large': {'size': 40, 'weight': 'bold', 'font_name': 'grunge'},
-            'medium': {'size': 26, 'weight': 'regular', 'font_name': 'grunge'},
-            'small': {'size': 20, 'weight': 'regular', 'font_name': 'grunge'},
-        },
-        'colors': {
-            'name': 'accent',
-            'school': 'light',
-            'phone': 'secondary'
-        },
-        'layout': {
-            'name': {'align': 'left', 'x': lambda w, h: 80, 'y': lambda w, h: 100},
-            'school': {'align': 'left', 'x': lambda w, h: 80, 'y': lambda w, h: 160},
-            'phone': {'align': 'left', 'x': lambda w, h: 80, 'y': lambda w, h: h - 100}
-        }
-    },
-}
 
-def draw_common_text_layout(draw, width, height, template, colors, user_data):
-    config = TEMPLATE_CONFIG[template]
-    
-    fonts = {
-        'large': get_font(**config['fonts']['large']),
-        'medium': get_font(**config['fonts']['medium']),
-        'small': get_font(**config['fonts']['small']),
-    }
+def get_font(size, weight='regular', font_name=None): #(경로, 크기) 단위로 캐시된 폰트 반환
+    font_path = resolve_font_path(weight, font_name)
+    return FONT_CACHE.get_or_create((font_path, size), lambda: load_font(font_path, size))
 
-    text_data = {
-        'name': {'text': user_data['name'], 'font': fonts['large']},
-        'school': {'text': user_data['school'], 'font': fonts['medium']},
-        'phone': {'text': user_data['phone'], 'font': fonts['small']},
-    }
+def get_layout_font(font_config, height): #비율로 정의된 폰트 크기를 캔버스 높이에 맞춰 로드
+    return get_font(font_pixels(font_config['size'], height), font_config['weight'], font_config.get('font_name'))
 
-    for key in ['name', 'school', 'phone']:
-        text = text_data[key]['text']
-        font = text_data[key]['font']
-        layout = config['layout'][key]
-        
-        color_key = config['colors'][key]
-        color = colors[color_key] if isinstance(color_key, str) else color_key
-        
-        try:
-            text_width = draw.textbbox((0, 0), text, font=font)[2]
-        except AttributeError:
-            text_width = font.getlength(text)
-        
-        base_x = layout['x'](width, height)
-        if layout['align'] == 'center':
-            x = base_x - (text_width // 2)
-        elif layout['align'] == 'right':
-            x = base_x - text_width
-        else:
-            x = base_x
-        
-        y = layout['y'](width, height)
-
-        if template == 'neon':
-            glow_color = colors['accent']
-            main_color = (255, 255, 255) if key == 'name' else color
-
-            offsets = [-2, 2, -3, 3]
-            for offset in offsets:
-                draw.text((x+offset, y), text, fill=glow_color, font=font)
-                draw.text((x, y+offset), text, fill=glow_color, font=font)
-
-            draw.text((x-1, y), text, fill=main_color, font=font)
-            draw.text((x+1, y), text, fill=main_color, font=font)
-            draw.text((x, y-1), text, fill=main_color, font=font)
-            draw.text((x, y+1), text, fill=main_color, font=font)
-
-            draw.text((x, y), text, fill=main_color, font=font)
-        
-        else:
-            draw.text((x, y), text, fill=color, font=font)
+def preload_fonts(resolutions=None): #모든 템플릿의 레이아웃(폰트 포함)을 자주 쓰는 해상도로 미리 계산
+    if resolutions is None:
+        resolutions = getattr(settings, 'CARD_FONT_PRELOAD_RESOLUTIONS', ['preview'])
+    for resolution in resolutions:
+        width, height = card_size(resolution)
+        for name in TEMPLATE_REGISTRY.names:
+            TEMPLATE_REGISTRY.compiled(name, width, height)
+    return FONT_CACHE.stats()
 
-def draw_modern_background(draw, width, height, colors):
-    draw.rectangle([0, 0, width, height], fill=colors['light'])
-    draw.polygon([(width - 200, 0), (width, 0), (width, 200)], fill=colors['primary'])
-    draw.line([(0, height - 100), (width, height)], fill=colors['accent'], width=5)
+def font_cache_stats():
+    return FONT_CACHE.stats()
 
-def draw_cute_sparkle(draw, x, y, size, fill):
+def place_field(field, text): #필드 하나의 글자 레이어: 측정값/마스크(GLYPH_CACHE)와 정렬을 반영한 위치
+    run = glyph_run(field.font, text)
+    return run, (field.x - (run.width * field.shift) // 2, field.y)
+
+def draw_common_text_layout(draw, width, height, template, colors, user_data):
+    with metrics.timed('layout'):
+        layout = TEMPLATE_REGISTRY.compiled(template, width, height)
+
+    for field in layout.fields:
+        run, xy = place_field(field, user_data[field.key])
+        field.draw(draw, xy, run, field.resolve_color(colors), colors)
+
+def draw_modern_background(draw, width, height, colors, rng=random):
+    scale = CanvasScale(width, height)
+    fill_background(draw, width, height, colors, colors['light'], 'linear', 0.5)
+    corner = scale.length(200)
+    draw.polygon([(width - corner, 0), (width, 0), (width, corner)], fill=colors['primary'])
+    draw.line([(0, height - scale.y(100)), (width, height)], fill=colors['accent'], width=scale.length(5))
+
+def draw_cute_sparkle(draw, x, y, size, fill, rng=random, line_width=2):
     half_size = size // 2
-    draw.line([(x - half_size, y), (x + half_size, y)], fill=fill, width=2)
-    draw.line([(x, y - half_size), (x, y + half_size)], fill=fill, width=2)
-    if random.random() < 0.3:
+    draw.line([(x - half_size, y), (x + half_size, y)], fill=fill, width=line_width)
+    draw.line([(x, y - half_size), (x, y + half_size)], fill=fill, width=line_width)
+    if rng.random() < 0.3:
         diag_size = half_size // 2
-        draw.line([(x - diag_size, y - diag_size), (x + diag_size, y + diag_size)], fill=fill, width=1)
-        draw.line([(x + diag_size, y - diag_size), (x - diag_size, y + diag_size)], fill=fill, width=1)
+        diag_width = max(1, line_width // 2)
+        draw.line([(x - diag_size, y - diag_size), (x + diag_size, y + diag_size)], fill=fill, width=diag_width)
+        draw.line([(x + diag_size, y - diag_size), (x - diag_size, y + diag_size)], fill=fill, width=diag_width)
 
 def draw_polka_dot(draw, x, y, size, fill):
     radius = size // 2
     draw.ellipse([x - radius, y -radius, x + radius, y + radius], fill=fill)
 
-def draw_cute_background(draw, width, height, colors):
-    pastel_bg = random.choice([colors['light'], tuple(min(255, c+50) for c in colors['primary'])])
-    draw.rectangle([0, 0, width, height], fill=pastel_bg)
+#무작위 위치는 800x500 기준 좌표로 뽑은 뒤 변환 (같은 seed면 해상도가 달라도 같은 구도)
+def draw_cute_background(draw, width, height, colors, rng=random):
+    scale = CanvasScale(width, height)
+    pastel_bg = rng.choice([colors['light'], colors['pastel_primary']])
+    fill_background(draw, width, height, colors, pastel_bg, 'radial', 0.5)
     pattern_color_1 = colors['accent']
     pattern_color_2 = colors['secondary']
     for i in range(25):
-        x = random.randint(30, width - 30)
-        y = random.randint(30, height - 30)
-        size = random.randint(10, 25)
+        x = scale.x(rng.randint(30, 770))
+        y = scale.y(rng.randint(30, 470))
+        size = scale.length(rng.randint(10, 25))
 
-        if random.random() < 0.6:
-            fill_color = random.choice([pattern_color_1, pattern_color_2, (255, 255, 255)])
+        if rng.random() < 0.6:
+            fill_color = rng.choice([pattern_color_1, pattern_color_2, (255, 255, 255)])
             draw_polka_dot(draw, x, y, size, fill_color)
         else:
-            fill_color = random.choice([pattern_color_1, (255, 255, 255)])
-            draw_cute_sparkle(draw, x, y, size, fill_color)
+            fill_color = rng.choice([pattern_color_1, (255, 255, 255)])
+            draw_cute_sparkle(draw, x, y, size, fill_color, rng, scale.length(2))
 
-    draw.rounded_rectangle([40, 40, width-40, height-40], radius=20, outline=colors['primary'], width=4)
+    inset = scale.length(40)
+    draw.rounded_rectangle([inset, inset, width-inset, height-inset], radius=scale.length(20), outline=colors['primary'], width=scale.length(4))
 
-def draw_retro_background(draw, width, height, colors):
+def draw_retro_background(draw, width, height, colors, rng=random):
+    scale = CanvasScale(width, height)
     retro_bg = (245, 222, 179)
-    draw.rectangle([0, 0, width, height], fill=retro_bg)
+    fill_background(draw, width, height, colors, retro_bg, 'diagonal', 0.35)
     grid_color = tuple(c - 15 for c in retro_bg)
-    for i in range(0, width, 60):
+    grid = scale.length(60)
+    for i in range(0, width, grid):
         draw.line([(i, 0), (i, height)], fill=grid_color, width=1)
-    for i in range(0, height, 60):
+    for i in range(0, height, grid):
         draw.line([(0, i), (width, i)], fill=grid_color, width=1)
-    draw.polygon([(width - 200, height), (width, height - 200), (width, height)], fill=colors['primary'])
-    draw.polygon([(width - 150, height), (width, height - 150), (width, height)], fill=colors['accent'])
+    large, small = scale.length(200), scale.length(150)
+    draw.polygon([(width - large, height), (width, height - large), (width, height)], fill=colors['primary'])
+    draw.polygon([(width - small, height), (width, height - small), (width, height)], fill=colors['accent'])
     for i in range(5):
-        draw.rectangle([10+i*2, 10+i*2, width-10-i*2, height-10-i*2], outline=colors['primary'], width=2)
+        inset = scale.length(10+i*2)
+        draw.rectangle([inset, inset, width-inset, height-inset], outline=colors['primary'], width=scale.length(2))
+
+def draw_galaxy_background(draw, width, height, colors, rng=random):
+    scale = CanvasScale(width, height)
+    fill_background(draw, width, height, colors, (10, 10, 30), 'radial', 0.35)
 
-def draw_galaxy_background(draw, width, height, colors):
-    draw.rectangle([0, 0, width, height], fill=(10, 10, 30))
-    
     for i in range(150):
-        x = random.randint(0, width)
-        y = random.randint(0, height)
-        size = random.choice([1] * 80 + [2] * 15 + [3] * 5) 
-        brightness = random.randint(100, 255)
+        x = scale.x(rng.randint(0, 800))
+        y = scale.y(rng.randint(0, 500))
+        size = scale.length(rng.choice([1] * 80 + [2] * 15 + [3] * 5))
+        brightness = rng.randint(100, 255)
         if size == 1:
             draw.point((x, y), fill=(brightness, brightness, brightness))
         else:
             draw.ellipse([x, y, x + size, y + size], fill=(brightness, brightness, brightness))
 
-def draw_minimalist_background(draw, width, height, colors):
-    draw.rectangle([0, 0, width, height], fill=(255, 255, 255))
+def draw_minimalist_background(draw, width, height, colors, rng=random):
+    scale = CanvasScale(width, height)
+    fill_background(draw, width, height, colors, (255, 255, 255), 'linear', 0.25)
     border_color = (220, 220, 220)
-    draw.rectangle([0, 0, width, 10], fill=border_color)
-    draw.rectangle([0, height - 10, width, height], fill=border_color)
+    border = scale.length(10)
+    draw.rectangle([0, 0, width, border], fill=border_color)
+    draw.rectangle([0, height - border, width, height], fill=border_color)
 
     line_y = height * 2 // 3
     line_width = width // 5
     line_start_x = (width - line_width) // 2
-    draw.line([(line_start_x, line_y), (line_start_x + line_width, line_y)], fill=colors['secondary'], width=2)
+    draw.line([(line_start_x, line_y), (line_start_x + line_width, line_y)], fill=colors['secondary'], width=scale.length(2))
 
-def draw_neon_background(draw, width, height, colors):
-    draw.rectangle([0, 0, width, height], fill=(20, 20, 20))
+def draw_neon_background(draw, width, height, colors, rng=random):
+    scale = CanvasScale(width, height)
+    fill_background(draw, width, height, colors, (20, 20, 20), 'radial', 0.3)
 
     neon_color = colors['primary']
-    for thickness in range(8, 0, -1):
-        draw.rectangle([60-thickness, 60-thickness, width-60+thickness, height-60+thickness], outline=neon_color, width=thickness)
-
-def draw_grunge_background(draw, width, height, colors):
-    base_color = tuple(max(0, c-30) for c in colors['primary'])
-    draw.rectangle([0, 0, width, height], fill=base_color)
+    inset = scale.length(60)
+    for thickness in range(scale.length(8), 0, -1):
+        draw.rectangle([inset-thickness, inset-thickness, width-inset+thickness, height-inset+thickness], outline=neon_color, width=thickness)
+
+def draw_grunge_background(draw, width, height, colors, rng=random):
+    scale = CanvasScale(width, height)
+    base_color = colors['grunge_base']
+    fill_background(draw, width, height, colors, base_color, 'noise', 0.5)
     accent_rgb = colors['accent']
     secondary_rgb = colors['secondary']
     for i in range(100):
-        x = random.randint(0, width)
-        y = random.randint(0, height)
-        size = random.randint(1, 5)
-        fill_color = random.choice([base_color] * 3 + [accent_rgb] * 5 + [secondary_rgb] * 2)
+        x = scale.x(rng.randint(0, 800))
+        y = scale.y(rng.randint(0, 500))
+        size = scale.length(rng.randint(1, 5))
+        fill_color = rng.choice([base_color] * 3 + [accent_rgb] * 5 + [secondary_rgb] * 2)
         draw.ellipse([x, y, x+size, y+size], fill=fill_color)
     for i in range(20):
-        x1, y1 = random.randint(0, width), random.randint(0, height)
-        x2, y2 = random.randint(0, width), random.randint(0, height)
-        draw.line([(x1, y1), (x2, y2)], fill=colors['accent'], width=random.randint(1,3))
-
-BACKGROUND_DRAWERS = {
-    'modern': draw_modern_background,
-    'cute': draw_cute_background,
-    'retro': draw_retro_background,
-    'galaxy': draw_galaxy_background,
-    'minimalist': draw_minimalist_background,
-    'neon' : draw_neon_background,
-    'grunge' : draw_grunge_background,
-}
+        x1, y1 = scale.x(rng.randint(0, 800)), scale.y(rng.randint(0, 500))
+        x2, y2 = scale.x(rng.randint(0, 800)), scale.y(rng.randint(0, 500))
+        draw.line([(x1, y1), (x2, y2)], fill=colors['accent'], width=scale.length(rng.randint(1,3)))
+
+TEMPLATE_REGISTRY = TemplateRegistry(COLOR_THEMES, get_layout_font)
+
+#위치는 캔버스 폭/높이에 대한 비율, 폰트 크기는 높이에 대한 비율
+TEMPLATE_REGISTRY.register(CardTemplate(
+    'modern',
+    fonts={
+        'large': {'size': 0.096, 'weight': 'bold'},
+        'medium': {'size': 0.064, 'weight': 'regular'},
+        'small': {'size': 0.048, 'weight': 'regular'},
+    },
+    colors={
+        'name': 'dark',
+        'school': 'dark',
+        'phone': 'dark',
+    },
+    layout={
+        'name': {'align': 'left', 'x': 0.125, 'y': 0.2},
+        'school': {'align': 'left', 'x': 0.125, 'y': 0.34},
+        'phone': {'align': 'right', 'x': 0.875, 'y': 0.8},
+    },
+    background=draw_modern_background,
+    static_background=True,
+))
+
+TEMPLATE_REGISTRY.register(CardTemplate(
+    'cute',
+    fonts={
+        'large': {'size': 0.084, 'weight': 'bold', 'font_name': 'cute'},
+        'medium': {'size': 0.056, 'weight': 'regular', 'font_name': 'cute'},
+        'small': {'size': 0.044, 'weight': 'regular', 'font_name': 'cute'},
+    },
+    colors={
+        'name': 'dark',
+        'school': 'dark',
+        'phone': 'dark',
+    },
+    layout={
+        'name': {'align': 'center', 'x': 0.5, 'y': 0.36},
+        'school': {'align': 'center', 'x': 0.5, 'y': 0.48},
+        'phone': {'align': 'center', 'x': 0.5, 'y': 0.8},
+    },
+    background=draw_cute_background,
+))
+
+TEMPLATE_REGISTRY.register(CardTemplate(
+    'retro',
+    fonts={
+        'large': {'size': 0.088, 'weight': 'bold', 'font_name': 'retro'},
+        'medium': {'size': 0.06, 'weight': 'regular', 'font_name': 'retro'},
+        'small': {'size': 0.052, 'weight': 'regular', 'font_name': 'retro'},
+    },
+    colors={
+        'name': 'dark',
+        'school': 'dark',
+        'phone': 'dark',
+    },
+    layout={
+        'name': {'align': 'left', 'x': 0.15, 'y': 0.32},
+        'school': {'align': 'left', 'x': 0.15, 'y': 0.44},
+        'phone': {'align': 'right', 'x': 0.85, 'y': 0.84},
+    },
+    background=draw_retro_background,
+    static_background=True,
+))
+
+TEMPLATE_REGISTRY.register(CardTemplate(
+    'neon',
+    fonts={
+        'large': {'size': 0.092, 'weight': 'regular', 'font_name': 'neon'},
+        'medium': {'size': 0.064, 'weight': 'regular', 'font_name': 'neon'},
+        'small': {'size': 0.056, 'weight': 'regular', 'font_name': 'neon'},
+    },
+    colors={
+        'name': (255, 255, 255),
+        'school': 'light',
+        'phone': 'light',
+    },
+    layout={
+        'name': {'align': 'center', 'x': 0.5, 'y': 0.3},
+        'school': {'align': 'center', 'x': 0.5, 'y': 0.7},
+        'phone': {'align': 'center', 'x': 0.5, 'y': 0.78},
+    },
+    background=draw_neon_background,
+    static_background=True,
+    text_effect=NeonText,
+    excluded_themes=['pastel'],
+))
+
+TEMPLATE_REGISTRY.register(CardTemplate(
+    'galaxy',
+    fonts={
+        'large': {'size': 0.096, 'weight': 'bold', 'font_name': 'galaxy'},
+        'medium': {'size': 0.068, 'weight': 'regular', 'font_name': 'galaxy'},
+        'small': {'size': 0.06, 'weight': 'regular', 'font_name': 'galaxy'},
+    },
+    colors={
+        'name': (255, 255, 255),
+        'school': (200, 200, 255),
+        'phone': (255, 255, 200),
+    },
+    layout={
+        'name': {'align': 'left', 'x': 0.1375, 'y': 0.3},
+        'school': {'align': 'left', 'x': 0.1375, 'y': 0.44},
+        'phone': {'align': 'right', 'x': 0.8625, 'y': 0.8},
+    },
+    background=draw_galaxy_background,
+    array_background=render_galaxy_background,
+))
+
+TEMPLATE_REGISTRY.register(CardTemplate(
+    'minimalist',
+    fonts={
+        'large': {'size': 0.084, 'weight': 'bold'},
+        'medium': {'size': 0.056, 'weight': 'regular'},
+        'small': {'size': 0.048, 'weight': 'regular'},
+    },
+    colors={
+        'name': (50, 50, 50),
+        'school': (100, 100, 100),
+        'phone': (100, 100, 100),
+    },
+    layout={
+        'name': {'align': 'center', 'x': 0.5, 'y': 0.3},
+        'school': {'align': 'center', 'x': 0.5, 'y': 0.42},
+        'phone': {'align': 'center', 'x': 0.5, 'y': 0.8},
+    },
+    background=draw_minimalist_background,
+    static_background=True,
+    excluded_themes=['complementary'],
+))
+
+TEMPLATE_REGISTRY.register(CardTemplate(
+    'grunge',
+    fonts={
+        'large': {'size': 0.08, 'weight': 'bold', 'font_name': 'grunge'},
+        'medium': {'size': 0.052, 'weight': 'regular', 'font_name': 'grunge'},
+        'small': {'size': 0.04, 'weight': 'regular', 'font_name': 'grunge'},
+    },
+    colors={
+        'name': 'accent',
+        'school': 'light',
+        'phone': 'secondary',
+    },
+    layout={
+        'name': {'align': 'left', 'x': 0.1, 'y': 0.2},
+        'school': {'align': 'left', 'x': 0.1, 'y': 0.32},
+        'phone': {'align': 'left', 'x': 0.1, 'y': 0.8},
+    },
+    background=draw_grunge_background,
+    array_background=render_grunge_background,
+))
+
+TEMPLATES = TEMPLATE_REGISTRY.names
+
+BACKGROUND_CACHE = LRUCache(
+    getattr(settings, 'CARD_BACKGROUND_CACHE_BYTES', 64 * 1024 * 1024),
+    sizeof=lambda img: len(img.getbands()) * img.width * img.height,
+)
+
+def render_background(template, colors, width, height, rng=random):
+    spec = TEMPLATE_REGISTRY.get(template)
+    if spec.array_background is not None and vectorized_enabled():
+        return spec.array_background(width, height, colors, rng)
 
-def create_business_card(user_data):
-    template = random.choice(TEMPLATES)
-    available_themes = COLOR_THEMES.copy()
-    if template == 'neon':
-        if 'pastel' in available_themes:
-            available_themes.remove('pastel')
-    elif template == 'minimalist':
-        if 'complementary' in available_themes:
-            available_themes.remove('complementary')
-
-    theme = random.choice(available_themes)
-    colors = generate_color_palette(user_data['favorite_color'], theme)
-    width, height = 800, 500
     img = Image.new('RGB', (width, height), colors['light'])
+    spec.background(ImageDraw.Draw(img), width, height, colors, rng)
+    return img
+
+metrics.register_cache('font', FONT_CACHE)
+metrics.register_cache('background', BACKGROUND_CACHE)
+
+def get_background(template, colors, width, height, rng=random): #결정적인 배경은 캐시된 이미지의 복사본 사용
+    if not TEMPLATE_REGISTRY.get(template).static_background:
+        return render_background(template, colors, width, height, rng)
+    key = (template, getattr(colors, 'key', None) or tuple(sorted(colors.items())), width, height)
+    base = BACKGROUND_CACHE.get_or_create(key, lambda: render_background(template, colors, width, height))
+    return base.copy()
+
+def warm_background_cache(base_colors=None, width=800, height=500): #자주 쓰는 팔레트의 배경을 미리 렌더링
+    if base_colors is None:
+        base_colors = getattr(settings, 'CARD_BACKGROUND_WARM_COLORS', [])
+    for base_color in base_colors:
+        for theme in COLOR_THEMES:
+            colors = generate_color_palette(base_color, theme)
+            for template in TEMPLATE_REGISTRY:
+                if template.static_background:
+                    get_background(template.name, colors, width, height)
+    return BACKGROUND_CACHE.stats()
+
+def available_themes_for(template):
+    return TEMPLATE_REGISTRY.themes_for(template)
+
+def choose_variant(rng=random, template=None, theme=None): #템플릿과 색상 테마 선택 (지정한 것이 있어도 rng는 같은 순서로 소비)
+    chosen_template = rng.choice(TEMPLATE_REGISTRY.names)
+    template = template or chosen_template
+    chosen_theme = rng.choice(TEMPLATE_REGISTRY.themes_for(template))
+    return template, theme or chosen_theme
+
+def validate_variant(template=None, theme=None): #사용자가 고른 템플릿/테마 확인 (잘못되면 ValueError)
+    for key, value in (('template', template), ('theme', theme)):
+        if value is not None and not isinstance(value, str): #["x"] 같은 값은 조회하다 TypeError가 나므로 먼저 거절
+            raise ValueError(f'{key}는 문자열이어야 합니다.')
+    if template is not None:
+        TEMPLATE_REGISTRY.get(template)
+    if theme is not None:
+        if theme not in COLOR_THEMES:
+            raise ValueError(f'알 수 없는 테마입니다: {theme}')
+        if template is not None and theme not in TEMPLATE_REGISTRY.themes_for(template):
+            raise ValueError(f'{template} 템플릿에서는 {theme} 테마를 쓸 수 없습니다.')
+    return template, theme
+
+def render_card(user_data, template, theme, rng=random, resolution='preview', colors=None):
+    metrics.set_labels(template, theme)
+    metrics.increment('renders', template, theme)
+    if colors is None:
+        with metrics.timed('palette'):
+            colors = generate_color_palette(user_data['favorite_color'], theme)
+    width, height = card_size(resolution)
+    with metrics.timed('background'):
+        img = get_background(template, colors, width, height, rng)
     draw = ImageDraw.Draw(img)
 
-    if template == 'neon':
-        draw_neon_background(draw, width, height, colors)
-    elif template == 'grunge':
-        draw_grunge_background(draw, width, height, colors)
-    else:
-        if template in BACKGROUND_DRAWERS:
-            BACKGROUND_DRAWERS[template](draw, width, height, colors)
+    with metrics.timed('text'):
+        draw_common_text_layout(draw, width, height, template, colors, user_data)
+
+    return img
+
+def render_vector_card(user_data, template, theme, rng=random, resolution='print', colors=None): #같은 템플릿 정의로 도형만 기록 (encode_vector로 SVG/PDF 변환)
+    metrics.set_labels(template, theme)
+    metrics.increment('vector_renders', template, theme)
+    if colors is None:
+        with metrics.timed('palette'):
+            colors = generate_color_palette(user_data['favorite_color'], theme)
+    width, height = card_size(resolution) #해상도는 좌표를 반올림하는 단위일 뿐 (출력 크기는 CARD_PRINT_INCHES)
+    canvas = VectorCanvas(width, height)
+    with metrics.timed('background'): #numpy 배경(array_background)에는 도형이 없으므로 ImageDraw용 함수로 기록
+        TEMPLATE_REGISTRY.get(template).background(canvas, width, height, colors, rng)
+
+    with metrics.timed('text'):
+        draw_common_text_layout(canvas, width, height, template, colors, user_data)
+
+    return canvas
+
+def plan_card(user_data, seed=None, template=None, theme=None): #템플릿, 테마, seed를 먼저 정해두면 나중에 다른 해상도로 다시 그릴 수 있음
+    if seed is None:
+        seed = random.getrandbits(64)
+    template, theme = choose_variant(random.Random(seed), template, theme)
+    return {'user_data': user_data, 'template': template, 'theme': theme, 'seed': seed}
+
+def render_spec(spec, resolution='preview', colors=None, vector=False): #같은 spec이면 해상도만 다르고 구도는 같은 명함
+    rng = random.Random(spec['seed'])
+    choose_variant(rng, spec['template'], spec['theme'])
+    render = render_vector_card if vector else render_card
+    return render(spec['user_data'], spec['template'], spec['theme'], rng, resolution, colors)
+
+def create_business_card(user_data, seed=None, resolution='preview'): #seed를 주면 같은 입력에 항상 같은 명함
+    spec = plan_card(user_data, seed)
+    return render_spec(spec, resolution), spec['template']
+
+
+def plan_previews(user_data, variants=None, seed=None): #(템플릿, 테마) 조합마다 spec (기본: 템플릿마다 테마 하나씩, 모두 같은 seed)
+    if seed is None:
+        seed = random.getrandbits(64)
+    if variants is None:
+        rng = random.Random(seed)
+        variants = [(template, rng.choice(TEMPLATE_REGISTRY.themes_for(template))) for template in TEMPLATE_REGISTRY.names]
+    return [plan_card(user_data, seed, template, theme) for template, theme in variants]
+
+def preview_palettes(specs): #같은 테마의 변형끼리 팔레트를 공유
+    return {
+        spec['theme']: generate_color_palette(spec['user_data']['favorite_color'], spec['theme'])
+        for spec in specs
+    }
 
-    draw_common_text_layout(draw, width, height, template, colors, user_data)
+def render_preview(spec, resolution='thumbnail', palettes=None): #미리보기 한 장: 저장하지 않고 data URI로만 반환 (QR 없음)
+    img = render_spec(spec, resolution, (palettes or {}).get(spec['theme']))
+    profile = get_encoding_profile(getattr(settings, 'CARD_PREVIEW_PROFILE', 'preview'))
+    with metrics.timed('encode'):
+        data, ext = encode_image(img, profile)
+    return {
+        'template': spec['template'],
+        'theme': spec['theme'],
+        'seed': str(spec['seed']), #JS 숫자로는 64비트 seed가 정확히 표현되지 않으므로 문자열로
+        'width': img.width,
+        'height': img.height,
+        'image': data_uri(data, f'preview.{ext}'),
+    }
 
-    return img, template
+def render_previews(specs, resolution='thumbnail', palettes=None): #렌더링 워커 하나가 맡는 묶음
+    return [render_preview(spec, resolution, palettes) for spec in specs]
 
 
 def generate_qr_code(download_url):
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(download_url)
-    qr.make(fit=True)
-    qr_img = qr.make_image(fill_color="black", back_color="white")
-    return qr_img
\ No newline at end of file
+    return render_qr(download_url)
+
+
+IMAGE_FORMATS = {
+    'PNG': ('png', 'image/png'),
+    'WEBP': ('webp', 'image/webp'),
+    'JPEG': ('jpg', 'image/jpeg'),
+}
+
+DEFAULT_ENCODING_PROFILES = {
+    'preview': {'format': 'PNG', 'options': {'compress_level': 1}},
+    'archival': {'format': 'PNG', 'options': {'optimize': True}},
+    'qr': {'format': 'PNG', 'mode': '1', 'options': {'optimize': True}},
+    'print': {'format': 'PNG', 'options': {'compress_level': 6}},
+}
+
+def get_encoding_profile(name):
+    profiles = getattr(settings, 'CARD_ENCODING_PROFILES', DEFAULT_ENCODING_PROFILES)
+    return profiles[name]
+
+def card_profile():
+    return get_encoding_profile(getattr(settings, 'CARD_OUTPUT_PROFILE', 'preview'))
+
+def qr_profile():
+    return get_encoding_profile(getattr(settings, 'CARD_QR_PROFILE', 'qr'))
+
+def print_profile(): #인쇄용 프로필에는 DPI 정보를 함께 기록
+    profile = get_encoding_profile(getattr(settings, 'CARD_PRINT_PROFILE', 'print'))
+    dpi = getattr(settings, 'CARD_PRINT_DPI', 300)
+    return {**profile, 'options': {**profile.get('options', {}), 'dpi': (dpi, dpi)}}
+
+def profile_extension(profile):
+    return IMAGE_FORMATS[profile['format']][0]
+
+def encode_image(img, profile): #인코딩 프로필(형식, 모드, 압축 옵션)에 따라 이미지 인코딩
+    if hasattr(img, 'get_image'):
+        img = img.get_image()
+    mode = profile.get('mode')
+    if mode and img.mode != mode:
+        img = img.convert(mode)
+    elif profile['format'] == 'JPEG' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    buffer = io.BytesIO()
+    img.save(buffer, format=profile['format'], **profile.get('options', {}))
+    return buffer.getvalue(), profile_extension(profile)
+
+def card_urls(filename, qr_filename, host):
+    return {
+        'card_url': f'/media/cards/{filename}',
+        'qr_url': f'/media/qrcodes/{qr_filename}',
+        'download_url': f'http://{host}/download/{filename}/',
+        'print_url': f'http://{host}/download/{filename}/?resolution=print',
+        'svg_url': f'http://{host}/download/{filename}/?format=svg',
+        'pdf_url': f'http://{host}/download/{filename}/?format=pdf',
+    }
+
+def data_uri(data, filename):
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    return f"data:{content_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+def spec_name(filename): #명함 파일마다 다시 렌더링할 때 쓸 입력을 JSON으로 보관
+    return os.path.splitext(filename)[0] + '.json'
+
+def add_card_qr(card_img, template, data): #CARD_QR_ON_CARD면 레이아웃이 비워둔 자리에 QR 합성 (VectorCanvas도 가능, 합성했으면 True)
+    if not getattr(settings, 'CARD_QR_ON_CARD', False):
+        return False
+    with metrics.timed('qr_composite'):
+        return composite_qr(card_img, data, TEMPLATE_REGISTRY.compiled(template, *card_img.size).qr_box)
+
+def save_card_files(card, host, name=None, inline=False, ext='png', spec=None): #명함과 QR코드를 저장소에 저장하고 URL 반환 (QR이 명함에 들어가면 QR 파일은 없음)
+    if not isinstance(card, bytes):
+        ext = profile_extension(card_profile())
+
+    name = name or uuid.uuid4().hex[:16] #명함, QR, spec이 같은 id를 써야 저장소 정리 때 한 묶음으로 지워짐
+    filename = f"card_{name}.{ext}"
+    qr_filename = f"qr_{name}.{profile_extension(qr_profile())}"
+    urls = card_urls(filename, qr_filename, host)
+
+    qr_on_card = False
+    if isinstance(card, bytes):
+        card_bytes = card
+    else:
+        if spec is not None:
+            qr_on_card = add_card_qr(card, spec['template'], urls['download_url'])
+        with metrics.timed('encode'):
+            card_bytes, _ = encode_image(card, card_profile())
+
+    if qr_on_card:
+        urls['qr_url'] = None
+    else:
+        with metrics.timed('qr'):
+            qr_bytes, _ = encode_image(generate_qr_code(urls['download_url']), qr_profile())
+
+    storage = get_storage()
+    with metrics.timed('write'):
+        if spec is not None:
+            spec_bytes = json.dumps({**spec, 'download_url': urls['download_url']}, ensure_ascii=False).encode('utf-8')
+            storage.save('specs', spec_name(filename), spec_bytes, defer=inline)
+        storage.save('cards', filename, card_bytes, defer=inline)
+        if not qr_on_card:
+            storage.save('qrcodes', qr_filename, qr_bytes, defer=inline)
+
+    if not inline:
+        return urls
+    return {
+        **urls,
+        'card_data_uri': data_uri(card_bytes, filename),
+        'qr_data_uri': None if qr_on_card else data_uri(qr_bytes, qr_filename),
+    }
+
+def render_print_file(filename): #인쇄용 고해상도 명함은 처음 다운로드될 때만 렌더링해 저장 (저장된 이름 반환)
+    storage = get_storage()
+    profile = print_profile()
+    print_name = f'{os.path.splitext(filename)[0]}.{profile_extension(profile)}'
+    if storage.exists('print', print_name):
+        return print_name
+    try:
+        spec = json.loads(storage.read('specs', spec_name(filename)))
+    except FileNotFoundError:
+        return None
+
+    with metrics.collect('render_print'):
+        card_img = render_spec(spec, 'print')
+        add_card_qr(card_img, spec['template'], spec['download_url'])
+        with metrics.timed('encode'):
+            data, _ = encode_image(card_img, profile)
+        with metrics.timed('write'):
+            storage.save('print', print_name, data)
+    return print_name
+
+def render_vector_file(filename, fmt): #SVG/PDF 명함도 처음 다운로드될 때 렌더링해 저장 (저장된 이름 반환)
+    storage = get_storage()
+    vector_name = f'{os.path.splitext(filename)[0]}.{fmt}'
+    if storage.exists('vector', vector_name):
+        return vector_name
+    try:
+        spec = json.loads(storage.read('specs', spec_name(filename)))
+    except FileNotFoundError:
+        return None
+
+    with metrics.collect('render_vector'):
+        canvas = render_spec(spec, 'print', vector=True)
+        add_card_qr(canvas, spec['template'], spec['download_url']) #PNG/인쇄용과 같은 자리에 모듈을 도형으로
+        with metrics.timed('encode'):
+            data = encode_vector(canvas, fmt)
+        with metrics.timed('write'):
+            storage.save('vector', vector_name, data)
+    return vector_name
+
+def card_seed(user_data): #사용자 정보로부터 seed 생성
+    key = '\x1f'.join(str(user_data.get(field, '')) for field in ('name', 'school', 'phone', 'favorite_color'))
+    return int.from_bytes(hashlib.sha256(key.encode('utf-8')).digest()[:8], 'big')
+
+def render_digest(user_data, template, theme, seed, host, resolution='preview'):
+    key = json.dumps([
+        user_data['name'], user_data['school'], user_data['phone'],
+        user_data['favorite_color'].lower(), template, theme, seed, host, resolution,
+    ], ensure_ascii=False)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]
+
+def create_cached_card(user_data, host, inline=False, resolution='preview'): #같은 입력이면 디스크에 저장된 명함을 그대로 반환
+    spec = plan_card(user_data, card_seed(user_data))
+    template = spec['template']
+    name = render_digest(user_data, template, spec['theme'], spec['seed'], host, resolution)
+
+    filename = f"card_{name}.{profile_extension(card_profile())}"
+    qr_filename = f"qr_{name}.{profile_extension(qr_profile())}"
+    storage = get_storage()
+    urls = card_urls(filename, qr_filename, host)
+    try:
+        storage.touch('cards', filename)
+        storage.touch('specs', spec_name(filename)) #인쇄용/벡터 다운로드와 편집 세션이 쓰는 spec도 함께 유지
+        if getattr(settings, 'CARD_QR_ON_CARD', False) and not storage.exists('qrcodes', qr_filename):
+            urls['qr_url'] = None #QR이 명함 안에 들어가 있음
+        else:
+            storage.touch('qrcodes', qr_filename)
+        if inline: #처음 렌더링했을 때와 같은 모양의 응답이 되도록 저장된 파일로 data URI를 만듦
+            urls['card_data_uri'] = data_uri(storage.read('cards', filename), filename)
+            urls['qr_data_uri'] = None if urls['qr_url'] is None else data_uri(storage.read('qrcodes', qr_filename), qr_filename)
+    except FileNotFoundError:
+        pass
+    else:
+        return {**urls, 'template': template, 'cached': True}
+
+    card_img = render_spec(spec, resolution)
+    urls = save_card_files(card_img, host, name=name, inline=inline, spec=spec)
+    return {**urls, 'template': template, 'cached': False}
+
+def render_card_bytes(user_data): #배치 작업 단위: 실패는 항목별로 격리
+    try:
+        spec = plan_card(user_data)
+        data, ext = encode_image(render_spec(spec), card_profile())
+        return {'success': True, 'template': spec['template'], 'image': data, 'ext': ext, 'spec': spec}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+_batch_executor = None
+_batch_executor_lock = threading.Lock()
+
+def get_batch_executor():
+    global _batch_executor
+    with _batch_executor_lock:
+        if _batch_executor is None:
+            _batch_executor = ProcessPoolExecutor(max_workers=getattr(settings, 'CARD_BATCH_WORKERS', None))
+        return _batch_executor
+
+def create_business_cards(items, executor=None): #여러 장의 명함을 프로세스 풀에서 렌더링 (입력 순서 유지)
+    executor = executor or get_batch_executor()
+    return list(executor.map(render_card_bytes, items, chunksize=getattr(settings, 'CARD_BATCH_CHUNKSIZE', 4)))
+
+def render_print_image(user_data): #용지 배치 작업 단위: 인쇄 해상도로 렌더링한 이미지를 그대로 반환
+    try:
+        spec = plan_card(user_data)
+        return {'success': True, 'template': spec['template'], 'image': render_spec(spec, 'print')}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+def iter_print_cards(items, executor=None): #입력 순서대로 내보내되 미리 제출하는 작업 수를 제한 (완성된 이미지가 쌓이지 않도록)
+    executor = executor or get_batch_executor()
+    window = getattr(settings, 'CARD_SHEET_WINDOW', 16)
+    pending = collections.deque()
+    for user_data in items:
+        pending.append(executor.submit(render_print_image, user_data))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,571 @@
+import base64
+import hashlib
+import io
+import logging
+import math
+import os
+import re
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+from django.conf import settings
+from PIL import Image, ImageColor
+from . import metrics
+from .cache import LRUCache
+from .fills import noise_source
+from .glyphs import glyph_run, neon_masks
+from .pdf import Name, PdfWriter, format_number
+from .qr import qr_matrix, qr_path, qr_runs
+
+try:
+    from fontTools import subset as font_subset
+except ImportError:
+    font_subset = None
+
+#같은 템플릿 정의(배경 함수, 글자 배치)로 ImageDraw 대신 VectorCanvas에 그리면 도형이 기록되고,
+#그것을 SVG나 PDF(pdf.PdfWriter)로 변환. 크기와 관계없이 도형 수만큼만 일하므로 인쇄 크기에서도 가벼움.
+#블러처럼 도형으로 표현할 수 없는 것(PDF의 네온 글로우, noise 그라데이션)만 작은 이미지로 포함.
+
+logger = logging.getLogger(__name__)
+
+VECTOR_FORMATS = {
+    'svg': 'image/svg+xml',
+    'pdf': 'application/pdf',
+}
+
+KAPPA = 4 * (math.sqrt(2) - 1) / 3 #원호를 베지어 곡선으로 근사할 때의 제어점 비율
+RADIAL_REACH = math.sqrt(2) #Image.radial_gradient는 가장자리 중점이 아니라 모서리에서 255
+
+def rgb(color): #ImageDraw가 받는 색 표현(튜플, 이름, 회색조 정수)을 (r, g, b)로
+    if isinstance(color, str):
+        return ImageColor.getrgb(color)[:3]
+    if isinstance(color, int):
+        return (color, color, color)
+    return tuple(color[:3])
+
+def hex_color(color):
+    return '#{:02x}{:02x}{:02x}'.format(*color)
+
+def blend(start, end, amount): #마스크 값이 amount일 때 섞인 색
+    return tuple(round(a + (b - a) * amount) for a, b in zip(start, end))
+
+def points_of(xy): #[(x, y), ...]와 [x, y, ...] 둘 다 받기
+    if not isinstance(xy[0], (tuple, list)):
+        return list(zip(xy[0::2], xy[1::2]))
+    return [tuple(point) for point in xy]
+
+def box_of(xy): #ImageDraw처럼 끝 픽셀까지 포함하는 좌표를 (x, y, 폭, 높이)로
+    (x0, y0), (x1, y1) = points_of(xy)
+    return x0, y0, x1 - x0 + 1, y1 - y0 + 1
+
+def centers(xy): #선/다각형의 꼭짓점은 픽셀 중심
+    return [(x + 0.5, y + 0.5) for x, y in points_of(xy)]
+
+def gradient_axis(kind, width, height): #build_mask와 같은 방향 (linear: 왼쪽->오른쪽, diagonal: 왼쪽 위->오른쪽 아래)
+    if kind == 'linear':
+        return 0, 0, width, 0
+    reach = max(width, height) / math.sqrt(2) #45도 돌린 2*max(폭, 높이) 크기의 세로 그라데이션
+    return width / 2 - reach, height / 2 - reach, width / 2 + reach, height / 2 + reach
+
+def noise_image(width, height, start, end, strength): #noise 마스크를 확대하기 전 크기로 섞은 RGB 이미지 (뷰어가 부드럽게 확대)
+    source = noise_source(width, height)
+    if strength != 1.0:
+        source = source.point(lambda v: int(v * strength))
+    return Image.composite(Image.new('RGB', source.size, end), Image.new('RGB', source.size, start), source)
+
+def png_uri(img):
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+def font_file(font): #FreeTypeFont의 파일 경로 (load_default처럼 메모리에서 읽은 폰트는 None)
+    path = getattr(font, 'path', None)
+    return os.fspath(path) if isinstance(path, (str, os.PathLike)) else None
+
+def static_font_url(path): #STATICFILES_DIRS 아래의 폰트면 정적 파일 주소
+    for root in getattr(settings, 'STATICFILES_DIRS', []):
+        relative = os.path.relpath(path, root)
+        if not relative.startswith('..'):
+            return settings.STATIC_URL + quote(relative.replace(os.sep, '/'))
+    return None
+
+
+class VectorCanvas: #ImageDraw 대신 배경/글자 함수에 넘기는 캔버스: 픽셀을 칠하는 대신 도형을 기록
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.shapes = []
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    def rectangle(self, xy, fill=None, outline=None, width=1):
+        self.rounded_rectangle(xy, 0, fill, outline, width)
+
+    def rounded_rectangle(self, xy, radius=0, fill=None, outline=None, width=1):
+        x, y, w, h = box_of(xy)
+        if fill is not None:
+            self.shapes.append(('rect', x, y, w, h, radius, rgb(fill)))
+        if outline is not None and width: #ImageDraw의 외곽선은 상자 안쪽에 그려지므로 선 중심을 width/2만큼 안으로
+            inset = width / 2
+            self.shapes.append(('frame', x + inset, y + inset, w - width, h - width, max(0, radius - inset), rgb(outline), width))
+
+    def ellipse(self, xy, fill=None, outline=None, width=1):
+        x, y, w, h = box_of(xy)
+        if fill is not None:
+            self.shapes.append(('ellipse', x + w / 2, y + h / 2, w / 2, h / 2, rgb(fill)))
+        if outline is not None and width:
+            self.shapes.append(('ring', x + w / 2, y + h / 2, (w - width) / 2, (h - width) / 2, rgb(outline), width))
+
+    def polygon(self, xy, fill=None, outline=None, width=1):
+        points = centers(xy)
+        if fill is not None:
+            self.shapes.append(('polygon', points, rgb(fill)))
+        if outline is not None and width:
+            self.shapes.append(('line', points, rgb(outline), width, True))
+
+    def line(self, xy, fill=None, width=0, joint=None):
+        points = centers(xy)
+        if fill is not None and len(points) > 1:
+            self.shapes.append(('line', points, rgb(fill), max(1, width), False))
+
+    def point(self, xy, fill=None):
+        for x, y in points_of(xy):
+            self.shapes.append(('rect', x, y, 1, 1, 0, rgb(fill)))
+
+    def bitmap(self, xy, bitmap, fill=None): #마스크로 찍는 효과(플러그인 등)는 이미지로 포함
+        self.shapes.append(('bitmap', xy[0], xy[1], bitmap, rgb(0 if fill is None else fill)))
+
+    def text(self, xy, text, fill=None, font=None, **kwargs): #draw.text를 직접 부르는 플러그인용 (anchor 등은 무시)
+        self.text_run(xy, glyph_run(font, text), fill)
+
+    def gradient(self, kind, width, height, start, end, strength): #fill_background가 마스크 대신 호출
+        self.shapes.append(('gradient', kind, width, height, rgb(start), rgb(end), strength))
+
+    def text_run(self, xy, run, fill): #draw_glyph_run이 마스크 대신 호출 (글자는 글자로 남김)
+        self.shapes.append(('text', xy[0], xy[1], run, rgb(fill), None))
+
+    def neon_run(self, xy, run, glow_color, fill, spread, blur):
+        self.shapes.append(('text', xy[0], xy[1], run, rgb(fill), (rgb(glow_color), spread, blur)))
+
+    def qr(self, xy, data, box_size): #composite_qr이 이미지 대신 호출 (흰 바탕 + 가로로 이어진 모듈)
+        modules, _ = qr_matrix(data)
+        self.shapes.append(('qr', xy[0], xy[1], box_size, modules, qr_runs(data)))
+
+    def fonts(self): #폰트 파일별로 쓰인 글자 (서브셋에 넣을 글자)
+        used = {}
+        for shape in self.shapes:
+            if shape[0] == 'text':
+                path = font_file(shape[3].font)
+                if path is not None:
+                    used.setdefault(path, set()).update(shape[3].text)
+        return used
+
+
+class FontSubset: #문서에 쓰인 글자만 남긴 폰트와 PDF에 필요한 글리프 번호/폭 (1000 단위)
+    __slots__ = ('data', 'name', 'cff', 'gids', 'widths', 'bbox', 'ascent', 'descent')
+
+    def __init__(self, data, name, cff, gids, widths, bbox, ascent, descent):
+        self.data = data
+        self.name = name
+        self.cff = cff
+        self.gids = gids
+        self.widths = widths
+        self.bbox = bbox
+        self.ascent = ascent
+        self.descent = descent
+
+
+FONT_SUBSET_CACHE = LRUCache(
+    getattr(settings, 'CARD_VECTOR_FONT_CACHE_BYTES', 8 * 1024 * 1024),
+    sizeof=lambda subset: len(subset.data) + 64 * len(subset.widths),
+)
+metrics.register_cache('font_subset', FONT_SUBSET_CACHE)
+
+def build_subset(path, text):
+    logging.getLogger('fontTools').setLevel(logging.ERROR) #지원하지 않는 테이블을 버린다는 경고는 생략
+    options = font_subset.Options()
+    options.layout_features = ['kern']
+    options.hinting = False
+    options.desubroutinize = True
+    options.notdef_outline = True
+    font = font_subset.load_font(path, options, lazy=True)
+    try:
+        subsetter = font_subset.Subsetter(options)
+        subsetter.populate(text=text)
+        subsetter.subset(font)
+        buffer = io.BytesIO()
+        font_subset.save_font(font, buffer, options)
+
+        scale = 1000 / font['head'].unitsPerEm
+        metrics_table = font['hmtx']
+        head, hhea = font['head'], font['hhea']
+        tag = ''.join(chr(65 + byte % 26) for byte in hashlib.sha1(text.encode('utf-8')).digest()[:6])
+        postscript = re.sub(r'[^A-Za-z0-9-]', '', font['name'].getDebugName(6) or '') or 'Font'
+        return FontSubset(
+            buffer.getvalue(),
+            f'{tag}+{postscript}', #서브셋 폰트 이름 규칙 (임의 태그 6자 + 원래 이름)
+            'glyf' not in font,
+            {chr(code): font.getGlyphID(name) for code, name in (font.getBestCmap() or {}).items()},
+            [round(metrics_table[name][0] * scale) for name in font.getGlyphOrder()],
+            [round(value * scale) for value in (head.xMin, head.yMin, head.xMax, head.yMax)],
+            round(hhea.ascent * scale),
+            round(hhea.descent * scale),
+        )
+    finally:
+        font.close()
+
+def get_subset(path, chars): #(폰트, 글자 집합)별로 캐시 (fontTools가 없으면 None)
+    if font_subset is None:
+        return None
+    text = ''.join(sorted(chars))
+    def factory():
+        with metrics.timed('font_subset'):
+            return build_subset(path, text)
+    try:
+        return FONT_SUBSET_CACHE.get_or_create((path, text), factory)
+    except Exception as e:
+        logger.warning("폰트 서브셋 생성 오류: %s (%s)", e, path)
+        return None
+
+
+class SvgWriter: #기록한 도형을 SVG 요소로 (viewBox는 캔버스 픽셀, 문서 크기는 명함 실물 크기)
+    def __init__(self, canvas, embed_fonts=True):
+        self.canvas = canvas
+        self.defs = []
+        self.body = []
+        self.families = {}
+        self.filters = {}
+        self.font_faces(embed_fonts)
+
+    def font_faces(self, embed_fonts): #서브셋을 data URI로 포함하거나 (fontTools가 없으면) 정적 파일 주소만 기록
+        faces = []
+        for index, (path, chars) in enumerate(sorted(self.canvas.fonts().items())):
+            subset = get_subset(path, chars) if embed_fonts else None
+            if subset is not None:
+                kind = 'font/otf' if subset.cff else 'font/ttf'
+                src = f"url(data:{kind};base64,{base64.b64encode(subset.data).decode('ascii')})"
+            else:
+                url = static_font_url(path)
+                if url is None:
+                    continue
+                src = f"url('{url}')"
+            self.families[path] = f'card-font-{index}'
+            faces.append(f'@font-face{{font-family:card-font-{index};src:{src}}}')
+        if faces:
+            self.defs.append(f"<style>{''.join(faces)}</style>")
+
+    def rect(self, x, y, w, h, radius, fill):
+        rounded = f' rx="{format_number(radius)}"' if radius else ''
+        self.body.append(
+            f'<rect x="{format_number(x)}" y="{format_number(y)}" width="{format_number(w)}" height="{format_number(h)}"'
+            f'{rounded} fill="{hex_color(fill)}"/>'
+        )
+
+    def frame(self, x, y, w, h, radius, color, width):
+        rounded = f' rx="{format_number(radius)}"' if radius else ''
+        self.body.append(
+            f'<rect x="{format_number(x)}" y="{format_number(y)}" width="{format_number(w)}" height="{format_number(h)}"'
+            f'{rounded} fill="none" stroke="{hex_color(color)}" stroke-width="{format_number(width)}"/>'
+        )
+
+    def ellipse(self, cx, cy, rx, ry, fill):
+        self.body.append(
+            f'<ellipse cx="{format_number(cx)}" cy="{format_number(cy)}" rx="{format_number(rx)}" ry="{format_number(ry)}"'
+            f' fill="{hex_color(fill)}"/>'
+        )
+
+    def ring(self, cx, cy, rx, ry, color, width):
+        self.body.append(
+            f'<ellipse cx="{format_number(cx)}" cy="{format_number(cy)}" rx="{format_number(rx)}" ry="{format_number(ry)}"'
+            f' fill="none" stroke="{hex_color(color)}" stroke-width="{format_number(width)}"/>'
+        )
+
+    def points(self, points):
+        return ' '.join(f'{format_number(x)},{format_number(y)}' for x, y in points)
+
+    def polygon(self, points, fill):
+        self.body.append(f'<polygon points="{self.points(points)}" fill="{hex_color(fill)}"/>')
+
+    def line(self, points, color, width, closed):
+        tag = 'polygon' if closed else 'polyline'
+        self.body.append(
+            f'<{tag} points="{self.points(points)}" fill="none" stroke="{hex_color(color)}" stroke-width="{format_number(width)}"/>'
+        )
+
+    def bitmap(self, x, y, mask, color):
+        img = Image.new('RGBA', mask.size, color)
+        img.putalpha(mask)
+        self.image(x, y, mask.width, mask.height, img)
+
+    def image(self, x, y, w, h, img):
+        self.body.append(
+            f'<image x="{format_number(x)}" y="{format_number(y)}" width="{format_number(w)}" height="{format_number(h)}"'
+            f' preserveAspectRatio="none" href="{png_uri(img)}"/>'
+        )
+
+    def gradient(self, kind, width, height, start, end, strength):
+        if kind == 'noise':
+            self.image(0, 0, width, height, noise_image(width, height, start, end, strength))
+            return
+        gradient_id = f'gradient-{len(self.defs)}'
+        stops = f'<stop offset="0" stop-color="{hex_color(start)}"/><stop offset="1" stop-color="{hex_color(blend(start, end, strength))}"/>'
+        if kind == 'radial':
+            self.defs.append(f'<radialGradient id="{gradient_id}" cx="0.5" cy="0.5" r="{format_number(RADIAL_REACH / 2)}">{stops}</radialGradient>')
+        else:
+            x1, y1, x2, y2 = gradient_axis(kind, width, height)
+            self.defs.append(
+                f'<linearGradient id="{gradient_id}" gradientUnits="userSpaceOnUse" x1="{format_number(x1)}" y1="{format_number(y1)}"'
+                f' x2="{format_number(x2)}" y2="{format_number(y2)}">{stops}</linearGradient>'
+            )
+        self.body.append(f'<rect width="{width}" height="{height}" fill="url(#{gradient_id})"/>')
+
+    def qr(self, x, y, box_size, modules, runs): #render_qr_svg와 같은 path를 모듈 크기만큼 확대
+        self.body.append(
+            f'<g transform="translate({format_number(x)} {format_number(y)}) scale({box_size})" shape-rendering="crispEdges">'
+            f'<rect width="{modules}" height="{modules}" fill="#fff"/><path d="{qr_path(runs)}" fill="#000"/></g>'
+        )
+
+    def neon_filter(self, color, spread, blur): #draw_neon_run과 같은 순서: 팽창 -> 블러 -> 글로우 색
+        key = (color, spread, blur)
+        if key not in self.filters:
+            filter_id = self.filters[key] = f'neon-{len(self.filters)}'
+            self.defs.append(
+                f'<filter id="{filter_id}" filterUnits="userSpaceOnUse" x="0" y="0" width="{self.canvas.width}" height="{self.canvas.height}">'
+                f'<feMorphology in="SourceAlpha" operator="dilate" radius="{spread}"/>'
+                f'<feGaussianBlur stdDeviation="{blur}" result="glow"/>'
+                f'<feFlood flood-color="{hex_color(color)}"/><feComposite in2="glow" operator="in"/></filter>'
+            )
+        return self.filters[key]
+
+    def text(self, x, y, run, fill, glow):
+        font = run.font
+        family = font.getname()[0].replace("'", '')
+        families = ', '.join(filter(None, [self.families.get(font_file(font)), f"'{family}'", 'sans-serif']))
+        attributes = (
+            f'x="{format_number(x)}" y="{format_number(y + font.getmetrics()[0])}" font-family="{families}"'
+            f' font-size="{font.size}" textLength="{format_number(font.getlength(run.text))}" xml:space="preserve"'
+        ) #y는 기준선 (Pillow는 어센더 위치에 찍음), textLength로 폰트가 달라도 정렬 폭 유지
+        content = escape(run.text)
+        color = hex_color(fill)
+        if glow is None:
+            self.body.append(f'<text {attributes} fill="{color}">{content}</text>')
+            return
+        self.body.append(f'<text {attributes} filter="url(#{self.neon_filter(*glow)})">{content}</text>')
+        self.body.append(f'<text {attributes} fill="{color}" stroke="{color}" stroke-width="2" stroke-linejoin="round">{content}</text>')
+
+    def document(self):
+        for kind, *args in self.canvas.shapes:
+            getattr(self, kind)(*args)
+        width_in, height_in = getattr(settings, 'CARD_PRINT_INCHES', (3.5, 2.0))
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width_in}in" height="{height_in}in"'
+            f' viewBox="0 0 {self.canvas.width} {self.canvas.height}">'
+            f"<defs>{''.join(self.defs)}</defs>{''.join(self.body)}</svg>\n"
+        )
+
+
+def path(*items): #숫자와 연산자를 PDF 내용 스트림 문법으로
+    return ' '.join(item if isinstance(item, str) else format_number(item) for item in items)
+
+def unit_color(color):
+    return [value / 255 for value in color]
+
+def rect_path(x, y, w, h, radius=0):
+    radius = min(radius, w / 2, h / 2)
+    if radius <= 0:
+        return path(x, y, w, h, 're')
+    k = radius * (1 - KAPPA)
+    right, bottom = x + w, y + h
+    return path(
+        x + radius, y, 'm', right - radius, y, 'l', right - k, y, right, y + k, right, y + radius, 'c',
+        right, bottom - radius, 'l', right, bottom - k, right - k, bottom, right - radius, bottom, 'c',
+        x + radius, bottom, 'l', x + k, bottom, x, bottom - k, x, bottom - radius, 'c',
+        x, y + radius, 'l', x, y + k, x + k, y, x + radius, y, 'c', 'h',
+    )
+
+def ellipse_path(cx, cy, rx, ry):
+    kx, ky = rx * KAPPA, ry * KAPPA
+    return path(
+        cx + rx, cy, 'm',
+        cx + rx, cy + ky, cx + kx, cy + ry, cx, cy + ry, 'c',
+        cx - kx, cy + ry, cx - rx, cy + ky, cx - rx, cy, 'c',
+        cx - rx, cy - ky, cx - kx, cy - ry, cx, cy - ry, 'c',
+        cx + kx, cy - ry, cx + rx, cy - ky, cx + rx, cy, 'c', 'h',
+    )
+
+def to_unicode_cmap(gids): #글자 복사/검색용 (글리프 번호 -> 유니코드)
+    entries = [f"<{gid:04x}> <{char.encode('utf-16-be').hex()}>" for char, gid in sorted(gids.items())]
+    blocks = ''.join(
+        f'{len(entries[i:i + 100])} beginbfchar\n' + '\n'.join(entries[i:i + 100]) + '\nendbfchar\n'
+        for i in range(0, len(entries), 100)
+    )
+    return (
+        '/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n'
+        '/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n'
+        '/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n'
+        '1 begincodespacerange\n<0000> <ffff>\nendcodespacerange\n'
+        f'{blocks}endcmap\nCMapName currentdict /CMap defineresource pop\nend\nend\n'
+    ).encode('ascii')
+
+
+class PdfPage: #기록한 도형을 PDF 페이지 하나로 (좌표계는 캔버스 픽셀, y축은 아래 방향)
+    def __init__(self, pdf, canvas):
+        self.pdf = pdf
+        self.canvas = canvas
+        self.ops = []
+        self.resources = {}
+        self.fonts = {}
+        for font_path, chars in sorted(canvas.fonts().items()):
+            subset = get_subset(font_path, chars)
+            if subset is not None and not subset.cff: #CFF 폰트(FontFile3)는 PDF 1.6이 필요하므로 글자를 이미지로
+                self.fonts[font_path] = (self.embed_font(subset), subset)
+
+    def resource(self, category, ref, prefix):
+        names = self.resources.setdefault(category, {})
+        name = f'{prefix}{len(names)}'
+        names[name] = ref
+        return name
+
+    def embed_font(self, subset): #Type0 + CIDFontType2 (Identity-H: 글리프 번호를 2바이트로 바로 씀)
+        pdf = self.pdf
+        font_data = pdf.write_stream({'Length1': len(subset.data)}, subset.data)
+        descriptor = pdf.write_object({
+            'Type': Name('FontDescriptor'),
+            'FontName': Name(subset.name),
+            'Flags': 4,
+            'FontBBox': subset.bbox,
+            'ItalicAngle': 0,
+            'Ascent': subset.ascent,
+            'Descent': subset.descent,
+            'CapHeight': subset.ascent,
+            'StemV': 80,
+            'FontFile2': font_data,
+        })
+        descendant = pdf.write_object({
+            'Type': Name('Font'),
+            'Subtype': Name('CIDFontType2'),
+            'BaseFont': Name(subset.name),
+            'CIDSystemInfo': {'Registry': 'Adobe', 'Ordering': 'Identity', 'Supplement': 0},
+            'FontDescriptor': descriptor,
+            'W': [0, subset.widths],
+            'CIDToGIDMap': Name('Identity'),
+        })
+        font = pdf.write_object({
+            'Type': Name('Font'),
+            'Subtype': Name('Type0'),
+            'BaseFont': Name(subset.name),
+            'Encoding': Name('Identity-H'),
+            'DescendantFonts': [descendant],
+            'ToUnicode': pdf.write_stream({}, to_unicode_cmap(subset.gids)),
+        })
+        return self.resource('Font', font, 'F')
+
+    def fill(self, color):
+        self.ops.append(path(*unit_color(color), 'rg'))
+
+    def stroke(self, color, width):
+        self.ops.append(path(*unit_color(color), 'RG', width, 'w'))
+
+    def rect(self, x, y, w, h, radius, fill):
+        self.fill(fill)
+        self.ops.append(rect_path(x, y, w, h, radius) + ' f')
+
+    def frame(self, x, y, w, h, radius, color, width):
+        self.stroke(color, width)
+        self.ops.append(rect_path(x, y, w, h, radius) + ' S')
+
+    def ellipse(self, cx, cy, rx, ry, fill):
+        self.fill(fill)
+        self.ops.append(ellipse_path(cx, cy, rx, ry) + ' f')
+
+    def ring(self, cx, cy, rx, ry, color, width):
+        self.stroke(color, width)
+        self.ops.append(ellipse_path(cx, cy, rx, ry) + ' S')
+
+    def polygon(self, points, fill):
+        self.fill(fill)
+        (x, y), *rest = points
+        self.ops.append(path(x, y, 'm', *(item for point in rest for item in (*point, 'l')), 'h', 'f'))
+
+    def line(self, points, color, width, closed):
+        self.stroke(color, width)
+        (x, y), *rest = points
+        self.ops.append(path(x, y, 'm', *(item for point in rest for item in (*point, 'l')), 'h S' if closed else 'S'))
+
+    def image(self, x, y, w, h, ref): #이미지는 단위 정사각형에 그려지고 첫 행이 위쪽 (y축이 뒤집혀 있으므로 -h)
+        name = self.resource('XObject', ref, 'Im')
+        self.ops.append(path('q', w, 0, 0, -h, x, y + h, 'cm', f'/{name} Do', 'Q'))
+
+    def bitmap(self, x, y, mask, color):
+        smask = self.pdf.add_image(mask)
+        self.image(x, y, mask.width, mask.height, self.pdf.add_image(Image.new('RGB', mask.size, color), smask=smask))
+
+    def gradient(self, kind, width, height, start, end, strength):
+        if kind == 'noise':
+            self.image(0, 0, width, height, self.pdf.add_image(noise_image(width, height, start, end, strength), interpolate=True))
+            return
+        function = {'FunctionType': 2, 'Domain': [0, 1], 'C0': unit_color(start), 'C1': unit_color(blend(start, end, strength)), 'N': 1}
+        if kind == 'radial': #단위 원을 캔버스 크기의 타원으로 늘림
+            shading = {'ShadingType': 3, 'Coords': [0, 0, 0, 0, 0, RADIAL_REACH], 'Extend': [False, True]}
+            transform = path(width / 2, 0, 0, height / 2, width / 2, height / 2, 'cm')
+        else:
+            shading = {'ShadingType': 2, 'Coords': list(gradient_axis(kind, width, height)), 'Extend': [True, True]}
+            transform = ''
+        ref = self.pdf.write_object({**shading, 'ColorSpace': Name('DeviceRGB'), 'Function': function})
+        name = self.resource('Shading', ref, 'Sh')
+        self.ops.append(f"q {path(0, 0, width, height, 're')} W n {transform} /{name} sh Q")
+
+    def qr(self, x, y, box_size, modules, runs):
+        self.rect(x, y, modules * box_size, modules * box_size, 0, (255, 255, 255))
+        self.fill((0, 0, 0))
+        self.ops.append(path(*(
+            item for start, row, length in runs
+            for item in (x + start * box_size, y + row * box_size, length * box_size, box_size, 're')
+        ), 'f'))
+
+    def text(self, x, y, run, fill, glow):
+        font = run.font
+        embedded = self.fonts.get(font_file(font))
+        if glow is not None: #블러는 PDF 도형으로 표현할 수 없으므로 글로우만 이미지로
+            color, spread, blur = glow
+            pad, glow_mask, core = neon_masks(run, spread, blur)
+            origin = (x + run.bbox[0] - pad, y + run.bbox[1] - pad)
+            self.bitmap(*origin, glow_mask, color)
+            if embedded is None:
+                self.bitmap(*origin, core, fill)
+                return
+        elif embedded is None: #포함할 수 없는 폰트(기본 폰트 등)는 글자 마스크를 이미지로
+            self.bitmap(x + run.bbox[0], y + run.bbox[1], run.mask, fill)
+            return
+
+        name, subset = embedded
+        glyphs = ''.join(f'{subset.gids.get(char, 0):04x}' for char in run.text)
+        outline = path(*unit_color(fill), 'RG', 2, 'w', 2, 'Tr') if glow is not None else ''
+        self.ops.append(
+            f"q BT /{name} {font.size} Tf {path(*unit_color(fill), 'rg')} {outline} "
+            f"{path(1, 0, 0, -1, x, y + font.getmetrics()[0], 'Tm')} <{glyphs}> Tj ET Q"
+        )
+
+    def write(self):
+        for kind, *args in self.canvas.shapes:
+            getattr(self, kind)(*args)
+        width_in, height_in = getattr(settings, 'CARD_PRINT_INCHES', (3.5, 2.0))
+        width, height = width_in * 72, height_in * 72
+        flip = path(width / self.canvas.width, 0, 0, -height / self.canvas.height, 0, height, 'cm')
+        content = '\n'.join(['q', flip, *self.ops, 'Q']).encode('latin-1')
+        return self.pdf.add_page(width, height, content, self.resources)
+
+
+def encode_vector(canvas, fmt, embed_fonts=None): #VectorCanvas를 SVG/PDF 바이트로 (PDF는 가능하면 항상 서브셋 포함)
+    if embed_fonts is None:
+        embed_fonts = getattr(settings, 'CARD_VECTOR_EMBED_FONTS', True)
+    if fmt == 'svg':
+        return SvgWriter(canvas, embed_fonts).document().encode('utf-8')
+    if fmt == 'pdf':
+        buffer = io.BytesIO()
+        with PdfWriter(buffer) as pdf:
+            PdfPage(pdf, canvas).write()
+        return buffer.getvalue()
+    raise ValueError(f'지원하지 않는 벡터 형식입니다: {fmt}')
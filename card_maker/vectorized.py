@@ -0,0 +1,148 @@
+import random
+from django.conf import settings
+from PIL import Image, ImageDraw
+from . import metrics
+from .cache import LRUCache
+from .fills import gradient_image
+from .layout import DESIGN_HEIGHT, DESIGN_WIDTH, CanvasScale
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_stamp_table = None
+
+def ellipse_offsets(size): #draw.ellipse([x, y, x+size, y+size])가 칠하는 픽셀 오프셋 (0은 draw.point)
+    if size == 0:
+        return [0], [0]
+    mask = Image.new('L', (size + 1, size + 1), 0)
+    ImageDraw.Draw(mask).ellipse([0, 0, size, size], fill=255)
+    return np.nonzero(np.asarray(mask))
+
+def stamp_table(max_size=5): #크기별 오프셋을 하나의 배열로 이어붙인 표 (더 큰 크기가 필요하면 다시 만듦)
+    global _stamp_table
+    if _stamp_table is None or len(_stamp_table[0]) <= max_size:
+        offsets = [ellipse_offsets(size) for size in range(max_size + 1)]
+        lengths = np.array([len(dy) for dy, _ in offsets])
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        all_dy = np.concatenate([np.asarray(dy) for dy, _ in offsets])
+        all_dx = np.concatenate([np.asarray(dx) for _, dx in offsets])
+        _stamp_table = (starts, lengths, all_dy, all_dx)
+    return _stamp_table
+
+def numpy_rng(rng):
+    return np.random.default_rng(rng.getrandbits(64))
+
+def design_points(gen, count, width, height): #800x500 기준 좌표로 뽑아 캔버스 크기로 변환
+    xs = gen.integers(0, DESIGN_WIDTH + 1, count)
+    ys = gen.integers(0, DESIGN_HEIGHT + 1, count)
+    if (width, height) == (DESIGN_WIDTH, DESIGN_HEIGHT):
+        return xs, ys
+    return np.rint(xs * (width / DESIGN_WIDTH)).astype(np.int64), np.rint(ys * (height / DESIGN_HEIGHT)).astype(np.int64)
+
+def scaled_sizes(sizes, scale): #점(0)은 그대로, 나머지는 최소 1픽셀
+    if scale.s == 1:
+        return sizes
+    return np.where(sizes == 0, 0, np.maximum(1, np.rint(sizes * scale.s))).astype(np.int64)
+
+def pack(colors): #RGB를 Pillow 내부 RGBX 배치와 같은 little-endian uint32로 묶기
+    colors = np.asarray(colors, dtype='<u4')
+    return colors[..., 0] | (colors[..., 1] << 8) | (colors[..., 2] << 16) | (255 << 24)
+
+def new_canvas(width, height, color): #한 픽셀이 uint32 하나인 캔버스 (채우기가 memset 수준으로 빠름)
+    canvas = np.empty((height, width), dtype='<u4')
+    canvas.fill(int(pack(color)))
+    return canvas
+
+def canvas_from_image(img):
+    return np.frombuffer(img.convert('RGBX').tobytes(), dtype='<u4').reshape(img.height, img.width).copy()
+
+GRADIENT_CANVAS_CACHE = LRUCache(
+    getattr(settings, 'CARD_GRADIENT_CACHE_BYTES', 16 * 1024 * 1024),
+    sizeof=lambda canvas: canvas.nbytes,
+)
+
+def base_canvas(width, height, colors, fill, kind, strength): #gradient 테마면 (팔레트, 크기)별로 캐시된 배경에서 시작
+    end = colors.get('gradient_end')
+    if end is None:
+        return new_canvas(width, height, fill)
+    key = (width, height, fill, end, kind, strength)
+    canvas = GRADIENT_CANVAS_CACHE.get_or_create(
+        key, lambda: canvas_from_image(gradient_image(width, height, colors, fill, kind, strength)),
+    )
+    return canvas.copy()
+
+metrics.register_cache('gradient_canvas', GRADIENT_CANVAS_CACHE)
+
+def to_image(canvas):
+    height, width = canvas.shape
+    return Image.frombytes('RGB', (width, height), canvas, 'raw', 'RGBX')
+
+def stamp(canvas, xs, ys, sizes, values): #크기가 제각각인 점들을 반복문 없이 한 번에 찍기
+    height, width = canvas.shape
+    starts, lengths, all_dy, all_dx = stamp_table(max(5, int(sizes.max(initial=0))))
+    counts = lengths[sizes]
+    first = np.repeat(np.cumsum(counts) - counts, counts)
+    index = np.repeat(starts[sizes], counts) + np.arange(counts.sum()) - first
+    px = np.repeat(xs, counts) + all_dx[index]
+    py = np.repeat(ys, counts) + all_dy[index]
+    inside = (px < width) & (py < height)
+    canvas[py[inside], px[inside]] = np.repeat(values, counts)[inside]
+
+def nebula_canvas(width, height, base, colors, gen, count=3, factor=4): #성운은 부드러우므로 1/4 크기로 계산 후 확대
+    small_w, small_h = max(1, width // factor), max(1, height // factor)
+    yy, xx = np.mgrid[0:small_h, 0:small_w].astype(np.float32)
+    glow = np.empty((small_h, small_w, 3), dtype=np.float32)
+    glow[:] = base
+    tints = np.array([colors['primary'], colors['secondary'], colors['accent']], dtype=np.float32)
+    for i in range(count):
+        cx, cy = gen.uniform(0, small_w), gen.uniform(0, small_h)
+        radius = gen.uniform(0.15, 0.35) * small_w
+        intensity = np.exp(-((xx - cx) ** 2 + (yy - cy) ** 2) / (2 * radius * radius)) * 0.35
+        glow += intensity[..., None] * tints[i % len(tints)]
+    small = Image.fromarray(np.clip(glow, 0, 255).astype(np.uint8), 'RGB')
+    return canvas_from_image(small.resize((width, height), Image.BILINEAR))
+
+def render_galaxy_background(width, height, colors, rng=random, star_count=None, with_nebula=None):
+    star_count = star_count or getattr(settings, 'CARD_GALAXY_STARS', 150)
+    if with_nebula is None:
+        with_nebula = getattr(settings, 'CARD_GALAXY_NEBULA', False)
+    gen = numpy_rng(rng)
+
+    if with_nebula:
+        canvas = nebula_canvas(width, height, (10, 10, 30), colors, gen)
+    else:
+        canvas = base_canvas(width, height, colors, (10, 10, 30), 'radial', 0.35)
+
+    xs, ys = design_points(gen, star_count, width, height)
+    sizes = scaled_sizes(gen.choice([0, 2, 3], size=star_count, p=[0.80, 0.15, 0.05]), CanvasScale(width, height))
+    brightness = gen.integers(100, 256, star_count)
+    stamp(canvas, xs, ys, sizes, pack(np.repeat(brightness[:, None], 3, axis=1)))
+
+    return to_image(canvas)
+
+def render_grunge_background(width, height, colors, rng=random, speckle_count=None):
+    speckle_count = speckle_count or getattr(settings, 'CARD_GRUNGE_SPECKLES', 100)
+    gen = numpy_rng(rng)
+
+    base_color = colors['grunge_base']
+    canvas = base_canvas(width, height, colors, base_color, 'noise', 0.5)
+
+    scale = CanvasScale(width, height)
+    palette = pack([base_color, colors['accent'], colors['secondary']])
+    xs, ys = design_points(gen, speckle_count, width, height)
+    sizes = scaled_sizes(gen.integers(1, 6, speckle_count), scale)
+    values = palette[gen.choice(3, size=speckle_count, p=[0.3, 0.5, 0.2])]
+    stamp(canvas, xs, ys, sizes, values)
+
+    img = to_image(canvas)
+    draw = ImageDraw.Draw(img)
+    lines = gen.integers(0, [DESIGN_WIDTH + 1, DESIGN_HEIGHT + 1, DESIGN_WIDTH + 1, DESIGN_HEIGHT + 1], size=(20, 4))
+    widths = gen.integers(1, 4, 20)
+    for (x1, y1, x2, y2), line_width in zip(lines.tolist(), widths.tolist()):
+        draw.line([(scale.x(x1), scale.y(y1)), (scale.x(x2), scale.y(y2))], fill=colors['accent'], width=scale.length(line_width))
+    return img
+
+def vectorized_enabled(): #numpy가 있고 설정이 켜져 있을 때만 벡터화된 배경 사용
+    return np is not None and getattr(settings, 'CARD_VECTORIZED_BACKGROUNDS', True)
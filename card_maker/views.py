@@ -1,71 +1,593 @@
 from django.shortcuts import render
-from django.http import JsonResponse, HttpResponse, Http404
+from django.http import JsonResponse, HttpResponse, Http404, FileResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+import asyncio
+import csv
+import functools
+import io
+import ipaddress
 import json
+import mimetypes
 import os
-import uuid
-from .utils import create_business_card, generate_qr_code
+import re
+import tempfile
+import zipfile
+from . import metrics
+from .imposition import SHEET_FORMATS, SheetLayout, impose_cards
+from .edits import card_spec, edit_card, parse_changes, start_edit
+from .idempotency import IdempotencyConflict, IdempotencyStore, request_fingerprint
+from .jobs import enqueue_render_job, recover_expired_jobs
+from .models import RenderJob
+from .offload import Overloaded, SingleFlight, io_pool, render_pool
+from .storage import get_storage
+from .palette import normalize_hex
+from .layout import card_size
+from .utils import (
+    TEMPLATE_REGISTRY, create_business_cards, create_cached_card, plan_card, plan_previews,
+    preview_palettes, render_previews, render_print_file, render_spec, render_vector_file, save_card_files,
+    validate_variant,
+)
+from .vector import VECTOR_FORMATS
+
+GENERATE_FLIGHTS = SingleFlight('generate')
+GENERATE_IDEMPOTENCY = IdempotencyStore('card_generate')
 
 def index(request): #메인페이지
     return render(request, 'card_maker/index.html')
 
+def parse_resolution(value): #화면용 해상도만 허용 (인쇄용은 다운로드할 때 따로 렌더링)
+    if value == 'print':
+        raise ValueError('인쇄용 해상도는 다운로드 주소에 ?resolution=print를 붙여 요청하세요.')
+    card_size(value)
+    return value
+
+def parse_body(request): #JSON 객체 본문만 허용 ([1, 2] 같은 본문은 ValueError)
+    data = json.loads(request.body)
+    if not isinstance(data, dict):
+        raise ValueError('요청 본문은 JSON 객체여야 합니다.')
+    return data
+
+def build_user_data(data): #렌더링을 시작하기 전에 글자 필드와 색상 코드를 한 번에 검증 (잘못되면 ValueError)
+    user_data = {}
+    for key in ('name', 'school', 'phone'):
+        value = data.get(key)
+        if value is None: #CSV에서 칸이 모자란 행도 None
+            value = ''
+        if not isinstance(value, str):
+            raise ValueError(f'{key}는 문자열이어야 합니다.')
+        user_data[key] = value
+    user_data['favorite_color'] = normalize_hex(data.get('favorite_color') or '#3498db')
+    return user_data
+
+def parse_seed(value):
+    if value is None or value == '':
+        return None
+    try:
+        seed = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('seed는 정수여야 합니다.')
+    if not 0 <= seed < 2 ** 64:
+        raise ValueError('seed가 범위를 벗어났습니다.')
+    return seed
+
+def parse_variant(data): #미리보기에서 고른 템플릿/테마/seed (없으면 None, 무작위)
+    template, theme = validate_variant(data.get('template') or None, data.get('theme') or None)
+    return {'template': template, 'theme': theme, 'seed': parse_seed(data.get('seed'))}
+
+def render_generate(user_data, host, inline, resolution, seeded, variant=None): #렌더링 스레드에서 실행
+    variant = variant or {}
+    if seeded and not any(variant.values()):
+        with metrics.collect('generate_card'):
+            return create_cached_card(user_data, host, inline=inline, resolution=resolution)
+
+    with metrics.collect('generate_card'):
+        spec = plan_card(user_data, variant.get('seed'), variant.get('template'), variant.get('theme'))
+        card_img = render_spec(spec, resolution)
+
+        urls = save_card_files(card_img, host, inline=inline, spec=spec)
+    return {**urls, 'template': spec['template']}
+
+def parse_flag(data, key, default): #JSON true/false만 허용 ("false" 같은 문자열은 참으로 읽히므로 거절)
+    value = data.get(key, default)
+    if not isinstance(value, bool):
+        raise ValueError(f'{key}는 true 또는 false여야 합니다.')
+    return value
+
+def parse_idempotency_key(request):
+    key = request.headers.get('Idempotency-Key')
+    if key is not None and not 0 < len(key) <= 255:
+        raise ValueError('Idempotency-Key는 1~255자여야 합니다.')
+    return key
+
+def record_generate(client, idempotency_key, fingerprint, future): #렌더링 스레드의 완료 콜백
+    if future.cancelled() or future.exception() is not None:
+        GENERATE_IDEMPOTENCY.abandon(client, idempotency_key)
+    else:
+        GENERATE_IDEMPOTENCY.record(client, idempotency_key, fingerprint, {'success': True, **future.result()})
+
+def is_trusted_proxy(address, proxies):
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(address in network for network in proxies)
+
+def client_key(request): #클라이언트별 한도/single-flight/Idempotency-Key 범위 (신뢰하는 프록시 뒤에서는 전달된 주소)
+    remote = request.META.get('REMOTE_ADDR')
+    proxies = [ipaddress.ip_network(network, strict=False) for network in getattr(settings, 'CARD_TRUSTED_PROXIES', [])]
+    if not proxies or not is_trusted_proxy(remote, proxies):
+        return remote
+    forwarded = [address.strip() for address in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if address.strip()]
+    for address in reversed(forwarded): #오른쪽(가까운 쪽)부터 신뢰하는 프록시를 건너뜀 (왼쪽은 클라이언트가 꾸밀 수 있음)
+        if not is_trusted_proxy(address, proxies):
+            return address
+    if forwarded:
+        return forwarded[0]
+    return request.META.get('HTTP_X_REAL_IP') or remote
+
+def overloaded_response(error): #대기열이 가득 차면 기다리게 하지 않고 바로 거절
+    response = JsonResponse({'success': False, 'error': str(error)}, status=error.status)
+    response['Retry-After'] = str(error.retry_after)
+    return response
+
+@csrf_exempt
+async def generate_card(request): #명함 생성 (렌더링은 제한된 스레드 풀에서)
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST method required'})
+
+    try:
+        data = parse_body(request)
+        user_data = build_user_data(data)
+        resolution = parse_resolution(data.get('resolution', 'preview'))
+        variant = parse_variant(data)
+        inline = parse_flag(data, 'inline', getattr(settings, 'CARD_INLINE_RESPONSE', False))
+        seeded = parse_flag(data, 'seeded', getattr(settings, 'CARD_DETERMINISTIC', False))
+        idempotency_key = parse_idempotency_key(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    client = client_key(request)
+    args = (user_data, request.get_host(), inline, resolution, seeded, variant)
+    fingerprint = request_fingerprint(*args)
+
+    if idempotency_key:
+        try:
+            replay = await GENERATE_IDEMPOTENCY.begin(client, idempotency_key, fingerprint)
+        except IdempotencyConflict as e:
+            inflight = GENERATE_FLIGHTS.get((client, fingerprint)) if e.status == 409 else None
+            if inflight is not None: #같은 프로세스에서 처리 중이면 409 대신 그 결과를 함께 기다림
+                try:
+                    return JsonResponse({'success': True, **await asyncio.shield(asyncio.wrap_future(inflight))})
+                except Exception:
+                    pass
+            response = JsonResponse({'success': False, 'error': str(e)}, status=e.status)
+            if e.status == 409:
+                response['Retry-After'] = '1'
+            return response
+        if replay is not None:
+            response = JsonResponse(replay)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+
+    def submit(): #같은 클라이언트의 같은 요청이 처리 중이면 렌더링과 파일 쓰기를 한 번만
+        return render_pool().submit(render_generate, *args, client=client)
+
+    try:
+        future = GENERATE_FLIGHTS.submit((client, fingerprint), submit)
+    except Overloaded as e:
+        if idempotency_key:
+            GENERATE_IDEMPOTENCY.abandon(client, idempotency_key)
+        return overloaded_response(e)
+    if idempotency_key: #요청이 끊겨도 작업이 끝나면 결과를 기록 (재시도가 409에 묶이지 않도록)
+        future.add_done_callback(functools.partial(record_generate, client, idempotency_key, fingerprint))
+
+    try:
+        result = await asyncio.shield(asyncio.wrap_future(future))
+    except Exception as e:
+        metrics.increment('render_errors')
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        })
+
+    return JsonResponse({
+        'success': True,
+        **result,
+    })
+
+SESSION_ID = re.compile(r'[0-9a-f]{16}')
+
+@csrf_exempt
+async def start_edit_session(request): #편집 세션 시작 (/generate/와 같은 입력, 또는 {"card": 기존 명함 파일 이름})
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST method required'})
+
+    try:
+        data = parse_body(request)
+        resolution = parse_resolution(data.get('resolution', 'preview'))
+        if not data.get('card'):
+            variant = parse_variant(data)
+            spec = plan_card(build_user_data(data), variant['seed'], variant['template'], variant['theme'])
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    client = client_key(request)
+    try:
+        if data.get('card'):
+            spec = await io_pool().run(card_spec, str(data['card']), client=client)
+            if spec is None:
+                raise Http404("파일을 찾을 수 없습니다.")
+        result = await render_pool().run(start_edit, spec, request.get_host(), resolution, client=client)
+    except Overloaded as e:
+        return overloaded_response(e)
+    except Http404:
+        raise
+    except Exception as e:
+        metrics.increment('render_errors')
+        return JsonResponse({'success': False, 'error': str(e)})
+
+    return JsonResponse({'success': True, **result})
+
+@csrf_exempt
+async def edit_session(request, session_id): #PATCH로 바뀐 필드만 보내면 영향을 받는 레이어만 다시 그림 (세션을 시작할 때 받은 edit_token 필요)
+    if request.method != 'PATCH':
+        return JsonResponse({'success': False, 'error': 'PATCH method required'})
+    if not SESSION_ID.fullmatch(session_id):
+        raise Http404("편집 세션을 찾을 수 없습니다.")
+
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        return JsonResponse({'success': False, 'error': '편집 토큰을 Authorization: Bearer 헤더로 보내주세요.'}, status=401)
+
+    try:
+        changes = parse_changes(json.loads(request.body))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    try:
+        result = await render_pool().run(
+            edit_card, session_id, changes, request.get_host(), token.strip(), client=client_key(request),
+        )
+    except Overloaded as e:
+        return overloaded_response(e)
+    except PermissionDenied as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=403)
+    except ValueError as e: #템플릿/테마 조합 오류
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    except Exception as e:
+        metrics.increment('render_errors')
+        return JsonResponse({'success': False, 'error': str(e)})
+    if result is None:
+        raise Http404("편집 세션을 찾을 수 없습니다.")
+
+    return JsonResponse({'success': True, **result})
+
+def parse_preview_variants(data): #variants=[{template, theme}] 또는 templates x themes (쓸 수 없는 조합은 제외)
+    if data.get('variants'):
+        if not isinstance(data['variants'], list) or not all(isinstance(item, dict) for item in data['variants']):
+            raise ValueError('variants는 {template, theme} 객체의 목록이어야 합니다.')
+        variants = [validate_variant(item.get('template'), item.get('theme')) for item in data['variants']]
+    elif data.get('templates') or data.get('themes'):
+        for key in ('templates', 'themes'):
+            if data.get(key) and not isinstance(data[key], list):
+                raise ValueError(f'{key}는 목록이어야 합니다.')
+        templates = data.get('templates') or TEMPLATE_REGISTRY.names
+        for template in templates:
+            validate_variant(template)
+        if not data.get('themes'):
+            variants = [(template, None) for template in templates]
+        else:
+            for theme in data['themes']:
+                validate_variant(theme=theme)
+            variants = [
+                (template, theme) for template in templates for theme in data['themes']
+                if theme in TEMPLATE_REGISTRY.themes_for(template)
+            ]
+    else:
+        return None
+
+    max_variants = getattr(settings, 'CARD_PREVIEW_MAX_VARIANTS', 40)
+    if not variants:
+        raise ValueError('미리볼 템플릿/테마 조합이 없습니다.')
+    if len(variants) > max_variants:
+        raise ValueError(f'한 번에 최대 {max_variants}개까지 미리볼 수 있습니다.')
+    return variants
+
 @csrf_exempt
-def generate_card(request): #명함 생성
-    if request.method == 'POST':
+async def preview_cards(request): #템플릿/테마별 썸네일을 한 번에 병렬로 렌더링 (저장, QR 없음; 고른 것만 /generate/로)
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST method required'})
+
+    try:
+        data = parse_body(request)
+        user_data = build_user_data(data)
+        resolution = parse_resolution(data.get('resolution', 'thumbnail'))
+        specs = plan_previews(user_data, parse_preview_variants(data), parse_seed(data.get('seed')))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    try:
+        with metrics.timed('preview_palette'):
+            palettes = preview_palettes(specs)
+        pool = render_pool()
+        groups = min(len(specs), pool.workers) #워커 수만큼 묶어서 제출 (대기열은 묶음 수만큼만 차지)
+        with metrics.timed('preview'):
+            results = await pool.map(
+                functools.partial(render_previews, resolution=resolution, palettes=palettes),
+                [specs[index::groups] for index in range(groups)],
+                client=client_key(request),
+            )
+        variants = [None] * len(specs)
+        for index, group in enumerate(results):
+            variants[index::groups] = group
+    except Overloaded as e:
+        return overloaded_response(e)
+    except Exception as e:
+        metrics.increment('render_errors')
+        return JsonResponse({'success': False, 'error': str(e)})
+
+    return JsonResponse({'success': True, 'seed': str(specs[0]['seed']), 'resolution': resolution, 'variants': variants})
+
+def metrics_view(request): #Prometheus 수집용 지표
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def parse_batch_items(request): #CSV 또는 JSON으로 업로드된 참가자 목록 파싱
+    upload = request.FILES.get('file')
+    if upload is not None:
+        body = upload.read()
+        is_csv = upload.name.lower().endswith('.csv')
+    else:
+        body = request.body
+        is_csv = request.content_type == 'text/csv'
+    return parse_batch_rows(body, is_csv)
+
+def parse_batch_rows(body, is_csv): #업로드 본문(bytes)을 검증된 명함 정보 목록으로 변환
+    if is_csv:
+        rows = list(csv.DictReader(io.StringIO(body.decode('utf-8-sig'))))
+    else:
+        rows = json.loads(body)
+        if isinstance(rows, dict):
+            rows = rows.get('cards', [])
+
+    items = []
+    for index, row in enumerate(rows):
         try:
-            data = json.loads(request.body)
+            if not isinstance(row, dict):
+                raise ValueError('명함 정보는 JSON 객체여야 합니다.')
+            items.append(build_user_data(row))
+        except ValueError as e:
+            raise ValueError(f'{index}번째 항목: {e}')
+    return items
+
+def build_batch_zip(results): #결과를 임시 파일에 ZIP으로 기록 (메모리에 모으지 않음)
+    archive = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    manifest = []
+    with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for index, result in enumerate(results):
+            if result['success']:
+                name = f"{index:04d}_{result['template']}.{result['ext']}"
+                zf.writestr(name, result['image'])
+                manifest.append({'index': index, 'success': True, 'file': name, 'template': result['template']})
+            else:
+                manifest.append({'index': index, 'success': False, 'error': result['error']})
+        zf.writestr('manifest.json', json.dumps(manifest, ensure_ascii=False, indent=2))
+    archive.seek(0)
+    return archive
+
+def build_sheet_response(items, output_format, paper):
+    archive = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    try:
+        layout = SheetLayout(paper)
+        summary = impose_cards(items, archive, output_format, layout)
+    except ValueError as e: #지원하지 않는 용지, 빈 목록
+        archive.close()
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    archive.seek(0)
+    response = FileResponse(
+        archive, as_attachment=True, filename=f'cards_{layout.paper}.{output_format}',
+        content_type=SHEET_FORMATS[output_format][1],
+    )
+    response['X-Card-Sheets'] = str(summary['sheets'])
+    response['X-Card-Failures'] = str(len(summary['failures']))
+    return response
 
-            user_data = {
-                'name': data.get('name', ''),
-                'school': data.get('school', ''),
-                'phone': data.get('phone', ''),
-                'favorite_color': data.get('favorite_color', '#3498db'),
-            }
+@csrf_exempt
+def generate_batch(request): #명함 일괄 생성
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST method required'})
+
+    try:
+        items = parse_batch_items(request)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    max_items = getattr(settings, 'CARD_BATCH_MAX_ITEMS', 1000)
+    if len(items) > max_items:
+        return JsonResponse({'success': False, 'error': f'한 번에 최대 {max_items}장까지 생성할 수 있습니다.'}, status=400)
+
+    output_format = request.GET.get('format', 'json')
+    if output_format in SHEET_FORMATS: #인쇄용 해상도로 렌더링해 용지(A4/Letter)에 배치한 PDF/TIFF
+        return build_sheet_response(items, output_format, request.GET.get('paper'))
+
+    results = create_business_cards(items)
+
+    if output_format == 'zip':
+        return FileResponse(build_batch_zip(results), as_attachment=True, filename='cards.zip', content_type='application/zip')
+
+    host = request.get_host()
+    manifest = []
+    for index, result in enumerate(results):
+        if result['success']:
+            urls = save_card_files(result['image'], host, ext=result['ext'], spec=result['spec'])
+            manifest.append({'index': index, 'success': True, 'template': result['template'], **urls})
+        else:
+            manifest.append({'index': index, 'success': False, 'error': result['error']})
+
+    return JsonResponse({'success': True, 'count': len(manifest), 'cards': manifest})
 
-            card_img, template = create_business_card(user_data)
+@csrf_exempt
+def create_job(request): #비동기 명함 생성 작업 등록
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST method required'})
+
+    try:
+        user_data = build_user_data(parse_body(request))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    job = enqueue_render_job(user_data, request.get_host())
+    return JsonResponse({
+        'success': True,
+        'job_id': str(job.id),
+        'status': job.status,
+        'status_url': f'/jobs/{job.id}/',
+    }, status=202)
+
+def job_status(request, job_id): #작업 상태 조회 (조회할 때 임대가 끝난 작업이 있으면 다시 큐에 넣음)
+    recover_expired_jobs()
+    try:
+        job = RenderJob.objects.get(id=job_id)
+    except RenderJob.DoesNotExist:
+        raise Http404("작업을 찾을 수 없습니다.")
+    return JsonResponse({'success': job.status != RenderJob.STATUS_FAILED, **job.as_dict()})
 
-            filename = f"card_{uuid.uuid4().hex[:8]}.png"
-            filepath = os.path.join(settings.MEDIA_ROOT, 'cards', filename)
+def parse_range(header, size): #단일 바이트 범위만 지원 (bytes=start-end)
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    start, _, end = header[len('bytes='):].strip().partition('-')
+    try:
+        if start:
+            start = int(start)
+            end = int(end) if end else size - 1
+        else:
+            length = int(end)
+            if length <= 0:
+                raise ValueError
+            start, end = max(size - length, 0), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise ValueError('unsatisfiable range')
+    return start, min(end, size - 1)
 
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+def iter_file_range(f, length, chunk_size=64 * 1024):
+    try:
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
 
-            card_img.save(filepath)
+async def aiter_file_range(f, length, chunk_size=64 * 1024): #ASGI는 동기 이터레이터를 list로 다 읽은 뒤 보내므로 조각마다 스레드에서 읽음
+    read = sync_to_async(f.read, thread_sensitive=False)
+    try:
+        while length > 0:
+            chunk = await read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
 
-            server_ip = request.get_host()
-            download_url = f'http://{server_ip}/download/{filename}/'
-            qr_img = generate_qr_code(download_url)
+def file_response(request, kind, name, download_name=None): #조건부 GET, Range, X-Sendfile을 지원하는 파일 응답 (본문은 응답을 보낼 때 조금씩 읽음)
+    storage = get_storage()
+    stored = storage.stat(kind, name)
+    if stored is None:
+        raise Http404("파일을 찾을 수 없습니다.")
+
+    etag = f'"{stored.mtime_ns:x}-{stored.size:x}"'
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stored.mtime))
+    if not_modified is not None:
+        return not_modified
 
-            qr_filename = f"qr_{uuid.uuid4().hex[:8]}.png"
-            qr_filepath = os.path.join(settings.MEDIA_ROOT, 'qrcodes', qr_filename)
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    sendfile = getattr(settings, 'CARD_SENDFILE', None)
 
-            os.makedirs(os.path.dirname(qr_filepath), exist_ok=True)
+    if sendfile and stored.path: #디스크에 기록된 파일만 웹 서버에 넘김 (지연 쓰기 중이면 직접 응답)
+        response = HttpResponse(content_type=content_type)
+        if sendfile == 'x-accel-redirect':
+            relpath = os.path.relpath(stored.path, storage.root).replace(os.sep, '/')
+            response['X-Accel-Redirect'] = getattr(settings, 'CARD_SENDFILE_PREFIX', '/protected-media/') + relpath
+        else:
+            response['X-Sendfile'] = str(stored.path)
+    else:
+        if_range = request.headers.get('If-Range')
+        byte_range = None
+        if if_range is None or if_range == etag:
+            try:
+                byte_range = parse_range(request.headers.get('Range'), stored.size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{stored.size}'
+                return response
+
+        try:
+            f = storage.open(kind, name)
+        except FileNotFoundError:
+            raise Http404("파일을 찾을 수 없습니다.")
+        start, end = byte_range or (0, stored.size - 1)
+        if isinstance(request, ASGIRequest):
+            f.seek(start)
+            response = StreamingHttpResponse(aiter_file_range(f, end - start + 1), content_type=content_type)
+            response['Content-Length'] = str(end - start + 1)
+        elif byte_range:
+            f.seek(start)
+            response = StreamingHttpResponse(iter_file_range(f, end - start + 1), content_type=content_type)
+            response['Content-Length'] = str(end - start + 1)
+        else:
+            response = FileResponse(f, content_type=content_type)
+        if byte_range:
+            response.status_code = 206
+            response['Content-Range'] = f'bytes {start}-{end}/{stored.size}'
+        response['Accept-Ranges'] = 'bytes'
 
-            qr_img.save(qr_filepath)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stored.mtime)
+    response['Cache-Control'] = f"public, max-age={getattr(settings, 'CARD_MEDIA_MAX_AGE', 3600)}"
+    if download_name:
+        response['Content-Disposition'] = f'attachment; filename="{download_name}"'
+    return response
 
-            return JsonResponse({
-                'success': True,
-                'card_url': f'/media/cards/{filename}',
-                'qr_url': f'/media/qrcodes/{qr_filename}',
-                'download_url': download_url,
-                'template': template,
-            })
-        
-        except Exception as e:
-            return JsonResponse({
-                'success': False,
-                'error': str(e)
-            })
-        
-    return JsonResponse({'success': False, 'error': 'POST method required'})
+async def download_card(request, filename): #명함 다운로드 (?resolution=print면 인쇄용 고해상도, ?format=svg|pdf면 벡터)
+    client = client_key(request)
+    fmt = request.GET.get('format')
+    try:
+        if fmt is not None:
+            if fmt not in VECTOR_FORMATS:
+                return JsonResponse({'success': False, 'error': f'지원하지 않는 형식입니다: {fmt}'}, status=400)
+            vector_name = await render_pool().run(render_vector_file, filename, fmt, client=client)
+            if vector_name is None:
+                raise Http404("파일을 찾을 수 없습니다.")
+            return await io_pool().run(
+                file_response, request, 'vector', vector_name, vector_name.replace('card_', 'card_vector_', 1), client=client,
+            )
+        if request.GET.get('resolution') == 'print':
+            print_name = await render_pool().run(render_print_file, filename, client=client)
+            if print_name is None:
+                raise Http404("파일을 찾을 수 없습니다.")
+            return await io_pool().run(
+                file_response, request, 'print', print_name, print_name.replace('card_', 'card_print_', 1), client=client,
+            )
+        return await io_pool().run(file_response, request, 'cards', filename, filename, client=client)
+    except Overloaded as e:
+        return overloaded_response(e)
 
-def download_card(request, filename): #명함 다운로드
-    filepath = os.path.join(settings.MEDIA_ROOT, 'cards', filename)
+MEDIA_KINDS = ('cards', 'qrcodes')
 
-    if not os.path.exists(filepath):
+async def serve_media(request, kind, filename): #DEBUG 여부와 관계없이 명함/QR 이미지 제공
+    if kind not in MEDIA_KINDS:
         raise Http404("파일을 찾을 수 없습니다.")
-    
-    with open(filepath, 'rb') as f:
-        response = HttpResponse(f.read(), content_type='image/png')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return response
\ No newline at end of file
+    try:
+        return await io_pool().run(file_response, request, kind, filename, client=client_key(request))
+    except Overloaded as e:
+        return overloaded_response(e)